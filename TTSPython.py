@@ -1,58 +1,172 @@
-import threading
+import time
+_process_started = time.perf_counter()  # --profile-startup measures from here
+import sys
+
+if __name__ == "__main__" and (sys.argv[1:2] == ["export"] or "--serve" in sys.argv[1:]):
+    # Headless modes are dispatched before tkinter is imported, so they run where Tk is not installed
+    if sys.argv[1] == "export":
+        # Batch conversion: python TTSPython.py export [options] in_dir out_dir
+        from tts_core import batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+    # HTTP API: python TTSPython.py --serve [--port 8765] [options]
+    from tts_server import serve_main
+    sys.exit(serve_main([arg for arg in sys.argv[1:] if arg != "--serve"]))
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import pyttsx3
 import os
+import platform
 import json
 import re
-import time
+import threading
+
+from tts_core import (AudioCache, AudioPlayer, ClipboardDelta, ClipboardPoller, DuplicateIndex, EngineService, ExportJob, LargeFile,
+                      LineIndex, MatchIndex, Metrics, Normalizer, QueueItem, QueueJournal, ReplaceAllJob, SpeechQueue, detect_encoding,
+                      Playback, Speaker, VoiceCatalog, iter_chunks)
+
+class StartupProfile:
+    """Wall-clock timings of startup phases, printed with --profile-startup"""
+
+    def __init__(self, started, enabled=False):
+        self.started = started
+        self.enabled = enabled
+        self.phases = []  # (phase, seconds since the previous mark, seconds since start)
+        self.last = started
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last, now - self.started))
+        self.last = now
+
+    def has(self, phase):
+        return any(name == phase for name, _, _ in self.phases)
+
+    def report(self, engine_timings=()):
+        if not self.enabled:
+            return
+        print(f"{'Startup phase':<30}{'step ms':>10}{'total ms':>10}")
+        for phase, step, total in self.phases:
+            print(f"{phase:<30}{step * 1000:>10.1f}{total * 1000:>10.1f}")
+        # The engine initializes on its own thread, overlapping the phases above
+        for phase, seconds in engine_timings:
+            print(f"{'  engine thread: ' + phase:<30}{seconds * 1000:>10.1f}")
+        sys.stdout.flush()
+
+
+def _opening(chunks, max_chars):
+    """The first chunks of a stream, up to about max_chars of text"""
+    total = 0
+    for chunk in chunks:
+        yield chunk
+        total += len(chunk.text)
+        if total >= max_chars:
+            return
+
 
 class ReaderApp:
-    def __init__(self, root):
+    def __init__(self, root, profile=None, data_dir=None):
         self.root = root
+        self.profile = profile or StartupProfile(time.perf_counter())
         self.root.title("Read Aloud — Enhanced Text-to-Speech")
-        self.speaking = False
-        self.speak_thread = None
-        self.current_engine = None
-        self.stop_requested = False
-        self.global_stop_requested = False  # Global stop flag for all TTS operations
-        self.all_engines = []  # Track all active TTS engines
         self.current_file = None
-        # Store settings in the script directory, not AppData
-        script_dir = os.path.dirname(os.path.abspath(__file__))
+        self.large_file = None  # LargeFile when a file is open in read-only large file mode
+        self.large_file_mb = 50  # Files at least this big open in large file mode
+        self.large_window_chars = 200000  # Characters loaded around the viewport
+        self.window_start = 0  # Document offset of the editor's first character
+        self.window_len = 0
+        self.slide_pending = False
+        self.load_generation = 0  # Bumped to cancel an in-progress incremental load
+        self.undo_paused_for = None  # Generation of the incremental load that turned undo off
+        # Store settings in the script directory, not AppData (data_dir overrides, e.g. for benchmarks)
+        script_dir = data_dir or os.path.dirname(os.path.abspath(__file__))
         self.settings_file = os.path.join(script_dir, "tts_settings.json")
         self.dark_mode = False
         self.clipboard_monitor_enabled = False
-        self.last_clipboard = ""
+        self.clipboard_poll_id = None  # Pending after() for the next clipboard read
+        self.clipboard_settle_ms = 300  # Quiet time before a clipboard change is acted on
+        self.clipboard_idle_ms = 500  # Slowest clipboard polling while nothing changes
+        self.clipboard_max_chars = 1000000  # Longest clipboard text kept for speaking/queueing
+        self.clipboard_dedup_window_s = 600  # Skip clipboard text already queued this recently (0 = off)
+        self.clipboard_min_overlap = 80  # Speak only the new tail when a copy repeats this much of the last one
         self.highlight_tag = "highlight"
+        self.highlight_range = None  # Tk indices of the highlighted word
+        self.line_index = None  # LineIndex for the text being spoken
+        self.pending_word = None  # Latest word event not yet drawn
+        self.highlight_scheduled = False
+        self.highlight_interval_ms = 16  # Draw at most one highlight per frame
         self.current_word_indices = []
         self.clipboard_auto_queue = False  # Auto-queue clipboard items when speaking
         self.clipboard_action_mode = 'speak'  # Default clipboard action mode (will be overridden by load_settings)
         
         # Speech Queue System
-        self.speech_queue = []
-        self.queue_playing = False
-        self.current_queue_index = -1
+        self.speech_queue = SpeechQueue()  # .current is the item being played
+        self.queue_token = None  # CancelToken while the queue is playing
+        self.queue_command = None
+        self.speech_command = None
+        self.queue_lookahead = 1  # Queue items whose opening is rendered ahead of the one playing
+        self.prerender_opening_chars = 2000  # Text rendered ahead per upcoming queue item
+        self.prerender_budget_mb = 200  # Audio budget for openings of items not yet playing
+        self.audio_cache_enabled = True
+        self.audio_cache_mb = 500
+        self.export_jobs = 0  # Export worker processes (0 = one per CPU core)
+        self.saved_rate = None  # Voice settings from the last session (None = engine default)
+        self.saved_volume = None
+        self.saved_voice = None
+        self.export_job = None
+        self.search_dialog = None
+        self.normalize_text = True  # Expand URLs/numbers/abbreviations and drop symbols before synthesis
+        self.lexicon = {}  # Pronunciation overrides: {"word": "how to say it"}
+        self.metrics_readout = True  # Live latency readout on the status bar
+        self.metrics_interval_ms = 250  # Main-loop lag probe period
+        self.metrics = Metrics()
+        self.playback = Playback(self.metrics)  # idle/starting/speaking/stopping, one CancelToken per operation
+        self.first_word_watch = []  # (command, {metric: perf_counter() it is measured from})
+        self.queue_item_ended = None  # perf_counter() when the last queue item finished
+        self.clipboard_changed_at = None  # perf_counter() when the clipboard text being spoken changed
         
         # Load settings
         self.load_settings()
-        
-        # Initialize engine just to get default settings and voices
-        try:
-            temp_engine = pyttsx3.init()
-            self.default_rate = temp_engine.getProperty("rate")
-            self.default_volume = temp_engine.getProperty("volume")
-            self.voices = temp_engine.getProperty("voices")
-            temp_engine.stop()  # Clean up temp engine
-        except Exception as e:
-            # Fallback if engine initialization fails
-            messagebox.showerror("TTS Engine Error", 
-                               f"Failed to initialize TTS engine: {str(e)}\n\n"
-                               f"The app may not work correctly.\n"
-                               f"Please ensure pyttsx3 is installed properly.")
-            self.default_rate = 150
-            self.default_volume = 1.0
-            self.voices = []
+        self.profile.mark("settings")
+        self.clipboard_poller = ClipboardPoller(max_interval_ms=self.clipboard_idle_ms,
+                                                settle_ms=self.clipboard_settle_ms,
+                                                max_chars=self.clipboard_max_chars)
+        self.clipboard_seen = DuplicateIndex(self.clipboard_dedup_window_s)
+        self.clipboard_delta = ClipboardDelta(self.clipboard_min_overlap)
+        self.normalizer = Normalizer(self.lexicon) if self.normalize_text else None
+        
+        # Sentence audio cache shared by speech, queue playback and export
+        self.audio_cache = None
+        if self.audio_cache_enabled:
+            try:
+                self.audio_cache = AudioCache(os.path.join(script_dir, "audio_cache"),
+                                              self.audio_cache_mb * 1024 * 1024)
+            except OSError as e:
+                print(f"Audio cache disabled: {e}")
+        self.profile.mark("audio cache")
+        
+        # Start the long-lived engine thread; it imports and initializes pyttsx3 while
+        # the window comes up, and speech controls stay disabled until it is ready
+        self.engine_ready = False
+        self.warming_up_status = "Warming up speech engine..."
+        self.engine = EngineService(self.audio_cache,
+                                    on_ready=lambda: self.root.after(0, self._on_engine_ready),
+                                    metrics=self.metrics).start()
+        # Gapless queue playback: the item playing streams sentence audio from the cache,
+        # and the openings of the next items are rendered into the cache ahead of time
+        self.player = AudioPlayer()
+        self.speaker = Speaker(self.engine, self.player, self.normalizer)
+        self.prerendered = {}  # id(queue item) -> (item, render command, [bytes rendered])
+        self.queue_word_offset = 0  # Last word spoken in the current item (engine path)
+        self.queue_journal = QueueJournal(os.path.join(script_dir, "queue_journal.jsonl"))
+        self.checkpoint_interval_ms = 2000  # How often the playing offset is journaled
+        
+        # Placeholders until the engine thread reports the driver's own defaults
+        self.default_rate = self.engine.default_rate
+        self.default_volume = self.engine.default_volume
+        # Voices come from the on-disk catalog; the engine re-enumerates them in the background
+        self.voice_catalog = VoiceCatalog(os.path.join(script_dir, "voice_catalog.json"))
+        cached_voices = self.voice_catalog.load()
+        self.voices = cached_voices or []
 
         # --- UI ---
         self.txt = tk.Text(root, wrap="word", height=16, undo=True, font=('Arial', 11))
@@ -62,9 +176,9 @@ class ReaderApp:
         self.txt.tag_config(self.highlight_tag, background="yellow", foreground="black")
         
         # Add scrollbar
-        scrollbar = ttk.Scrollbar(root, orient="vertical", command=self.txt.yview)
-        scrollbar.pack(side="right", fill="y")
-        self.txt.configure(yscrollcommand=scrollbar.set)
+        self.text_scrollbar = ttk.Scrollbar(root, orient="vertical", command=self.txt.yview)
+        self.text_scrollbar.pack(side="right", fill="y")
+        self.txt.configure(yscrollcommand=self._on_text_scroll)
 
         controls = ttk.Frame(root)
         controls.pack(fill="x", padx=10, pady=(0,10))
@@ -83,7 +197,7 @@ class ReaderApp:
 
         # Rate
         ttk.Label(controls, text="Rate").grid(row=0, column=5, padx=(16,4))
-        self.rate = tk.IntVar(value=self.default_rate)
+        self.rate = tk.IntVar(value=self.saved_rate or self.default_rate)
         self.rate_scale = ttk.Scale(controls, from_=100, to=250, orient="horizontal",
                                     command=self._on_rate_change)
         self.rate_scale.set(self.rate.get())
@@ -91,7 +205,7 @@ class ReaderApp:
 
         # Volume
         ttk.Label(controls, text="Volume").grid(row=0, column=7, padx=(8,4))
-        self.vol = tk.DoubleVar(value=self.default_volume)
+        self.vol = tk.DoubleVar(value=self.saved_volume or self.default_volume)
         self.vol_scale = ttk.Scale(controls, from_=0.1, to=1.0, orient="horizontal",
                                    command=self._on_volume_change)
         self.vol_scale.set(self.vol.get())
@@ -99,16 +213,13 @@ class ReaderApp:
 
         # Voice selector
         ttk.Label(controls, text="Voice").grid(row=0, column=9, padx=(8,4))
-        self.voice_map = { (v.name or f"Voice {i}"): v.id for i, v in enumerate(self.voices) }
-        self.voice_combo = ttk.Combobox(controls, values=list(self.voice_map.keys()), width=18, state="readonly")
-        # Pick a default female/neutral if available
-        if self.voice_map:
-            default_name = next((n for n in self.voice_map if "female" in n.lower() or "zira" in n.lower()), list(self.voice_map.keys())[0])
-            self.voice_combo.set(default_name)
-            self.selected_voice = self.voice_map[default_name]  # Store selected voice
+        self.voice_combo = ttk.Combobox(controls, width=18, state="readonly")
+        self.selected_voice = self.saved_voice
+        if cached_voices is not None:
+            self._set_voices(cached_voices)
         else:
-            self.voice_combo.set("No voices available")
-            self.selected_voice = None
+            self.voice_map = {}
+            self.voice_combo.set("Loading voices...")
         self.voice_combo.bind("<<ComboboxSelected>>", self.on_voice_change)
         self.voice_combo.grid(row=0, column=10, padx=(0,4))
         
@@ -126,18 +237,21 @@ class ReaderApp:
         open_btn = ttk.Button(file_frame, text="📁 Open", command=self.on_open)
         save_btn = ttk.Button(file_frame, text="💾 Save", command=self.on_save)
         save_as_btn = ttk.Button(file_frame, text="💾 Save As", command=self.on_save_as)
-        export_audio_btn = ttk.Button(file_frame, text="🔊 Export Audio", command=self.on_export_audio)
+        self.export_audio_btn = ttk.Button(file_frame, text="🔊 Export Audio", command=self.on_export_audio)
+        self.cancel_export_btn = ttk.Button(file_frame, text="✖ Cancel Export", command=self.on_cancel_export)
         search_btn = ttk.Button(file_frame, text="🔍 Find/Replace", command=self.on_search)
         theme_btn = ttk.Button(file_frame, text="🌓 Theme", command=self.toggle_theme)
         settings_btn = ttk.Button(file_frame, text="⚙️ Settings", command=self.on_settings)
+        metrics_btn = ttk.Button(file_frame, text="📊 Metrics", command=self.on_dump_metrics)
         
         open_btn.pack(side="left", padx=(0,6))
         save_btn.pack(side="left", padx=(0,6))
         save_as_btn.pack(side="left", padx=(0,6))
-        export_audio_btn.pack(side="left", padx=(0,6))
+        self.export_audio_btn.pack(side="left", padx=(0,6))
         search_btn.pack(side="left", padx=(0,6))
         theme_btn.pack(side="left", padx=(0,6))
         settings_btn.pack(side="left", padx=(0,6))
+        metrics_btn.pack(side="left", padx=(0,6))
         
         # Clipboard monitor controls
         clipboard_frame = ttk.Frame(file_frame)
@@ -178,6 +292,7 @@ class ReaderApp:
         queue_scrollbar.config(command=self.queue_listbox.yview)
         queue_scrollbar.pack(side="right", fill="y")
         self.queue_listbox.pack(side="left", fill="both", expand=True)
+        self.speech_queue.listeners.append(self._on_queue_changed)
         
         # Queue control buttons
         queue_controls = ttk.Frame(queue_frame)
@@ -187,8 +302,9 @@ class ReaderApp:
                   command=self.add_current_to_queue, width=18).pack(pady=2)
         ttk.Button(queue_controls, text="➕ Add File(s)", 
                   command=self.add_files_to_queue, width=18).pack(pady=2)
-        ttk.Button(queue_controls, text="▶ Play Queue", 
-                  command=self.play_queue, width=18).pack(pady=2)
+        self.play_queue_btn = ttk.Button(queue_controls, text="▶ Play Queue",
+                                         command=self.play_queue, width=18)
+        self.play_queue_btn.pack(pady=2)
         ttk.Button(queue_controls, text="❌ Remove Selected", 
                   command=self.remove_from_queue, width=18).pack(pady=2)
         ttk.Button(queue_controls, text="🗑️ Clear Queue", 
@@ -196,8 +312,14 @@ class ReaderApp:
         
         # Status bar
         self.status_var = tk.StringVar(value="Ready")
-        status_bar = ttk.Label(root, textvariable=self.status_var, relief="sunken", anchor="w")
-        status_bar.pack(side="bottom", fill="x")
+        status_frame = ttk.Frame(root)
+        status_frame.pack(side="bottom", fill="x")
+        self.metrics_var = tk.StringVar(value="")
+        self.metrics_label = ttk.Label(status_frame, textvariable=self.metrics_var, relief="sunken", anchor="e")
+        if self.metrics_readout:
+            self.metrics_label.pack(side="right")
+        status_bar = ttk.Label(status_frame, textvariable=self.status_var, relief="sunken", anchor="w")
+        status_bar.pack(side="left", fill="x", expand=True)
 
         # Apply theme
         self.apply_theme()
@@ -206,6 +328,28 @@ class ReaderApp:
         self.bind_shortcuts()
         
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.profile.mark("ui built")
+        
+        # Speech controls wait for the engine thread
+        if not self.engine_ready:
+            for button in (self.speak_btn, self.speak_selected_btn, self.play_queue_btn):
+                button.state(["disabled"])
+            self.status_var.set(self.warming_up_status)
+        
+        # Restore the queue from the last session
+        self.queue_journal.load(self.speech_queue)
+        if self.speech_queue.current >= 0:
+            self.status_var.set(f"Queue restored - ▶ Play Queue resumes at item "
+                                f"{self.speech_queue.current + 1} of {len(self.speech_queue)}")
+        elif len(self.speech_queue):
+            self.status_var.set(f"Queue restored ({len(self.speech_queue)} items)")
+        self.root.after(self.checkpoint_interval_ms, self._checkpoint_queue)
+        self.refresh_voices(quiet=True)
+        self.profile.mark("queue restored")
+        self.root.bind("<Map>", self._on_first_map, add="+")
+        self.metrics_tick = 0
+        self.metrics_expected = time.perf_counter() + self.metrics_interval_ms / 1000
+        self.root.after(self.metrics_interval_ms, self._sample_metrics)
         
         # Start clipboard monitoring if enabled
         if self.clipboard_monitor_enabled:
@@ -222,6 +366,24 @@ class ReaderApp:
                     self.clipboard_auto_queue = settings.get('clipboard_auto_queue', False)
                     self.clipboard_action_mode = settings.get('clipboard_action', 'speak')  # Load clipboard action mode
                     self.hotkeys = settings.get('hotkeys', self.get_default_hotkeys())
+                    self.queue_lookahead = max(0, int(settings.get('queue_lookahead', self.queue_lookahead)))
+                    self.prerender_opening_chars = settings.get('prerender_opening_chars', self.prerender_opening_chars)
+                    self.prerender_budget_mb = settings.get('prerender_budget_mb', self.prerender_budget_mb)
+                    self.audio_cache_enabled = settings.get('audio_cache_enabled', self.audio_cache_enabled)
+                    self.audio_cache_mb = settings.get('audio_cache_mb', self.audio_cache_mb)
+                    self.export_jobs = settings.get('export_jobs', self.export_jobs)
+                    self.large_file_mb = settings.get('large_file_mb', self.large_file_mb)
+                    self.clipboard_settle_ms = settings.get('clipboard_settle_ms', self.clipboard_settle_ms)
+                    self.clipboard_idle_ms = settings.get('clipboard_idle_ms', self.clipboard_idle_ms)
+                    self.clipboard_max_chars = settings.get('clipboard_max_chars', self.clipboard_max_chars)
+                    self.clipboard_dedup_window_s = settings.get('clipboard_dedup_window_s', self.clipboard_dedup_window_s)
+                    self.clipboard_min_overlap = settings.get('clipboard_min_overlap', self.clipboard_min_overlap)
+                    self.normalize_text = settings.get('normalize_text', self.normalize_text)
+                    self.lexicon = settings.get('lexicon', self.lexicon)
+                    self.metrics_readout = settings.get('metrics_readout', self.metrics_readout)
+                    self.saved_rate = settings.get('rate')
+                    self.saved_volume = settings.get('volume')
+                    self.saved_voice = settings.get('voice')
             else:
                 self.clipboard_action_mode = 'speak'  # Default mode
                 self.hotkeys = self.get_default_hotkeys()
@@ -238,7 +400,25 @@ class ReaderApp:
                 'clipboard_monitor': self.clipboard_monitor_enabled,
                 'clipboard_auto_queue': self.clipboard_auto_queue,
                 'clipboard_action': self.clipboard_action.get() if hasattr(self, 'clipboard_action') else 'speak',
-                'hotkeys': self.hotkeys
+                'hotkeys': self.hotkeys,
+                'queue_lookahead': self.queue_lookahead,
+                'prerender_opening_chars': self.prerender_opening_chars,
+                'prerender_budget_mb': self.prerender_budget_mb,
+                'audio_cache_enabled': self.audio_cache_enabled,
+                'audio_cache_mb': self.audio_cache_mb,
+                'export_jobs': self.export_jobs,
+                'large_file_mb': self.large_file_mb,
+                'clipboard_settle_ms': self.clipboard_settle_ms,
+                'clipboard_idle_ms': self.clipboard_idle_ms,
+                'clipboard_max_chars': self.clipboard_max_chars,
+                'clipboard_dedup_window_s': self.clipboard_dedup_window_s,
+                'clipboard_min_overlap': self.clipboard_min_overlap,
+                'normalize_text': self.normalize_text,
+                'lexicon': self.lexicon,
+                'metrics_readout': self.metrics_readout,
+                'rate': self.rate.get() if hasattr(self, 'rate') else self.saved_rate,
+                'volume': round(self.vol.get(), 2) if hasattr(self, 'vol') else self.saved_volume,
+                'voice': self.selected_voice if hasattr(self, 'selected_voice') else self.saved_voice
             }
             with open(self.settings_file, 'w') as f:
                 json.dump(settings, f, indent=2)
@@ -318,9 +498,13 @@ class ReaderApp:
         self.clipboard_monitor_enabled = self.clipboard_var.get()
         self.save_settings()
         if self.clipboard_monitor_enabled:
-            self.monitor_clipboard()
+            if self.clipboard_poll_id is None:
+                self.monitor_clipboard()
             self.status_var.set("Clipboard monitoring enabled")
         else:
+            if self.clipboard_poll_id is not None:
+                self.root.after_cancel(self.clipboard_poll_id)
+                self.clipboard_poll_id = None
             self.status_var.set("Clipboard monitoring disabled")
     
     def toggle_auto_queue(self):
@@ -333,54 +517,79 @@ class ReaderApp:
             self.status_var.set("Auto-queue disabled - clipboard items only speak when idle")
     
     def monitor_clipboard(self):
-        """Monitor clipboard for changes and auto-speak or queue"""
+        """Poll the clipboard and auto-speak or queue each settled change"""
+        self.clipboard_poll_id = None
         if not self.clipboard_monitor_enabled:
             return
         
         try:
             current_clipboard = self.root.clipboard_get()
-            if current_clipboard != self.last_clipboard and current_clipboard.strip():
-                self.last_clipboard = current_clipboard
-                
-                # Check if clipboard content is long enough
-                if len(current_clipboard.strip()) > 5:
-                    action = self.clipboard_action.get()
-                    
-                    if action == "speak":
-                        # Auto-speak mode with auto-queue option
-                        if not self.speaking and not self.queue_playing and not self.global_stop_requested:
-                            # Not currently speaking - speak immediately
-                            self.status_var.set("Auto-speaking clipboard content...")
-                            threading.Thread(target=self._speak_worker, args=(current_clipboard,), daemon=True).start()
-                        elif self.clipboard_auto_queue and not self.global_stop_requested:
-                            # Currently speaking but auto-queue is enabled - add to queue
-                            preview = current_clipboard[:50] + "..." if len(current_clipboard) > 50 else current_clipboard
-                            self.speech_queue.append({'text': current_clipboard, 'name': f"📋 Auto-Queued: {preview}"})
-                            self.update_queue_display()
-                            self.status_var.set(f"Auto-queued clipboard content ({len(self.speech_queue)} items)")
-                            
-                            # Don't start queue automatically - let the current speech finish first
-                            # The queue will be played after the current speech completes
-                        else:
-                            # Currently speaking and auto-queue is disabled - ignore clipboard change
-                            # This prevents the "run loop already started" error
-                            self.status_var.set("Clipboard ignored - already speaking (enable Auto-Queue to queue content)")
-                    
-                    elif action == "queue":
-                        # Queue mode - add to speech queue
-                        preview = current_clipboard[:50] + "..." if len(current_clipboard) > 50 else current_clipboard
-                        self.speech_queue.append({'text': current_clipboard, 'name': f"📋 Clipboard: {preview}"})
-                        self.update_queue_display()
-                        self.status_var.set(f"Clipboard added to queue ({len(self.speech_queue)} items)")
-        except:
+        except tk.TclError:
+            current_clipboard = ""  # Empty or non-text clipboard
+        try:
+            changed = self.clipboard_poller.observe(current_clipboard)
+            if changed is not None:
+                self._on_clipboard_changed(changed)
+        except Exception:
             pass
         
-        # Check again in 1 second
-        if self.clipboard_monitor_enabled:
-            self.root.after(1000, self.monitor_clipboard)
+        # Poll again soon after a change, less often while the clipboard is idle
+        self.clipboard_poll_id = self.root.after(self.clipboard_poller.interval, self.monitor_clipboard)
+    
+    def _on_clipboard_changed(self, current_clipboard):
+        """Speak or queue clipboard text once a burst of copies has settled"""
+        # Check if clipboard content is long enough
+        if len(current_clipboard.strip()) <= 5:
+            return
+        action = self.clipboard_action.get()
+        # Only repeats headed for the queue are skipped: copying text again while in
+        # speak mode is a deliberate request to hear it again
+        queuing = action == "queue" or (self.playback.active and self.clipboard_auto_queue)
+        if queuing and self.clipboard_seen.is_duplicate(current_clipboard):
+            self.status_var.set(f"Duplicate clipboard text skipped{self._duplicate_summary()}")
+            return
+        if self.clipboard_poller.truncated:
+            self.status_var.set(f"Clipboard text truncated to {self.clipboard_max_chars:,} characters")
+        
+        # A re-copied log or transcript: only the appended tail is new
+        text = self.clipboard_delta.new_text(current_clipboard)
+        if not text.strip():
+            self.status_var.set("Clipboard has no new text since the last copy")
+            return
+        new = f" ({len(text):,} new characters)" if len(text) < len(current_clipboard) else ""
+        preview = text[:50] + "..." if len(text) > 50 else text
+        
+        if action == "speak":
+            # Auto-speak mode with auto-queue option
+            if not self.playback.active:
+                # Not currently speaking - speak immediately
+                self.status_var.set(f"Auto-speaking clipboard content{new}...")
+                # Measure from the first read of the new clipboard text, settle time included
+                self.clipboard_changed_at = time.perf_counter() - (time.monotonic() - self.clipboard_poller.changed_at)
+                self._speak_text(text)
+            elif self.clipboard_auto_queue:
+                # Currently speaking but auto-queue is enabled - add to queue
+                self.speech_queue.append(QueueItem(text, f"📋 Auto-Queued: {preview}"))
+                self.status_var.set(f"Auto-queued clipboard content{new} ({len(self.speech_queue)} items)")
+                
+                # Don't start queue automatically - let the current speech finish first
+                # The queue will be played after the current speech completes
+            else:
+                # Currently speaking and auto-queue is disabled - ignore clipboard change
+                # This prevents the "run loop already started" error
+                self.clipboard_delta.forget()
+                self.status_var.set("Clipboard ignored - already speaking (enable Auto-Queue to queue content)")
+        
+        elif action == "queue":
+            # Queue mode - add to speech queue
+            self.speech_queue.append(QueueItem(text, f"📋 Clipboard: {preview}"))
+            self.status_var.set(f"Clipboard added to queue{new} ({len(self.speech_queue)} items)")
     
     def add_current_to_queue(self):
         """Add current text to speech queue"""
+        if self.large_file is not None:
+            messagebox.showinfo("Queue", "Use ➕ Add File(s) to queue files opened in large file mode.")
+            return
         text = self.txt.get("1.0", "end").strip()
         if not text:
             messagebox.showinfo("Queue", "No text to add to queue.")
@@ -388,29 +597,31 @@ class ReaderApp:
         
         # Add to queue with a preview (first 50 chars)
         preview = text[:50] + "..." if len(text) > 50 else text
-        self.speech_queue.append({'text': text, 'name': f"Text: {preview}"})
-        self.update_queue_display()
+        self.speech_queue.append(QueueItem(text, f"Text: {preview}"))
         self.status_var.set(f"Added to queue ({len(self.speech_queue)} items)")
     
     def add_files_to_queue(self):
-        """Add multiple files to speech queue"""
+        """Add multiple files to speech queue
+        
+        Only each file's path, size, mtime and encoding are kept; the text is
+        read from disk when the item plays.
+        """
         file_paths = filedialog.askopenfilenames(
             title="Add Files to Queue",
             filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
         )
         
         if file_paths:
+            items = []
             for file_path in file_paths:
                 try:
-                    with open(file_path, 'r', encoding='utf-8') as file:
-                        content = file.read().strip()
-                        if content:
-                            filename = os.path.basename(file_path)
-                            self.speech_queue.append({'text': content, 'name': f"📄 {filename}"})
+                    if os.path.getsize(file_path) > 0:
+                        filename = os.path.basename(file_path)
+                        items.append(QueueItem.from_file(file_path, f"📄 {filename}"))
                 except Exception as e:
                     messagebox.showerror("Error", f"Failed to load {file_path}: {str(e)}")
             
-            self.update_queue_display()
+            self.speech_queue.extend(items)
             self.status_var.set(f"Added {len(file_paths)} file(s) to queue ({len(self.speech_queue)} items)")
     
     def remove_from_queue(self):
@@ -421,8 +632,10 @@ class ReaderApp:
             return
         
         index = selection[0]
-        del self.speech_queue[index]
-        self.update_queue_display()
+        if self.playback.is_current(self.queue_token) and index == self.speech_queue.current:
+            messagebox.showinfo("Queue", "Stop the queue before removing the item that is playing.")
+            return
+        self.speech_queue.remove_at(index)
         self.status_var.set(f"Removed from queue ({len(self.speech_queue)} items)")
     
     def clear_queue(self):
@@ -431,20 +644,52 @@ class ReaderApp:
             return
         
         if messagebox.askyesno("Clear Queue", f"Remove all {len(self.speech_queue)} items from queue?"):
+            if self.playback.is_current(self.queue_token):
+                self.on_stop()
             self.speech_queue.clear()
-            self.update_queue_display()
             self.status_var.set("Queue cleared")
     
-    def update_queue_display(self):
-        """Update the queue listbox display"""
-        self.queue_listbox.delete(0, tk.END)
-        for i, item in enumerate(self.speech_queue):
-            prefix = "▶ " if i == self.current_queue_index and self.queue_playing else "   "
-            self.queue_listbox.insert(tk.END, f"{prefix}{i+1}. {item['name']}")
-        
-        # Highlight current item if playing
-        if self.queue_playing and 0 <= self.current_queue_index < len(self.speech_queue):
-            self.queue_listbox.itemconfig(self.current_queue_index, bg='lightblue')
+    def _on_queue_changed(self, event, *args):
+        """Apply a queue change to the listbox, touching only the affected rows"""
+        listbox = self.queue_listbox
+        if event == "insert":
+            index, count = args
+            labels = [self._queue_row_label(i) for i in range(index, index + count)]
+            listbox.insert(index, *labels)
+            if index <= self.speech_queue.current < index + count:
+                listbox.itemconfig(self.speech_queue.current, bg='lightblue')
+            if index + count < len(self.speech_queue):
+                self._renumber_queue_rows(index + count)
+        elif event == "remove":
+            index, count = args
+            listbox.delete(index, index + count - 1)
+            if index < len(self.speech_queue):
+                self._renumber_queue_rows(index)
+        elif event == "current":
+            # Move the ▶ marker: redraw the old row and the new row only
+            for row in args:
+                if 0 <= row < len(self.speech_queue):
+                    self._set_queue_row(row)
+    
+    def _queue_row_label(self, index):
+        prefix = "▶ " if index == self.speech_queue.current else "   "
+        return f"{prefix}{index+1}. {self.speech_queue[index].name}"
+    
+    def _set_queue_row(self, index):
+        """Redraw one listbox row, keeping its selection"""
+        listbox = self.queue_listbox
+        selected = listbox.selection_includes(index)
+        listbox.delete(index)
+        listbox.insert(index, self._queue_row_label(index))
+        if index == self.speech_queue.current:
+            listbox.itemconfig(index, bg='lightblue')
+        if selected:
+            listbox.selection_set(index)
+    
+    def _renumber_queue_rows(self, start):
+        """Redraw rows from start onward after their positions shifted"""
+        for index in range(start, len(self.speech_queue)):
+            self._set_queue_row(index)
     
     def play_queue(self):
         """Start playing items in the queue"""
@@ -452,130 +697,197 @@ class ReaderApp:
             messagebox.showinfo("Queue", "Queue is empty. Add items to queue first.")
             return
         
-        if self.speaking or self.queue_playing:
+        if self.playback.active:
             messagebox.showinfo("Queue", "Already speaking. Stop current speech first.")
             return
+        if not self._engine_available():
+            return
         
-        self.queue_playing = True
-        self.stop_requested = False  # Reset stop flag
-        self.global_stop_requested = False  # Reset global stop flag
-        self.current_queue_index = 0
-        self.status_var.set(f"Playing queue item 1 of {len(self.speech_queue)}")
-        self.update_queue_display()
+        self.queue_token = self.playback.begin("queue")
+        if 0 <= self.speech_queue.current < len(self.speech_queue):
+            # Resume where the last session left off
+            self.status_var.set(f"Resuming queue at item {self.speech_queue.current + 1} of {len(self.speech_queue)}")
+        else:
+            self.speech_queue.current = 0
+            self.status_var.set(f"Playing queue item 1 of {len(self.speech_queue)}")
         
         # Start playing the queue
-        threading.Thread(target=self._play_queue_worker, daemon=True).start()
+        self._play_queue_item(self.queue_token)
     
-    def _play_queue_worker(self):
-        """Worker thread to play queue items sequentially"""
-        com_initialized = False
+    def _play_queue_item(self, token):
+        """Send the current queue item to the engine thread"""
+        if not self.playback.is_current(token):
+            return  # Stopped; on_stop already reset the UI
+        if self.speech_queue.current >= len(self.speech_queue):
+            self._finish_queue()
+            return
         
-        # Initialize COM for this thread
-        try:
-            import pythoncom
-            # Try CoInitialize first
-            pythoncom.CoInitialize()
-            com_initialized = True
-        except Exception:
-            # If CoInitialize fails, try CoInitializeEx
+        item = self.speech_queue[self.speech_queue.current]
+        if item.is_stale():
+            # The file changed or vanished after it was queued
+            self._forget_prerendered(item)
             try:
-                import pythoncom
-                pythoncom.CoInitializeEx(pythoncom.COINIT_MULTITHREADED)
-                com_initialized = True
-            except Exception:
-                # If both fail, try without COM initialization
-                pass
+                item.refresh()
+            except OSError:
+                self.status_var.set(f"Skipped {item.name} - file no longer exists")
+                self.speech_queue.current += 1
+                self.root.after(0, lambda: self._play_queue_item(token))
+                return
+        self.queue_word_offset = self.queue_journal.offset
         
-        try:
-            while self.queue_playing and self.current_queue_index < len(self.speech_queue):
-                if self.stop_requested or self.global_stop_requested:
-                    break
-                
-                item = self.speech_queue[self.current_queue_index]
-                self.speaking = True
-                
-                # Update UI to show current item
-                self.root.after(0, lambda: self.update_queue_display())
-                self.root.after(0, lambda idx=self.current_queue_index: 
-                               self.status_var.set(f"Playing queue item {idx+1} of {len(self.speech_queue)}"))
-                
-                # Disable buttons
-                self.root.after(0, lambda: self.speak_btn.state(["disabled"]))
-                self.root.after(0, lambda: self.speak_selected_btn.state(["disabled"]))
-                
-                # Speak the item
-                engine = None
+        # Update UI to show current item
+        self.status_var.set(f"Playing queue item {self.speech_queue.current+1} of {len(self.speech_queue)}")
+        self.speak_btn.state(["disabled"])
+        self.speak_selected_btn.state(["disabled"])
+        
+        # Streamed sentence by sentence, so even a book-length item starts at once
+        self.prerendered.pop(id(item), None)  # Its opening is in the cache (or on its way)
+        self._sync_engine_properties()
+        self.queue_command = self.speaker.speak_chunks(
+            item.chunks(self.queue_journal.offset),
+            on_word=self._on_queue_word, token=token,
+            on_done=lambda cmd: self._queue_audio_ended(token, lambda: self._on_queue_item_done(cmd)))
+        latencies = {"ttfw_ms": self.queue_command.submitted_at}
+        if self.queue_item_ended is not None:
+            latencies["queue_gap_ms"] = self.queue_item_ended
+        self.first_word_watch.append((self.queue_command, latencies))
+        self._prerender_ahead()
+    
+    def _gapless(self):
+        """True if queue items play cached sentence audio, so openings can be rendered ahead"""
+        return self.audio_cache is not None and self.player.available
+    
+    def _prerender_ahead(self):
+        """Render the openings of upcoming queue items into the audio cache
+        
+        Renders one item at a time, up to queue_lookahead items past the one
+        playing, and only its first prerender_opening_chars of text: the item
+        playing streams the rest, and a cached opening lets the next item start
+        without a gap. Stops looking ahead once the openings waiting to be
+        played exceed prerender_budget_mb.
+        """
+        if not self._gapless():
+            return  # Items stream straight through the engine
+        if any(not render.done.is_set() for _, render, _ in self.prerendered.values()):
+            return  # One render at a time; we'll be called again when it lands
+        
+        budget = self.prerender_budget_mb * 1024 * 1024
+        used = sum(rendered[0] for _, _, rendered in self.prerendered.values())
+        last = min(len(self.speech_queue), self.speech_queue.current + 1 + self.queue_lookahead)
+        for index in range(self.speech_queue.current + 1, last):
+            item = self.speech_queue[index]
+            if id(item) in self.prerendered:
+                continue
+            if used >= budget:
+                return
+            if item.is_stale():
                 try:
-                    engine = pyttsx3.init()
-                    self.current_engine = engine
-                    self.all_engines.append(engine)  # Track all engines for global stop
-                    
-                    engine.setProperty("rate", self.rate.get())
-                    engine.setProperty("volume", self.vol.get())
-                    if self.selected_voice:
-                        engine.setProperty("voice", self.selected_voice)
-                    
-                    if not self.stop_requested and not self.global_stop_requested:
-                        engine.say(item['text'])
-                        engine.runAndWait()
-                    
-                except Exception as e:
-                    err_msg = str(e)
-                    self.root.after(0, lambda msg=err_msg: messagebox.showerror("TTS Error", f"Failed to speak queue item: {msg}"))
-                    break
-                finally:
-                    # Cleanup engine
-                    if engine:
-                        try:
-                            # Remove from tracking list
-                            if engine in self.all_engines:
-                                self.all_engines.remove(engine)
-                            del engine
-                        except:
-                            pass
-                    
-                    self.current_engine = None
-                
-                self.speaking = False
-                self.current_queue_index += 1
-                
-                # Small pause between items
-                if self.current_queue_index < len(self.speech_queue) and not self.stop_requested and not self.global_stop_requested:
-                    threading.Event().wait(0.5)
+                    item.refresh()
+                except OSError:
+                    continue  # Skipped with a message when it comes up to play
+            rendered = [0]
             
-            # Queue finished
-            self.queue_playing = False
-            self.current_queue_index = -1
+            def on_chunk(chunk, path, rendered=rendered):
+                # Engine thread
+                rendered[0] += os.path.getsize(path)
             
-            if self.stop_requested or self.global_stop_requested:
-                self.root.after(0, lambda: self.status_var.set("Queue playback stopped"))
-            else:
-                self.root.after(0, lambda: self.status_var.set("Queue playback completed"))
-            
-            self.root.after(0, lambda: self.speak_btn.state(["!disabled"]))
-            self.root.after(0, lambda: self.speak_selected_btn.state(["!disabled"]))
-            self.root.after(0, lambda: self.update_queue_display())
-            self.root.after(0, lambda: self.txt.tag_remove(self.highlight_tag, "1.0", "end"))
-            
-            # If there are more queued items and auto-queue is enabled, continue playing
-            # Only continue if there are items beyond what we just played
-            if self.current_queue_index < len(self.speech_queue) and self.clipboard_auto_queue and not self.stop_requested and not self.global_stop_requested:
-                self.root.after(100, lambda: self._start_auto_queue())
-            
-        except Exception as e:
-            self.queue_playing = False
-            self.current_queue_index = -1
-            self.root.after(0, lambda: messagebox.showerror("Queue Error", f"Queue playback failed: {str(e)}"))
-            self.root.after(0, lambda: self.speak_btn.state(["!disabled"]))
-            self.root.after(0, lambda: self.speak_selected_btn.state(["!disabled"]))
-        finally:
-            # Uninitialize COM if it was initialized
-            if com_initialized:
-                try:
-                    import pythoncom
-                    pythoncom.CoUninitialize()
-                except:
-                    pass
+            self._sync_engine_properties()
+            render = self.engine.render(
+                self.speaker.normalized(_opening(item.chunks(), self.prerender_opening_chars)), on_chunk,
+                token=self.queue_token, on_done=lambda cmd: self.root.after(0, self._on_prerender_done))
+            self.prerendered[id(item)] = (item, render, rendered)
+            return
+    
+    def _on_prerender_done(self):
+        """Render the next opening once one lands"""
+        if self.playback.is_current(self.queue_token):
+            self._prerender_ahead()
+    
+    def _queue_audio_ended(self, token, then):
+        """Engine/player thread: a queue item went quiet
+        
+        A stopped queue is finished right here so stop-to-silence is measured
+        without waiting for the Tk loop; otherwise then() advances the queue.
+        """
+        if token.cancelled:
+            self.playback.finish(token)
+        else:
+            self.root.after(0, then)
+    
+    def _forget_prerendered(self, item):
+        """Cancel the opening render for one item"""
+        entry = self.prerendered.pop(id(item), None)
+        if entry is not None:
+            self.engine.cancel(entry[1])
+    
+    def _on_queue_word(self, location, length):
+        """Engine thread: remember the last word spoken in the current queue item"""
+        self.queue_word_offset = location
+    
+    def _queue_position(self):
+        """Offset reached in the current queue item"""
+        return self.queue_word_offset
+    
+    def _checkpoint_queue(self):
+        """Periodically journal how far into the current item playback has got"""
+        if self.playback.is_current(self.queue_token) and self.speech_queue.current_item() is not None:
+            self.queue_journal.record_offset(self._queue_position())
+        self.root.after(self.checkpoint_interval_ms, self._checkpoint_queue)
+    
+    def _discard_prerendered(self):
+        """Cancel outstanding opening renders"""
+        for item, render, _ in self.prerendered.values():
+            self.engine.cancel(render)
+        self.prerendered.clear()
+    
+    def _remove_file(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    
+    def _on_queue_item_done(self, command):
+        """Advance to the next queue item once the engine reports completion"""
+        if command is not self.queue_command:
+            return  # Stale completion from a queue run that was stopped
+        self.queue_item_ended = time.perf_counter()
+        self._poll_first_words()
+        self.queue_command = None
+        
+        if command.error is not None and not command.cancelled:
+            messagebox.showerror("TTS Error", f"Failed to speak queue item: {command.error}")
+            self._finish_queue(stopped=True)
+            return
+        
+        token = self.queue_token
+        if not self.playback.is_current(token):
+            return  # Stopped; on_stop already reset the UI
+        
+        self.speech_queue.current += 1
+        
+        # Small pause between items, unless the next one starts from cached audio
+        if self.speech_queue.current < len(self.speech_queue) and not self._gapless():
+            self.root.after(500, lambda: self._play_queue_item(token))
+        else:
+            self._play_queue_item(token)
+    
+    def _finish_queue(self, stopped=False):
+        """Reset the UI after queue playback completes or fails"""
+        token, self.queue_token = self.queue_token, None
+        self.queue_item_ended = None
+        self.speech_queue.current = -1
+        self._discard_prerendered()
+        if token is not None:
+            self.playback.finish(token)
+        
+        if stopped:
+            self.status_var.set("Queue playback stopped")
+        else:
+            self.status_var.set("Queue playback completed")
+        
+        self.speak_btn.state(["!disabled"])
+        self.speak_selected_btn.state(["!disabled"])
+        self._clear_highlight()
 
     def _on_rate_change(self, value):
         self.rate.set(int(float(value)))
@@ -588,51 +900,115 @@ class ReaderApp:
         if vid:
             self.selected_voice = vid
     
-    def refresh_voices(self):
-        """Refresh the voice list to detect newly installed voices"""
-        try:
-            # Get current selection
-            current_voice_name = self.voice_combo.get()
-            
-            # Re-initialize engine to get updated voice list
-            temp_engine = pyttsx3.init()
-            self.voices = temp_engine.getProperty("voices")
-            temp_engine.stop()
-            
-            # Rebuild voice map
-            self.voice_map = { (v.name or f"Voice {i}"): v.id for i, v in enumerate(self.voices) }
-            
-            # Update combobox
-            self.voice_combo['values'] = list(self.voice_map.keys())
-            
-            # Try to restore previous selection, otherwise pick first voice
-            if current_voice_name in self.voice_map:
-                self.voice_combo.set(current_voice_name)
-                self.selected_voice = self.voice_map[current_voice_name]
-            else:
-                # Pick first voice if previous selection no longer exists
-                if self.voice_map:
-                    first_voice = list(self.voice_map.keys())[0]
-                    self.voice_combo.set(first_voice)
-                    self.selected_voice = self.voice_map[first_voice]
-            
-            # Update status
-            self.status_var.set(f"Voices refreshed! Found {len(self.voices)} voice(s)")
-            
-            # Show info if new voices were found
-            messagebox.showinfo("Voices Refreshed", 
-                              f"Found {len(self.voices)} voice(s) installed on your system.\n\n"
-                              f"To add more voices:\n"
-                              f"1. Open Windows Settings\n"
-                              f"2. Go to Time & Language → Speech\n"
-                              f"3. Click 'Add voices'\n"
-                              f"4. Click 🔄 to refresh again!")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to refresh voices: {str(e)}")
+    def _on_first_map(self, event):
+        if event.widget is self.root and not self.profile.has("window shown"):
+            self.profile.mark("window shown")
+            self._report_startup()
+    
+    def _on_engine_ready(self):
+        """Enable speech once the engine thread has initialized, or report why it could not"""
+        self.profile.mark("engine ready")
+        self._report_startup()
+        if self.engine.engine is None:
+            # Degrade to an editor: speech stays disabled, everything else works
+            self.status_var.set(f"Speech engine unavailable: {self.engine.init_error}")
+            return
+        self.engine_ready = True
+        self.default_rate = self.engine.default_rate
+        self.default_volume = self.engine.default_volume
+        if self.saved_rate is None:
+            self.rate.set(self.default_rate)
+            self.rate_scale.set(self.default_rate)
+        if self.saved_volume is None:
+            self.vol.set(self.default_volume)
+            self.vol_scale.set(self.default_volume)
+        if not self.playback.active:
+            for button in (self.speak_btn, self.speak_selected_btn):
+                button.state(["!disabled"])
+        self.play_queue_btn.state(["!disabled"])
+        if self.status_var.get() == self.warming_up_status:
+            self.status_var.set("Ready")
+    
+    def _report_startup(self):
+        """Print the --profile-startup breakdown once the window and engine are both up"""
+        if self.profile.has("window shown") and self.profile.has("engine ready"):
+            self.profile.report(self.engine.timings)
+    
+    def _engine_available(self):
+        """True if speech can start; otherwise say why on the status bar or in a dialog"""
+        if self.engine_ready:
+            return True
+        if self.engine.ready.is_set():
+            messagebox.showerror("TTS Engine Error",
+                                 f"Failed to initialize TTS engine: {self.engine.init_error}\n\n"
+                                 f"Please ensure pyttsx3 is installed properly.")
+        else:
+            self.status_var.set(self.warming_up_status)
+        return False
+    
+    def _set_voices(self, voices):
+        """Fill the voice selector, keeping the selected voice if it is still installed"""
+        self.voices = voices
+        self.voice_map = { (v.name or f"Voice {i}"): v.id for i, v in enumerate(voices) }
+        self.voice_combo['values'] = list(self.voice_map.keys())
+        if self.voice_map:
+            # Keep the current (or last session's) voice, else pick a default female/neutral
+            default_name = next((n for n, vid in self.voice_map.items() if vid == self.selected_voice), None)
+            if default_name is None:
+                default_name = next((n for n in self.voice_map if "female" in n.lower() or "zira" in n.lower()), list(self.voice_map.keys())[0])
+            self.voice_combo.set(default_name)
+            self.selected_voice = self.voice_map[default_name]  # Store selected voice
+        else:
+            self.voice_combo.set("No voices available")
+            self.selected_voice = None
+    
+    def refresh_voices(self, quiet=False):
+        """Refresh the voice list to detect newly installed voices
+
+        quiet reconciles the cached catalog at startup: the selector is only
+        updated if the installed voices changed, without a dialog.
+        """
+        # Ask the engine thread to re-read its voice list; the UI updates on completion
+        if not quiet:
+            self.status_var.set("Refreshing voices...")
+        self.engine.list_voices(
+            on_done=lambda cmd: self.root.after(0, lambda: self._on_voices_refreshed(cmd, quiet)))
+    
+    def _on_voices_refreshed(self, command, quiet=False):
+        """Rebuild the voice selector from a completed voice list command"""
+        if command.error is not None:
+            if quiet:
+                if not self.voices:
+                    self.voice_combo.set("No voices available")
+                return  # The engine error was already reported at startup
+            messagebox.showerror("Error", f"Failed to refresh voices: {str(command.error)}")
             self.status_var.set("Failed to refresh voices")
+            return
+        
+        changed = self.voice_catalog.save(command.result)
+        if quiet:
+            if changed or not self.voices:
+                self._set_voices(command.result)
+                self.status_var.set(f"Voice list updated: {len(self.voices)} voice(s)")
+            return
+        self._set_voices(command.result)
+        
+        # Update status
+        self.status_var.set(f"Voices refreshed! Found {len(self.voices)} voice(s)")
+        
+        # Show info if new voices were found
+        messagebox.showinfo("Voices Refreshed", 
+                          f"Found {len(self.voices)} voice(s) installed on your system.\n\n"
+                          f"To add more voices:\n"
+                          f"1. Open Windows Settings\n"
+                          f"2. Go to Time & Language → Speech\n"
+                          f"3. Click 'Add voices'\n"
+                          f"4. Click 🔄 to refresh again!")
 
     def on_paste(self):
+        if self.large_file is not None:
+            self.status_var.set("Large file mode is read-only")
+            return
         try:
             self.txt.insert("insert", self.root.clipboard_get())
             self.status_var.set("Text pasted")
@@ -640,6 +1016,8 @@ class ReaderApp:
             messagebox.showinfo("Clipboard", "Clipboard is empty.")
     
     def on_clear(self):
+        self._close_large_file()
+        self.load_generation += 1  # Cancel any incremental load
         self.txt.delete("1.0", "end")
         self.status_var.set("Text cleared")
     
@@ -650,16 +1028,148 @@ class ReaderApp:
         )
         if file_path:
             try:
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    content = file.read()
-                self.txt.delete("1.0", "end")
-                self.txt.insert("1.0", content)
-                self.current_file = file_path
-                self.status_var.set(f"Opened: {os.path.basename(file_path)}")
+                size = os.path.getsize(file_path)
+                encoding = detect_encoding(file_path)
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to open file: {str(e)}")
+                return
+            self._close_large_file()
+            self.load_generation += 1
+            if size >= self.large_file_mb * 1024 * 1024:
+                self._open_large_file(file_path, encoding)
+            else:
+                self._load_file(file_path, encoding, size)
+    
+    def _load_file(self, file_path, encoding, size):
+        """Insert a file into the editor in chunks from after() callbacks"""
+        try:
+            file = open(file_path, 'r', encoding=encoding, errors='replace')
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to open file: {str(e)}")
+            return
+        generation = self.load_generation
+        name = os.path.basename(file_path)
+        self.txt.delete("1.0", "end")
+        self.txt.configure(undo=False)  # Loading shouldn't fill the undo stack
+        self.undo_paused_for = generation
+        self.current_file = file_path
+        
+        def load_chunk():
+            finished = True
+            try:
+                if generation != self.load_generation:
+                    return  # Cancelled by Clear or another open
+                try:
+                    content = file.read(262144)
+                except Exception as e:
+                    messagebox.showerror("Error", f"Failed to open file: {str(e)}")
+                    return
+                if content:
+                    self.txt.insert("end-1c", content)
+                    self.status_var.set(f"Opening {name}... {file.buffer.tell() / max(size, 1):.0%}")
+                    self.root.after(1, load_chunk)
+                    finished = False
+                else:
+                    self.txt.edit_reset()
+                    self.status_var.set(f"Opened: {name} ({encoding})")
+            finally:
+                if finished:
+                    file.close()
+                    # A newer load may have turned undo off for itself since
+                    if self.undo_paused_for == generation:
+                        self.undo_paused_for = None
+                        self.txt.configure(undo=True)
+        
+        load_chunk()
+    
+    def _open_large_file(self, file_path, encoding):
+        """Open a file read-only, loading only a window of text at a time"""
+        try:
+            large_file = LargeFile(file_path, encoding)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to open file: {str(e)}")
+            return
+        self.large_file = large_file
+        self.current_file = file_path
+        name = os.path.basename(file_path)
+        
+        def on_progress(fraction):
+            self.root.after(0, lambda: self._on_index_progress(large_file, name, fraction))
+        
+        def build_index():
+            large_file.build_index(on_progress)
+            self.root.after(0, lambda: self._on_index_progress(large_file, name, 1.0))
+        
+        threading.Thread(target=build_index, daemon=True).start()
+        self._load_window(0)
+        self.status_var.set(f"Opened: {name} (large file mode, read-only)")
+    
+    def _on_index_progress(self, large_file, name, fraction):
+        if large_file is not self.large_file:
+            return
+        if large_file.char_count is None:
+            self.status_var.set(f"Opened: {name} (large file mode, read-only) - indexing {fraction:.0%}")
+        else:
+            self.status_var.set(f"Opened: {name} (large file mode, read-only, "
+                                f"{large_file.char_count:,} characters)")
+    
+    def _close_large_file(self):
+        if self.large_file is not None:
+            self.large_file.cancelled = True
+            self.large_file = None
+            self.window_start = 0
+            self.window_len = 0
+            self.line_index = None
+            self.highlight_range = None
+            self.txt.configure(state="normal")
+            self.txt.delete("1.0", "end")
+    
+    def _load_window(self, start):
+        """Show large_window_chars of the large file starting near start"""
+        start = max(0, start)
+        if self.large_file.char_count is not None:
+            start = min(start, max(0, self.large_file.char_count - self.large_window_chars))
+        text = self.large_file.read(start, self.large_window_chars)
+        self.txt.configure(state="normal")
+        self.txt.delete("1.0", "end")
+        self.txt.insert("1.0", text)
+        self.txt.configure(state="disabled")
+        self.txt.edit_reset()
+        self.window_start = start
+        self.window_len = len(text)
+        self.line_index = LineIndex(text, start)
+        self.highlight_range = None
+    
+    def _on_text_scroll(self, first, last):
+        """Scrollbar update; slides the large file window when nearing its edges"""
+        self.text_scrollbar.set(first, last)
+        if self.large_file is None or self.window_len == 0:
+            return
+        at_end = self.large_file.char_count is not None and \
+            self.window_start + self.window_len >= self.large_file.char_count
+        near_end = float(last) > 0.95 and not at_end and self.window_len >= self.large_window_chars
+        near_start = float(first) < 0.05 and self.window_start > 0
+        if (near_end or near_start) and not self.slide_pending:
+            self.slide_pending = True
+            self.root.after_idle(self._slide_window)
+    
+    def _slide_window(self):
+        """Re-center the large file window on the current viewport"""
+        self.slide_pending = False
+        if self.large_file is None:
+            return
+        count = self.txt.count("1.0", "@0,0", "chars")
+        top = self.window_start + (count[0] if count else 0)
+        start = max(0, top - self.large_window_chars // 2)
+        if start == self.window_start:
+            return
+        self._load_window(start)
+        self.txt.yview(f"1.0 + {top - self.window_start} chars")
     
     def on_save(self):
+        if self.large_file is not None:
+            messagebox.showinfo("Save", "Large file mode is read-only.")
+            return
         if self.current_file:
             try:
                 with open(self.current_file, 'w', encoding='utf-8') as file:
@@ -671,6 +1181,9 @@ class ReaderApp:
             self.on_save_as()
     
     def on_save_as(self):
+        if self.large_file is not None:
+            messagebox.showinfo("Save", "Large file mode is read-only.")
+            return
         file_path = filedialog.asksaveasfilename(
             title="Save Text File",
             defaultextension=".txt",
@@ -687,8 +1200,9 @@ class ReaderApp:
     
     def on_export_audio(self):
         """Export text to audio file"""
-        text = self.txt.get("1.0", "end").strip()
-        if not text:
+        large_file = self.large_file
+        text = "" if large_file is not None else self.txt.get("1.0", "end").strip()
+        if not text and large_file is None:
             messagebox.showinfo("Export Audio", "No text to export.")
             return
         
@@ -698,236 +1212,335 @@ class ReaderApp:
             filetypes=[("WAV files", "*.wav"), ("MP3 files", "*.mp3")]
         )
         
-        if file_path:
-            try:
-                self.status_var.set("Exporting audio...")
-                engine = pyttsx3.init()
-                engine.setProperty("rate", self.rate.get())
-                engine.setProperty("volume", self.vol.get())
-                if self.selected_voice:
-                    engine.setProperty("voice", self.selected_voice)
-                
-                engine.save_to_file(text, file_path)
-                engine.runAndWait()
-                
-                self.status_var.set(f"Audio exported: {os.path.basename(file_path)}")
-                messagebox.showinfo("Export Audio", f"Audio successfully exported to:\n{file_path}")
-            except Exception as e:
-                messagebox.showerror("Export Error", f"Failed to export audio: {str(e)}")
-                self.status_var.set("Export failed")
+        if not file_path:
+            return
+        
+        if self.export_job is not None:
+            messagebox.showinfo("Export Audio", "An export is already running.")
+            return
+        
+        self.status_var.set("Exporting audio...")
+        self.cancel_export_btn.pack(side="left", padx=(0,6), after=self.export_audio_btn)
+        on_done = lambda job: self.root.after(0, lambda: self._on_export_done(job))
+        if large_file is not None and not file_path.lower().endswith(".wav"):
+            file_path += ".wav"  # Large files are always exported in chunks
+        if file_path.lower().endswith(".wav"):
+            # Render chunks across all cores and stitch them in order
+            chunks = self.speaker.normalized(large_file.iter_chunks() if large_file is not None else iter_chunks(text))
+            total = (large_file.char_count or large_file.size) if large_file is not None else None
+            self.export_job = ExportJob(
+                text, file_path, chunks=chunks, total_chars=total,
+                voice=self.selected_voice, rate=self.rate.get(), volume=self.vol.get(),
+                cache=self.audio_cache, jobs=self.export_jobs or None, metrics=self.metrics,
+                on_progress=lambda fraction: self.root.after(0, lambda: self._on_export_progress(fraction)),
+                on_done=on_done).start()
+        else:
+            # Other formats are written by the engine in one piece, still off the UI thread
+            self._sync_engine_properties()
+            self.export_job = self.speaker.export(file_path, text, on_done=on_done)
+    
+    def _on_export_progress(self, fraction):
+        if self.export_job is not None and not self.export_job.cancelled:
+            self.status_var.set(f"Exporting audio... {fraction:.0%}")
+    
+    def on_cancel_export(self):
+        """Cancel the running export; partial files are removed"""
+        if self.export_job is not None:
+            self.export_job.cancel()
+            self.status_var.set("Cancelling export...")
+    
+    def _on_export_done(self, command):
+        """Report the result of an export job or command"""
+        self.export_job = None
+        self.cancel_export_btn.pack_forget()
+        if command.error is not None:
+            messagebox.showerror("Export Error", f"Failed to export audio: {str(command.error)}")
+            self.status_var.set("Export failed")
+        elif command.cancelled:
+            if os.path.exists(command.path) and not command.path.lower().endswith(".wav"):
+                self._remove_file(command.path)  # Partial engine export
+            self.status_var.set("Export cancelled")
+        else:
+            reused = ""
+            if getattr(command, "reused", 0):
+                reused = f", {command.reused} of {command.segments} segments reused"
+            self.status_var.set(f"Audio exported: {os.path.basename(command.path)}{reused}{self._cache_summary()}")
+            messagebox.showinfo("Export Audio", f"Audio successfully exported to:\n{command.path}")
+    
+    def _sample_metrics(self):
+        """Measure main-loop lag, collect first-word latencies and refresh the readout"""
+        now = time.perf_counter()
+        # A timer that fires late means the Tk thread was busy for that long
+        self.metrics.record("tk_lag_ms", max(0.0, (now - self.metrics_expected) * 1000))
+        self._poll_first_words()
+        self.metrics_tick += 1
+        if self.metrics_readout and self.metrics_tick % 4 == 0:
+            self.metrics_var.set(self._metrics_readout())
+        self.metrics_expected = time.perf_counter() + self.metrics_interval_ms / 1000
+        self.root.after(self.metrics_interval_ms, self._sample_metrics)
+    
+    def _poll_first_words(self):
+        """Record latencies for speech whose first word has been spoken since the last poll"""
+        watching = []
+        for command, latencies in self.first_word_watch:
+            if command.first_word_at is not None:
+                for name, started in latencies.items():
+                    self.metrics.record(name, (command.first_word_at - started) * 1000)
+            elif not command.done.is_set():
+                watching.append((command, latencies))
+        self.first_word_watch = watching
+    
+    def _metrics_readout(self):
+        """Compact status bar text: medians, plus the 99th percentile main-loop lag"""
+        parts = []
+        for label, name, pct, fmt in (("TTFW", "ttfw_ms", 50, "{:.0f} ms"),
+                                      ("RTF", "render_rtf", 50, "{:.2f}"),
+                                      ("gap", "queue_gap_ms", 50, "{:.0f} ms"),
+                                      ("clip", "clipboard_to_speech_ms", 50, "{:.0f} ms"),
+                                      ("stop", "stop_ms", 50, "{:.0f} ms"),
+                                      ("lag p99", "tk_lag_ms", 99, "{:.0f} ms")):
+            value = self.metrics.percentile(name, pct)
+            if value is not None:
+                parts.append(f"{label} {fmt.format(value)}")
+        return " · ".join(parts)
+    
+    def on_dump_metrics(self):
+        """Save the latency/throughput metrics collected this session as JSON or CSV"""
+        self._poll_first_words()
+        file_path = filedialog.asksaveasfilename(
+            title="Save Metrics",
+            defaultextension=".json",
+            initialfile="readaloud_metrics.json",
+            filetypes=[("JSON files", "*.json"), ("CSV files", "*.csv"), ("All files", "*.*")]
+        )
+        if not file_path:
+            return
+        context = {"voice": self.voice_combo.get(), "rate": self.rate.get(),
+                   "volume": round(self.vol.get(), 2), "audio_cache": self.audio_cache is not None,
+                   "normalize_text": self.normalize_text, "platform": platform.platform()}
+        try:
+            self.metrics.dump(file_path, context)
+            self.status_var.set(f"Metrics saved: {os.path.basename(file_path)}")
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to save metrics: {str(e)}")
+    
+    def _cache_summary(self):
+        """Short audio cache hit/miss readout for the status bar"""
+        if self.audio_cache is None:
+            return ""
+        stats = self.audio_cache.stats()
+        return f" (audio cache: {stats['hits']} hits, {stats['misses']} misses)"
+    
+    def _duplicate_summary(self):
+        """Count of suppressed duplicate clipboard entries for the status bar"""
+        if not self.clipboard_seen.suppressed:
+            return ""
+        return f" ({self.clipboard_seen.suppressed} duplicates suppressed)"
     
     def on_search(self):
-        """Open search and replace dialog"""
-        SearchDialog(self.root, self.txt)
+        """Open search and replace dialog (or raise the one already open)"""
+        if self.search_dialog is not None and self.search_dialog.dialog.winfo_exists():
+            self.search_dialog.dialog.lift()
+            self.search_dialog.find_entry.focus()
+            return
+        self.search_dialog = SearchDialog(self.root, self.txt)
     
     def on_settings(self):
         """Open settings dialog for hotkey customization"""
         SettingsDialog(self.root, self)
     
     def on_speak_selected(self):
-        if self.speaking:
+        if self.playback.active or not self._engine_available():
             return
         try:
-            selected_text = self.txt.get(tk.SEL_FIRST, tk.SEL_LAST).strip()
-            if not selected_text:
+            selected_text = self.txt.get(tk.SEL_FIRST, tk.SEL_LAST)
+            if not selected_text.strip():
                 messagebox.showinfo("Read Aloud", "Please select some text first.")
                 return
-            self.speaking = True
-            self.stop_requested = False
-            self.global_stop_requested = False  # Reset global stop flag
-            self.speak_btn.state(["disabled"])
-            self.speak_selected_btn.state(["disabled"])
+            if self.large_file is None:
+                self.line_index = LineIndex(self.txt.get("1.0", "end-1c"))
+            # Word offsets from the engine are relative to the selection start
+            count = self.txt.count("1.0", tk.SEL_FIRST, "chars")
+            offset = count[0] if count else 0
             self.status_var.set("Speaking selected text...")
-            self.speak_thread = threading.Thread(target=self._speak_worker, args=(selected_text,), daemon=True)
-            self.speak_thread.start()
+            self._speak_text(selected_text, self.window_start + offset)
         except tk.TclError:
             messagebox.showinfo("Read Aloud", "Please select some text first.")
 
     def on_speak(self):
-        if self.speaking:
+        if self.playback.active or not self._engine_available():
             return
-        text = self.txt.get("1.0", "end").strip()
-        if not text:
+        if self.large_file is not None:
+            # Stream the whole file from disk rather than the loaded window
+            self.status_var.set("Speaking all text...")
+            self._speak_chunks(self.large_file.iter_chunks(0), highlight=True)
+            return
+        # Keep the text unstripped so chunk offsets match editor positions
+        text = self.txt.get("1.0", "end-1c")
+        if not text.strip():
             messagebox.showinfo("Read Aloud", "Paste or type some text first.")
             return
-        self.speaking = True
-        self.stop_requested = False
-        self.global_stop_requested = False  # Reset global stop flag
+        self.line_index = LineIndex(text)
+        self.status_var.set("Speaking all text...")
+        self._speak_text(text, 0)
+
+    def _speak_text(self, text, offset=None):
+        """Stream text to the engine thread and track it as the current speech
+
+        offset is the document position of text[0]; pass None for text that
+        is not in the editor (e.g. clipboard) so nothing gets highlighted.
+        """
+        self._speak_chunks(iter_chunks(text, offset or 0), highlight=offset is not None)
+
+    def _speak_chunks(self, chunks, highlight=False):
+        """Stream sentence chunks to the engine thread as the current speech"""
+        token = self.playback.begin("speech")
         self.speak_btn.state(["disabled"])
         self.speak_selected_btn.state(["disabled"])
-        self.status_var.set("Speaking all text...")
-        self.speak_thread = threading.Thread(target=self._speak_worker, args=(text,), daemon=True)
-        self.speak_thread.start()
+        self._sync_engine_properties()
+        on_word = self._on_word if highlight else None
+        on_done = lambda cmd: self._speech_ended(token, cmd)
+        self.speech_command = self.speaker.speak_chunks(chunks, on_word=on_word, on_done=on_done, token=token)
+        latencies = {"ttfw_ms": self.speech_command.submitted_at}
+        if self.clipboard_changed_at is not None:
+            latencies["clipboard_to_speech_ms"] = self.clipboard_changed_at
+            self.clipboard_changed_at = None
+        self.first_word_watch.append((self.speech_command, latencies))
 
-    def _speak_worker(self, text):
-        """Worker thread for speaking text - with Python 3.13 fix"""
-        engine = None
-        com_initialized = False
-        
-        try:
-            # Try to initialize COM for this thread (Windows-specific fix for Python 3.13)
-            try:
-                import pythoncom
-                # Try CoInitialize first
-                pythoncom.CoInitialize()
-                com_initialized = True
-            except Exception:
-                # If CoInitialize fails, try CoInitializeEx
-                try:
-                    import pythoncom
-                    pythoncom.CoInitializeEx(pythoncom.COINIT_MULTITHREADED)
-                    com_initialized = True
-                except Exception:
-                    # If both fail, try without COM initialization
-                    pass
-            
-            # Create a fresh engine for each speech to avoid lifecycle issues
-            engine = pyttsx3.init()
-            self.current_engine = engine  # Store reference for stop functionality
-            self.all_engines.append(engine)  # Track all engines for global stop
-            
-            # Apply current settings to the new engine
-            engine.setProperty("rate", self.rate.get())
-            engine.setProperty("volume", self.vol.get())
-            if self.selected_voice:
-                engine.setProperty("voice", self.selected_voice)
-            
-            # Check if stop was requested before starting
-            if self.stop_requested or self.global_stop_requested:
-                return
-            
-            # Set up word highlighting callback
-            def on_word(name, location, length):
-                if self.stop_requested or self.global_stop_requested:
-                    return
-                # Calculate word position in text
-                try:
-                    self.root.after(0, lambda loc=location, ln=length: self.highlight_word(loc, ln))
-                except:
-                    pass
-            
-            # Connect callback if available (not all engines support this)
+    def _sync_engine_properties(self):
+        """Queue the current rate, volume and voice; the engine applies only changes"""
+        self.speaker.configure(self.selected_voice, self.rate.get(), self.vol.get())
+
+    def _on_word(self, location, length):
+        """Word callback from the engine thread"""
+        if not self.playback.active:
+            return
+        # Coalesce: when words outrun the UI only the latest one gets drawn
+        self.pending_word = (location, length)
+        if not self.highlight_scheduled:
+            self.highlight_scheduled = True
             try:
-                engine.connect('started-word', on_word)
+                self.root.after(self.highlight_interval_ms, self._flush_highlight)
             except:
-                pass  # Callback not supported, continue without highlighting
-            
-            # Simple say and wait
-            engine.say(text)
-            engine.runAndWait()
-            
-            # Clear highlighting
-            self.root.after(0, lambda: self.txt.tag_remove(self.highlight_tag, "1.0", "end"))
-            
-        except Exception as e:
-            # Use after() to safely show error message from worker thread
-            error_msg = str(e)
-            self.root.after(0, lambda msg=error_msg: messagebox.showerror("TTS Error", f"Failed to speak text: {msg}"))
-        finally:
-            # Cleanup engine
-            if engine:
-                try:
-                    # Remove from tracking list
-                    if engine in self.all_engines:
-                        self.all_engines.remove(engine)
-                    del engine
-                except:
-                    pass
-            
-            # Uninitialize COM if it was initialized
-            if com_initialized:
-                try:
-                    import pythoncom
-                    pythoncom.CoUninitialize()
-                except:
-                    pass
-            
-            self.current_engine = None
-            self.speaking = False
-            self.root.after(0, lambda: self.speak_btn.state(["!disabled"]))
-            self.root.after(0, lambda: self.speak_selected_btn.state(["!disabled"]))
-            
-            # If there are queued items and auto-queue is enabled, start playing the queue
-            if self.speech_queue and self.clipboard_auto_queue and not self.queue_playing:
-                self.root.after(0, lambda: self._start_auto_queue())
-            else:
-                self.root.after(0, lambda: self.status_var.set("Ready"))
+                self.highlight_scheduled = False
+
+    def _flush_highlight(self):
+        self.highlight_scheduled = False
+        word, self.pending_word = self.pending_word, None
+        if word is not None and self.playback.active:
+            self.highlight_word(*word)
+
+    def _speech_ended(self, token, command):
+        """Engine/player thread: the speech is silent, so a new request may start at once"""
+        self.playback.finish(token)
+        self.root.after(0, lambda: self._on_speak_done(command))
+
+    def _on_speak_done(self, command):
+        """Reset the UI once the engine reports the speech finished"""
+        self._poll_first_words()
+        if command is not self.speech_command:
+            return  # Stale completion from speech that was stopped
+        self.speech_command = None
+        
+        # Clear highlighting
+        self.pending_word = None
+        self._clear_highlight()
+        if self.large_file is None:
+            self.line_index = None
+        if command.error is not None and not command.cancelled:
+            messagebox.showerror("TTS Error", f"Failed to speak text: {command.error}")
+        
+        self.speak_btn.state(["!disabled"])
+        self.speak_selected_btn.state(["!disabled"])
+        
+        # If there are queued items and auto-queue is enabled, start playing the queue
+        if self.speech_queue and self.clipboard_auto_queue and not self.playback.active:
+            self._start_auto_queue()
+        else:
+            self.status_var.set(f"Ready{self._cache_summary()}{self._duplicate_summary()}")
     
     def highlight_word(self, location, length):
         """Highlight the current word being spoken"""
         try:
-            # Remove previous highlight
-            self.txt.tag_remove(self.highlight_tag, "1.0", "end")
+            if self.large_file is not None:
+                # Offsets are file positions; bring the speech position into the window
+                if not self.window_start <= location <= self.window_start + self.window_len - length:
+                    self._load_window(location - self.large_window_chars // 4)
+            if self.line_index is None:
+                self.line_index = LineIndex(self.txt.get("1.0", "end-1c"))
             
             # Find position in text widget
-            start_idx = f"1.0 + {location} chars"
-            end_idx = f"1.0 + {location + length} chars"
+            start_idx = self.line_index.index(location)
+            end_idx = self.line_index.index(location + length)
             
-            # Add highlight
+            # Move the highlight from the previous word only
+            self._clear_highlight()
             self.txt.tag_add(self.highlight_tag, start_idx, end_idx)
+            self.highlight_range = (start_idx, end_idx)
             
-            # Auto-scroll to show highlighted word
-            self.txt.see(start_idx)
+            # Auto-scroll only when the word is off screen
+            if self.txt.bbox(start_idx) is None:
+                self.txt.see(start_idx)
         except Exception:
             pass  # Ignore errors in highlighting
 
+    def _clear_highlight(self):
+        """Remove the word highlight without scanning the whole document"""
+        if self.highlight_range is not None:
+            self.txt.tag_remove(self.highlight_tag, *self.highlight_range)
+            self.highlight_range = None
+
     def on_stop(self):
-        # Set global stop flag to stop all TTS operations
-        self.global_stop_requested = True
-        self.stop_requested = True
-        
-        # Stop all active engines
-        engines_to_stop = self.all_engines.copy()  # Copy to avoid modification during iteration
-        for engine in engines_to_stop:
-            try:
-                engine.stop()
-            except Exception:
-                pass  # Ignore errors when stopping engine
-        
-        # Clear all engine references
-        self.all_engines.clear()
-        self.current_engine = None
-        
-        # Stop regular speech
-        if self.speaking:
-            self.speaking = False
-            self.speak_btn.state(["!disabled"])
-            self.speak_selected_btn.state(["!disabled"])
-            self.txt.tag_remove(self.highlight_tag, "1.0", "end")  # Clear highlighting
+        """Stop speech and queue playback; a new request can start immediately, even before the audio has died away"""
+        # Cancelling the token stops every command of the operation at its next chunk or word;
+        # the engine is also interrupted directly if it is running one of them. Work that
+        # belongs to no playback (an audio export) keeps running.
+        token = self.playback.stop()
+        if token is not None:
+            self.speaker.stop(token)
+        sounding = any(command is not None and not command.done.is_set()
+                       for command in (self.speech_command, self.queue_command))
+        if token is not None and not sounding:
+            self.playback.finish(token)  # Between queue items or still rendering: already silent
+        self.speech_command = None
+        self.queue_command = None
+        
+        # Reset the UI for regular speech
+        self.pending_word = None
+        self.speak_btn.state(["!disabled"])
+        self.speak_selected_btn.state(["!disabled"])
+        self._clear_highlight()
         
         # Stop queue playback
-        if self.queue_playing:
-            self.queue_playing = False
-            self.current_queue_index = -1
-            self.update_queue_display()
-        
-        # Reset stop flags after a short delay to allow for new operations
-        self.root.after(100, lambda: self._reset_stop_flags())
+        self._discard_prerendered()
+        if self.queue_token is not None:
+            self.queue_token = None
+            self.speech_queue.current = -1
         
         self.status_var.set("All speech stopped")
     
-    def _reset_stop_flags(self):
-        """Reset stop flags to allow new TTS operations"""
-        self.global_stop_requested = False
-        self.stop_requested = False
-    
     def _start_auto_queue(self):
         """Start playing the queue automatically after speech finishes"""
-        if not self.speech_queue or self.queue_playing or self.speaking:
+        if not self.speech_queue or self.playback.active:
             return
         
-        self.queue_playing = True
-        self.stop_requested = False
-        self.global_stop_requested = False
+        self.queue_token = self.playback.begin("queue")
         # Don't reset current_queue_index - continue from where we left off
-        if self.current_queue_index < 0:
-            self.current_queue_index = 0
-        self.status_var.set(f"Auto-playing queue ({self.current_queue_index + 1} of {len(self.speech_queue)} items)")
-        self.update_queue_display()
-        threading.Thread(target=self._play_queue_worker, daemon=True).start()
+        if self.speech_queue.current < 0:
+            self.speech_queue.current = 0
+        self.status_var.set(f"Auto-playing queue ({self.speech_queue.current + 1} of {len(self.speech_queue)} items)")
+        self._play_queue_item(self.queue_token)
 
     def on_close(self):
         self.save_settings()
+        if self.playback.is_current(self.queue_token) and self.speech_queue.current_item() is not None:
+            self.queue_journal.record_offset(self._queue_position())
+        self.queue_journal.compact()
+        self.queue_journal.close()
+        if self.export_job is not None:
+            self.export_job.cancel()
+        self.player.stop()
+        self.engine.shutdown()
         self.root.destroy()
 
 
@@ -937,7 +1550,7 @@ class SearchDialog:
         self.text_widget = text_widget
         self.dialog = tk.Toplevel(parent)
         self.dialog.title("Find and Replace")
-        self.dialog.geometry("450x200")
+        self.dialog.geometry("560x200")
         self.dialog.resizable(False, False)
         
         # Search frame
@@ -962,20 +1575,60 @@ class SearchDialog:
         
         ttk.Checkbutton(options_frame, text="Case sensitive", variable=self.case_sensitive).pack(side="left", padx=5)
         ttk.Checkbutton(options_frame, text="Use regex", variable=self.use_regex).pack(side="left", padx=5)
+        self.status_var = tk.StringVar()
+        ttk.Label(options_frame, textvariable=self.status_var).pack(side="right", padx=5)
         
         # Buttons
         button_frame = ttk.Frame(self.dialog, padding=10)
         button_frame.pack(fill="x")
         
+        ttk.Button(button_frame, text="Find All", command=self.find_all).pack(side="left", padx=5)
+        ttk.Button(button_frame, text="◀", width=3, command=self.find_prev).pack(side="left")
         ttk.Button(button_frame, text="Find Next", command=self.find_next).pack(side="left", padx=5)
         ttk.Button(button_frame, text="Replace", command=self.replace_one).pack(side="left", padx=5)
-        ttk.Button(button_frame, text="Replace All", command=self.replace_all).pack(side="left", padx=5)
+        self.replace_all_btn = ttk.Button(button_frame, text="Replace All", command=self.replace_all)
+        self.replace_all_btn.pack(side="left", padx=5)
         ttk.Button(button_frame, text="Close", command=self.dialog.destroy).pack(side="right", padx=5)
         
         self.search_start = "1.0"
+        self.replace_job = None
+        self.saved_state = None  # Text widget state while a Replace All runs
+        self.patterns = {}  # (term, case sensitive, regex) -> compiled pattern
+        
+        # Find All: match index kept in step with edits, highlighted on screen only
+        self.match_index = None
+        self.index_key = None
+        self.proxy_cmd = None  # Original Tcl command of the Text widget while proxied
+        self.proxy_callbacks = []  # Tcl names of _before_edit/_after_edit while proxied
+        self.visible_lines = None
+        self.visible_job = None
+        self.rebuild_job = None
+        self.text_widget.tag_config("find_all", background="#ffe082")
+        self.text_widget.tag_lower("find_all")
+        self.dialog.bind("<Destroy>", self._on_destroy)
+    
+    def _search_key(self):
+        return (self.find_entry.get(), self.case_sensitive.get(), self.use_regex.get())
+    
+    def _compile(self, key, title):
+        """Compiled pattern for a search key (cached), or None after showing an error"""
+        pattern = self.patterns.get(key)
+        if pattern is None:
+            term, case_sensitive, regex = key
+            flags = 0 if case_sensitive else re.IGNORECASE
+            try:
+                pattern = re.compile(term if regex else re.escape(term), flags)
+            except re.error as e:
+                messagebox.showerror(title, f"Invalid regular expression: {e}")
+                return None
+            self.patterns[key] = pattern
+        return pattern
     
     def find_next(self):
         """Find next occurrence"""
+        if self._index_ready():
+            self._jump(forward=True)
+            return
         search_term = self.find_entry.get()
         if not search_term:
             return
@@ -984,16 +1637,13 @@ class SearchDialog:
         self.text_widget.tag_remove("sel", "1.0", "end")
         
         # Search
-        flags = []
-        if not self.case_sensitive.get():
-            flags.append("nocase")
-        if self.use_regex.get():
-            flags.append("regexp")
-        
-        pos = self.text_widget.search(search_term, self.search_start, "end", *flags)
+        length = tk.IntVar()
+        pos = self.text_widget.search(search_term, self.search_start, "end", count=length,
+                                      nocase=not self.case_sensitive.get(),
+                                      regexp=self.use_regex.get())
         
         if pos:
-            end_pos = f"{pos}+{len(search_term)}c"
+            end_pos = f"{pos}+{length.get()}c"
             self.text_widget.tag_add("sel", pos, end_pos)
             self.text_widget.mark_set("insert", pos)
             self.text_widget.see(pos)
@@ -1002,6 +1652,215 @@ class SearchDialog:
             messagebox.showinfo("Find", "No more matches found.")
             self.search_start = "1.0"
     
+    def find_prev(self):
+        """Find previous occurrence"""
+        if self._index_ready():
+            self._jump(forward=False)
+            return
+        search_term = self.find_entry.get()
+        if not search_term:
+            return
+        length = tk.IntVar()
+        pos = self.text_widget.search(search_term, "insert", "1.0", backwards=True, count=length,
+                                      nocase=not self.case_sensitive.get(),
+                                      regexp=self.use_regex.get())
+        if pos:
+            self.text_widget.tag_remove("sel", "1.0", "end")
+            self.text_widget.tag_add("sel", pos, f"{pos}+{length.get()}c")
+            self.text_widget.mark_set("insert", pos)
+            self.text_widget.see(pos)
+            self.search_start = f"{pos}+{length.get()}c"
+        else:
+            messagebox.showinfo("Find", "No more matches found.")
+    
+    def find_all(self):
+        """Index every match on a worker thread and highlight the ones on screen"""
+        key = self._search_key()
+        if not key[0]:
+            return
+        pattern = self._compile(key, "Find All")
+        if pattern is None:
+            return
+        self._install_proxy()
+        self._start_index(key, pattern)
+    
+    def _start_index(self, key, pattern):
+        """Replace the match index with a fresh one built from the current text"""
+        self._clear_index()
+        self.index_key = key
+        self.status_var.set("Searching...")
+        widget = self.text_widget
+        self.match_index = MatchIndex(pattern).start(
+            widget.get("1.0", "end-1c"),
+            on_progress=lambda index: widget.after(0, lambda: self._on_index_progress(index)),
+            on_done=lambda index: widget.after(0, lambda: self._on_index_progress(index)))
+        if self.visible_job is None:
+            self._refresh_visible()
+    
+    def _on_index_progress(self, index):
+        """Show the running match count while the index builds"""
+        if index is not self.match_index or not self.dialog.winfo_exists():
+            return
+        count = len(index)
+        self.status_var.set(f"{count:,} matches" if index.complete else f"{count:,} matches...")
+        self.visible_lines = None  # Redraw the on-screen highlights
+    
+    def _index_ready(self):
+        """True if a finished match index exists for the current search terms"""
+        return (self.match_index is not None and self.match_index.complete
+                and self.index_key == self._search_key())
+    
+    def _jump(self, forward):
+        """Select the next/previous indexed match from the cursor"""
+        index = self.match_index
+        if not len(index):
+            messagebox.showinfo("Find", "No matches found.")
+            return
+        widget = self.text_widget
+        line, col = map(int, widget.index("insert").split("."))
+        i = index.next_after(line, col) if forward else index.prev_before(line, col)
+        i %= len(index)  # Wrap around at either end
+        line, col, end_line, end_col = index[i]
+        start, end = f"{line}.{col}", f"{end_line}.{end_col}"
+        widget.tag_remove("sel", "1.0", "end")
+        widget.tag_add("sel", start, end)
+        widget.mark_set("insert", start)
+        widget.see(start)
+        self.search_start = end
+        self.status_var.set(f"Match {i + 1:,} of {len(index):,}")
+    
+    def _refresh_visible(self):
+        """Highlight indexed matches in the visible lines only, following scrolls and edits"""
+        self.visible_job = None
+        if self.match_index is None or not self.dialog.winfo_exists():
+            return
+        widget = self.text_widget
+        top = int(widget.index("@0,0").split(".")[0])
+        bottom = int(widget.index(f"@0,{widget.winfo_height()}").split(".")[0])
+        if self.match_index.complete and self.visible_lines != (top, bottom):
+            self.visible_lines = (top, bottom)
+            widget.tag_remove("find_all", "1.0", "end")
+            ranges = []
+            for line, col, end_line, end_col in self.match_index.in_lines(top, bottom):
+                ranges += (f"{line}.{col}", f"{end_line}.{end_col}")
+            if ranges:
+                widget.tag_add("find_all", *ranges)
+        self.visible_job = self.dialog.after(100, self._refresh_visible)
+    
+    def _clear_index(self):
+        if self.match_index is not None:
+            self.match_index.cancel()
+            self.match_index = None
+        self.index_key = None
+        self.visible_lines = None
+        self.text_widget.tag_remove("find_all", "1.0", "end")
+    
+    # Tcl wrapper installed in place of the Text widget's command. The real command runs in
+    # Tcl, so its errors reach Tcl and Python callers as usual; a Python callback that raised
+    # instead would make the next mainloop iteration re-raise even a caught error.
+    PROXY_PROC = """
+        set op [lindex $args 0]
+        if {$op ni {insert delete replace edit}} {
+            return [%(orig)s {*}$args]
+        }
+        set lines [%(before)s {*}$args]
+        set result [%(orig)s {*}$args]
+        %(after)s $lines {*}$args
+        return $result
+    """
+    
+    def _install_proxy(self):
+        """Route the Text widget's edits through _before_edit/_after_edit to see each one"""
+        if self.proxy_cmd is not None:
+            return
+        widget = self.text_widget
+        self.proxy_cmd = widget._w + "_orig"
+        self.proxy_callbacks = [widget.register(self._before_edit), widget.register(self._after_edit)]
+        widget.tk.call("rename", widget._w, self.proxy_cmd)
+        before, after = self.proxy_callbacks
+        widget.tk.call("proc", widget._w, "args",
+                       self.PROXY_PROC % {"orig": self.proxy_cmd, "before": before, "after": after})
+    
+    def _remove_proxy(self):
+        if self.proxy_cmd is None:
+            return
+        widget = self.text_widget
+        try:
+            widget.tk.call("rename", widget._w, "")
+            widget.tk.call("rename", self.proxy_cmd, widget._w)
+        except tk.TclError:
+            pass  # Text widget already destroyed
+        for name in self.proxy_callbacks:
+            try:
+                widget.deletecommand(name)
+            except tk.TclError:
+                pass
+        self.proxy_cmd = None
+        self.proxy_callbacks = []
+    
+    def _line(self, index):
+        return int(self.text_widget.tk.call(self.proxy_cmd, "index", index).split(".")[0])
+    
+    def _before_edit(self, *args):
+        """Lines an insert/delete/replace will touch, as "first last end_line"; "" if unknown
+        
+        Called from the Tcl proxy, so it must never raise.
+        """
+        try:
+            if self.match_index is None or args[0] == "edit":
+                return ""
+            if args[0] == "insert":
+                positions = [args[1]]
+            elif args[0] == "replace":
+                positions = list(args[1:3])
+            else:
+                positions = list(args[1:]) if len(args) > 2 else [args[1], f"{args[1]}+1c"]
+            last_line = self._line("end-1c")
+            lines = [min(self._line(p), last_line) for p in positions]
+            return f"{min(lines)} {max(lines)} {last_line}"
+        except Exception:
+            return ""  # Bad index: the real command fails too
+    
+    def _after_edit(self, lines, *args):
+        """Patch the match index for the lines a successful edit touched; must never raise"""
+        index = self.match_index
+        if index is None:
+            return
+        try:
+            if args[0] == "edit":
+                if len(args) > 1 and args[1] in ("undo", "redo"):
+                    self._schedule_rebuild()  # Undo/redo edits happen inside Tk, out of sight
+                return
+            if not lines or not index.complete:
+                self._schedule_rebuild()  # The worker is scanning a stale snapshot
+                return
+            first, last, last_line = map(int, lines.split())
+            line_delta = self._line("end-1c") - last_line
+            index.patch(first, last, line_delta,
+                        self.text_widget.tk.call(self.proxy_cmd, "get", f"{first}.0", f"{last + line_delta}.end"))
+            self.visible_lines = None
+            if self.dialog.winfo_exists():
+                self.status_var.set(f"{len(index):,} matches")
+        except Exception:
+            try:
+                self._schedule_rebuild()
+            except Exception:
+                pass  # Dialog already destroyed
+    
+    def _schedule_rebuild(self):
+        """Re-run Find All once edits pause"""
+        if self.match_index is not None:
+            self.match_index.cancel()
+        if self.rebuild_job is not None:
+            self.dialog.after_cancel(self.rebuild_job)
+        self.rebuild_job = self.dialog.after(300, self._rebuild)
+    
+    def _rebuild(self):
+        self.rebuild_job = None
+        if self.index_key is None or not self.dialog.winfo_exists():
+            return
+        self._start_index(self.index_key, self.patterns[self.index_key])
+    
     def replace_one(self):
         """Replace current selection"""
         try:
@@ -1014,35 +1873,83 @@ class SearchDialog:
             messagebox.showinfo("Replace", "No text selected. Use 'Find Next' first.")
     
     def replace_all(self):
-        """Replace all occurrences"""
+        """Replace all occurrences on a worker thread; pressing again cancels"""
+        if self.replace_job is not None:
+            self.replace_job.cancel()
+            return
+        
         search_term = self.find_entry.get()
         replace_term = self.replace_entry.get()
         
         if not search_term:
             return
+        if str(self.text_widget.cget("state")) == "disabled":
+            messagebox.showinfo("Replace All", "The document is read-only.")
+            return
         
-        content = self.text_widget.get("1.0", "end-1c")
+        literal = not self.use_regex.get()
+        pattern = self._compile(self._search_key(), "Replace All")
+        if pattern is None:
+            return
         
-        if self.use_regex.get():
-            flags = 0 if self.case_sensitive.get() else re.IGNORECASE
-            new_content, count = re.subn(search_term, replace_term, content, flags=flags)
-        else:
-            if self.case_sensitive.get():
-                count = content.count(search_term)
-                new_content = content.replace(search_term, replace_term)
-            else:
-                # Case insensitive replace
-                import re
-                pattern = re.compile(re.escape(search_term), re.IGNORECASE)
-                new_content = pattern.sub(replace_term, content)
-                count = len(pattern.findall(content))
-        
-        if count > 0:
-            self.text_widget.delete("1.0", "end")
-            self.text_widget.insert("1.0", new_content)
-            messagebox.showinfo("Replace All", f"Replaced {count} occurrence(s).")
-        else:
+        # Lock the document while the worker matches against a snapshot of it
+        content = self.text_widget.get("1.0", "end-1c")
+        self.saved_state = self.text_widget.cget("state")
+        self.text_widget.configure(state="disabled")
+        self.replace_all_btn.configure(text="Cancel")
+        self.status_var.set("Replacing...")
+        widget = self.text_widget
+        self.replace_job = ReplaceAllJob(
+            content, pattern, replace_term, literal,
+            on_done=lambda job: widget.after(0, lambda: self._on_replace_done(job))).start()
+    
+    def _on_replace_done(self, job):
+        """Apply the changed ranges as a single undo step"""
+        self.replace_job = None
+        widget = self.text_widget
+        widget.configure(state=self.saved_state)
+        if self.dialog.winfo_exists():
+            self.replace_all_btn.configure(text="Replace All")
+            self.status_var.set("")
+        if job.cancelled:
+            if self.dialog.winfo_exists():
+                self.status_var.set("Replace All cancelled")
+            return
+        if job.error is not None:
+            messagebox.showerror("Replace All", f"Replace failed: {job.error}")
+            return
+        if job.count == 0:
             messagebox.showinfo("Replace All", "No matches found.")
+            return
+        
+        # Apply from the end so earlier offsets stay valid; keep the scroll position
+        top = widget.yview()[0]
+        widget.configure(autoseparators=False)
+        widget.edit_separator()
+        for start, end, text in reversed(job.edits):
+            start_idx = job.line_index.index(start)
+            widget.delete(start_idx, job.line_index.index(end))
+            widget.insert(start_idx, text)
+        widget.edit_separator()
+        widget.configure(autoseparators=True)
+        widget.yview_moveto(top)
+        messagebox.showinfo("Replace All", f"Replaced {job.count} occurrence(s).")
+    
+    def _on_destroy(self, event):
+        """Cancel background work and restore the Text widget when the dialog closes"""
+        if event.widget is not self.dialog:
+            return
+        if self.replace_job is not None:
+            self.replace_job.cancel()
+        for job in (self.visible_job, self.rebuild_job):
+            if job is not None:
+                self.dialog.after_cancel(job)
+        self.visible_job = self.rebuild_job = None
+        try:
+            self._clear_index()
+        except tk.TclError:
+            pass  # Text widget already destroyed
+        self._remove_proxy()
 
 
 class SettingsDialog:
@@ -1158,7 +2065,10 @@ class SettingsDialog:
 
 
 if __name__ == "__main__":
+    profile = StartupProfile(_process_started, enabled="--profile-startup" in sys.argv[1:])
+    profile.mark("imports")
     root = tk.Tk()
-    app = ReaderApp(root)
+    profile.mark("tk root")
+    app = ReaderApp(root, profile)
     root.minsize(700, 400)
     root.mainloop()
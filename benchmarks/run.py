@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for Read Aloud's hot paths.
+
+Runs against the stub pyttsx3 driver in benchmarks/stub, so results do not
+depend on the installed voices. Core benchmarks exercise tts_core directly;
+GUI benchmarks drive a withdrawn ReaderApp and are skipped when Tk cannot
+open a display (run them under Xvfb: xvfb-run python benchmarks/run.py).
+
+    python benchmarks/run.py                  # full suite (texts up to 50 MB)
+    python benchmarks/run.py --quick          # smaller inputs, for CI
+    python benchmarks/run.py --only "speak*"  # cases matching a pattern
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --update-thresholds
+
+Every case reports wall-clock seconds. Cases listed in thresholds.json fail
+the run (exit status 1) when they take longer than their limit;
+--update-thresholds rewrites the file from this machine's results.
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+STUB_DIR = os.path.join(BENCH_DIR, "stub")
+THRESHOLDS_FILE = os.path.join(BENCH_DIR, "thresholds.json")
+
+KB = 1024
+MB = 1024 * 1024
+
+
+def install_stub(wpm):
+    """Put the stub driver ahead of any installed pyttsx3, here and in child processes"""
+    if "pyttsx3" in sys.modules and not getattr(sys.modules["pyttsx3"], "STUB", False):
+        raise RuntimeError("the real pyttsx3 was imported before the stub")
+    os.environ["READALOUD_STUB_WPM"] = str(wpm)
+    paths = [STUB_DIR, REPO_DIR]
+    os.environ["PYTHONPATH"] = os.pathsep.join(paths + [p for p in os.environ.get("PYTHONPATH", "").split(os.pathsep) if p])
+    sys.path[:0] = paths
+    import pyttsx3
+    if not getattr(pyttsx3, "STUB", False):
+        raise RuntimeError(f"expected the stub driver, got {pyttsx3.__file__}")
+
+
+# --- Inputs ---
+
+WORDS = ("the quick brown fox jumps over lazy dog reading aloud speech engine voice "
+         "queue sentence paragraph clipboard export highlight window document").split()
+EXTRAS = ["Dr. Smith", "e.g.", "3.14", "1,234,567", "https://example.com/docs", "$20", "v2.0"]
+
+
+def make_text(size, seed=0):
+    """Deterministic prose of about size characters, with normalizer-relevant tokens"""
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    while total < size:
+        sentences = []
+        for _ in range(rng.randint(3, 7)):
+            words = [rng.choice(WORDS) for _ in range(rng.randint(6, 18))]
+            if rng.random() < 0.2:
+                words.insert(rng.randrange(len(words)), rng.choice(EXTRAS))
+            sentences.append(" ".join(words).capitalize() + rng.choice(".!?"))
+        paragraph = " ".join(sentences)
+        parts.append(paragraph)
+        total += len(paragraph) + 2
+    return "\n\n".join(parts)[:size]
+
+
+def size_label(size):
+    return f"{size // MB}MB" if size >= MB else f"{size // KB}KB"
+
+
+# --- Harness ---
+
+BENCHMARKS = []
+
+
+def benchmark(name, gui=False):
+    """Register fn(ctx) -> {case: {"seconds": ..., other figures}}"""
+    def register(fn):
+        BENCHMARKS.append((name, gui, fn))
+        return fn
+    return register
+
+
+class Context:
+    def __init__(self, quick, temp_dir):
+        self.quick = quick
+        self.temp_dir = temp_dir
+        self.root = None
+        self.app = None
+
+    def sizes(self, full, quick):
+        return quick if self.quick else full
+
+    def path(self, name):
+        return os.path.join(self.temp_dir, name)
+
+
+def pump(root, until, timeout=600):
+    """Run the Tk event loop until until() is true"""
+    deadline = time.perf_counter() + timeout
+    while not until():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("benchmark did not finish")
+        root.update()
+        time.sleep(0.0005)
+
+
+def open_gui(ctx):
+    """Withdrawn ReaderApp on scratch settings; None when Tk has no display"""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception:
+        return None
+    root.withdraw()
+    import TTSPython
+    # Dialogs would block the run; the benchmarks check results themselves
+    for name in ("showinfo", "showerror", "showwarning"):
+        setattr(TTSPython.messagebox, name, lambda *args, **kwargs: None)
+    data_dir = ctx.path("app")
+    os.makedirs(data_dir, exist_ok=True)
+    with open(os.path.join(data_dir, "tts_settings.json"), "w") as f:
+        # No cached audio: speech goes through the engine and its word events
+        json.dump({"audio_cache_enabled": False, "clipboard_monitor": False,
+                   "metrics_readout": False}, f)
+    ctx.root = root
+    ctx.app = TTSPython.ReaderApp(root, data_dir=data_dir)
+    pump(root, lambda: ctx.app.engine_ready or ctx.app.engine.init_error is not None)
+    return ctx.app
+
+
+# --- Core benchmarks ---
+
+@benchmark("speak_all")
+def bench_speak_all(ctx):
+    """Chunk, normalize and stream a whole document through the engine thread"""
+    from tts_core import EngineService, Normalizer, iter_chunks
+    engine = EngineService().start()
+    engine.wait_ready(30)
+    results = {}
+    try:
+        for size in ctx.sizes([KB, 100 * KB, MB, 10 * MB, 50 * MB], [KB, 100 * KB, MB]):
+            text = make_text(size)
+            words = [0]
+
+            def on_word(location, length):
+                words[0] += 1
+
+            started = time.perf_counter()
+            command = engine.speak_chunks(Normalizer().normalize_chunks(iter_chunks(text)), on_word=on_word)
+            command.wait()
+            seconds = time.perf_counter() - started
+            results[size_label(size)] = {
+                "seconds": seconds, "words": words[0],
+                "words_per_s": words[0] / seconds if seconds else None,
+                "ttfw_ms": (command.first_word_at - command.submitted_at) * 1000 if command.first_word_at else None}
+    finally:
+        engine.shutdown()
+    return results
+
+
+@benchmark("queue")
+def bench_queue(ctx):
+    """Add 10k items with the journal attached, restore them, and speak them back to back"""
+    from tts_core import EngineService, QueueItem, QueueJournal, SpeechQueue
+    count = 10000
+    texts = [make_text(200, seed=i) for i in range(count)]
+    path = ctx.path("queue_journal.jsonl")
+    results = {}
+
+    queue = SpeechQueue()
+    journal = QueueJournal(path)
+    journal.load(queue)
+    started = time.perf_counter()
+    for i, text in enumerate(texts):
+        queue.append(QueueItem(text, f"Item {i}"))
+    results["append_10k"] = {"seconds": time.perf_counter() - started}
+    journal.close()
+
+    restored = SpeechQueue()
+    started = time.perf_counter()
+    QueueJournal(path).load(restored)
+    results["restore_10k"] = {"seconds": time.perf_counter() - started, "items": len(restored)}
+
+    engine = EngineService().start()
+    engine.wait_ready(30)
+    try:
+        items = count if not ctx.quick else 1000
+        gaps = []
+        previous_done = None
+        started = time.perf_counter()
+        for item in list(queue)[:items]:
+            command = engine.speak_chunks(item.chunks(), on_word=lambda location, length: None)
+            command.wait()
+            if previous_done is not None and command.first_word_at is not None:
+                gaps.append(command.first_word_at - previous_done)
+            previous_done = time.perf_counter()
+        seconds = time.perf_counter() - started
+        gaps.sort()
+        results[f"play_{items // 1000}k"] = {
+            "seconds": seconds, "items_per_s": items / seconds,
+            "gap_p50_ms": gaps[len(gaps) // 2] * 1000 if gaps else None}
+    finally:
+        engine.shutdown()
+    return results
+
+
+@benchmark("replace_all")
+def bench_replace_all(ctx):
+    """Replace All's worker: find every match and build the changed ranges"""
+    import re
+    from tts_core import ReplaceAllJob
+    results = {}
+    for size in ctx.sizes([MB, 10 * MB, 50 * MB], [MB, 10 * MB]):
+        text = make_text(size)
+        job = ReplaceAllJob(text, re.compile(re.escape("the"), re.IGNORECASE), "THE")
+        started = time.perf_counter()
+        job.start()
+        job.wait()
+        results[size_label(size)] = {"seconds": time.perf_counter() - started,
+                                     "matches": job.count, "edits": len(job.edits)}
+    return results
+
+
+@benchmark("clipboard")
+def bench_clipboard(ctx):
+    """Poll/settle, duplicate check and delta for bursts of copies"""
+    from tts_core import ClipboardDelta, ClipboardPoller, DuplicateIndex
+    results = {}
+    # growing_log: a 100 KB log re-copied 1000 times with 200 more characters each
+    # time, every copy settling; burst_1MB: 50 different 1 MB copies 20 ms apart,
+    # which should coalesce into a single action
+    log = make_text(100 * KB + 200 * 1000)
+    base = make_text(MB)
+    for label, texts, read_every in (
+            ("growing_log", [log[:100 * KB + 200 * i] for i in range(1000)], 0.4),
+            ("burst_1MB", [base[:MB - 8] + f"{i:08d}" for i in range(50)], 0.02)):
+        poller = ClipboardPoller()
+        seen = DuplicateIndex()
+        delta = ClipboardDelta()
+        actions = 0
+        now = 0.0
+        started = time.perf_counter()
+        # One read per copy, then a last read once everything has settled
+        for text in texts + [texts[-1]]:
+            settled = poller.observe(text, now)
+            now += read_every
+            if settled is not None and not seen.is_duplicate(settled):
+                delta.new_text(settled)
+                actions += 1
+            if read_every > poller.settle_ms / 1000:
+                # Slow copies: the next read finds this one settled
+                settled = poller.observe(text, now)
+                if settled is not None and not seen.is_duplicate(settled):
+                    delta.new_text(settled)
+                    actions += 1
+        settled = poller.observe(texts[-1], now + 1.0)
+        if settled is not None and not seen.is_duplicate(settled):
+            actions += 1
+        seconds = time.perf_counter() - started
+        results[label] = {"seconds": seconds, "copies": len(texts), "actions": actions,
+                          "us_per_copy": seconds / len(texts) * 1e6}
+    return results
+
+
+@benchmark("export")
+def bench_export(ctx):
+    """Parallel WAV export, then a re-export after editing one paragraph"""
+    from tts_core import ExportJob
+    size = MB if not ctx.quick else 100 * KB
+    paragraphs = make_text(size).split("\n\n")
+    out_path = ctx.path("export.wav")
+    results = {}
+    for case in ("full", "reexport_1_edit"):
+        if case != "full":
+            middle = len(paragraphs) // 2
+            paragraphs[middle] = "An edited paragraph for the benchmark. " + paragraphs[middle]
+        job = ExportJob("\n\n".join(paragraphs), out_path, jobs=2)
+        started = time.perf_counter()
+        job.start()
+        job.wait()
+        if job.error is not None:
+            raise job.error
+        results[case] = {"seconds": time.perf_counter() - started,
+                         "segments": job.segments, "reused": job.reused}
+    return results
+
+
+@benchmark("stop")
+def bench_stop(ctx):
+    """Stop-to-silence through Playback tokens, and a new speech started straight after each stop
+
+    Words are paced (300 wpm) so every stop lands mid-utterance. "seconds" is
+    the slowest stop; a stop above STOP_BUDGET_S fails the run whatever
+    thresholds.json says, as does a follow-up speech that never starts.
+    """
+    from tts_core import EngineService, Playback, Speaker, Metrics
+    metrics = Metrics()
+    engine = EngineService().start()
+    engine.wait_ready(30)
+    speaker = Speaker(engine)
+    playback = Playback(metrics)
+    text = make_text(10 * KB)
+    stops = 50 if not ctx.quick else 20
+    previous_wpm = os.environ.get("READALOUD_STUB_WPM")
+    os.environ["READALOUD_STUB_WPM"] = "300"
+    dropped = 0
+    restart_ms = []
+    try:
+        token = playback.begin("speech")
+        speaker.speak(text, on_done=lambda cmd, token=token: playback.finish(token), token=token)
+        for _ in range(stops):
+            deadline = time.perf_counter() + 5
+            while token.started_at is None and time.perf_counter() < deadline:
+                time.sleep(0.001)
+            time.sleep(random.uniform(0.01, 0.3))  # Land anywhere inside a word
+            stopped = playback.stop()
+            speaker.stop(stopped)
+            # Start the next speech at once, while the stopped one may still be winding down
+            token = playback.begin("speech")
+            speaker.speak(text, on_done=lambda cmd, token=token: playback.finish(token), token=token)
+            deadline = time.perf_counter() + 5
+            while (stopped.finished_at is None or token.started_at is None) and time.perf_counter() < deadline:
+                time.sleep(0.0005)
+            if token.started_at is None:
+                dropped += 1
+            else:
+                restart_ms.append((token.started_at - stopped.cancelled_at) * 1000)
+        playback.stop()
+        speaker.stop()
+    finally:
+        if previous_wpm is None:
+            os.environ.pop("READALOUD_STUB_WPM", None)
+        else:
+            os.environ["READALOUD_STUB_WPM"] = previous_wpm
+        engine.shutdown()
+    restart_ms.sort()
+    summary = metrics.summary().get("stop_ms", {})
+    worst = summary.get("max")
+    return {"engine": {
+        "seconds": worst / 1000 if worst is not None else float("inf"),
+        "budget_s": STOP_BUDGET_S if not dropped else 0.0,
+        "stops": summary.get("count", 0), "p50_ms": summary.get("p50"), "p99_ms": summary.get("p99"),
+        "dropped": dropped, "restart_p50_ms": restart_ms[len(restart_ms) // 2] if restart_ms else None}}
+
+
+STOP_BUDGET_S = 0.05
+
+
+# --- GUI benchmarks ---
+
+@benchmark("gui_speak_all", gui=True)
+def bench_gui_speak_all(ctx):
+    """ReaderApp.on_speak to completion, including word highlighting on the Tk thread"""
+    app = ctx.app
+    results = {}
+    for size in ctx.sizes([KB, 100 * KB, MB], [KB, 100 * KB]):
+        app.txt.delete("1.0", "end")
+        app.txt.insert("1.0", make_text(size))
+        ctx.root.update()
+        started = time.perf_counter()
+        app.on_speak()
+        pump(ctx.root, lambda: not app.playback.active)
+        results[size_label(size)] = {"seconds": time.perf_counter() - started}
+    return results
+
+
+@benchmark("gui_highlight_word", gui=True)
+def bench_gui_highlight_word(ctx):
+    """highlight_word across a 1 MB document, scrolling whenever the word is off screen"""
+    from tts_core import LineIndex
+    import re
+    app = ctx.app
+    text = make_text(MB)
+    app.txt.delete("1.0", "end")
+    app.txt.insert("1.0", text)
+    app.line_index = LineIndex(text)
+    words = [(m.start(), len(m.group())) for m in re.finditer(r"\S+", text)]
+    results = {}
+    for label, sample in (("sequential", words[:5000]),
+                          ("random", random.Random(1).sample(words, 2000))):
+        started = time.perf_counter()
+        for location, length in sample:
+            app.highlight_word(location, length)
+        ctx.root.update_idletasks()
+        seconds = time.perf_counter() - started
+        results[label] = {"seconds": seconds, "us_per_word": seconds / len(sample) * 1e6}
+    app._clear_highlight()
+    return results
+
+
+@benchmark("gui_replace_all", gui=True)
+def bench_gui_replace_all(ctx):
+    """SearchDialog.replace_all end to end: worker plus applying the edits as one undo step"""
+    import TTSPython
+    app = ctx.app
+    results = {}
+    for size in ctx.sizes([MB, 10 * MB], [MB]):
+        app.txt.delete("1.0", "end")
+        app.txt.insert("1.0", make_text(size))
+        dialog = TTSPython.SearchDialog(ctx.root, app.txt)
+        dialog.find_entry.insert(0, "the")
+        dialog.replace_entry.insert(0, "THE")
+        started = time.perf_counter()
+        dialog.replace_all()
+        pump(ctx.root, lambda: dialog.replace_job is None)
+        results[size_label(size)] = {"seconds": time.perf_counter() - started}
+        dialog.dialog.destroy()
+    return results
+
+
+@benchmark("gui_queue", gui=True)
+def bench_gui_queue(ctx):
+    """10k queue additions reflected in the listbox row by row"""
+    from tts_core import QueueItem
+    app = ctx.app
+    app.speech_queue.clear()
+    items = [QueueItem(make_text(200, seed=i), f"Item {i}") for i in range(10000)]
+    started = time.perf_counter()
+    for item in items:
+        app.speech_queue.append(item)
+    ctx.root.update_idletasks()
+    results = {"append_10k": {"seconds": time.perf_counter() - started}}
+    started = time.perf_counter()
+    app.speech_queue.clear()
+    ctx.root.update_idletasks()
+    results["clear_10k"] = {"seconds": time.perf_counter() - started}
+    return results
+
+
+# --- Runner ---
+
+def run(args):
+    install_stub(args.wpm)
+    thresholds = {}
+    if os.path.exists(args.thresholds):
+        with open(args.thresholds) as f:
+            thresholds = json.load(f)
+
+    with tempfile.TemporaryDirectory(prefix="readaloud-bench-") as temp_dir:
+        ctx = Context(args.quick, temp_dir)
+        cases = []
+        for name, gui, fn in BENCHMARKS:
+            if args.only and not any(fnmatch.fnmatch(name, pattern) for pattern in args.only):
+                continue
+            if gui and ctx.app is None and open_gui(ctx) is None:
+                cases.append({"name": name, "status": "skipped", "reason": "no display"})
+                print(f"{name:<36}skipped (no display)")
+                continue
+            for case, figures in fn(ctx).items():
+                full_name = f"{name}/{case}"
+                limit = thresholds.get(full_name)
+                if "budget_s" in figures:
+                    # A hard limit set by the benchmark itself, e.g. the stop latency guarantee
+                    budget = figures.pop("budget_s")
+                    limit = budget if limit is None else min(limit, budget)
+                status = "ok"
+                if limit is not None and figures["seconds"] > limit:
+                    status = "regressed"
+                cases.append(dict(name=full_name, status=status, threshold=limit, **figures))
+                extra = ", ".join(f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}"
+                                  for k, v in figures.items() if k != "seconds")
+                flag = f"  REGRESSED (limit {limit:.4g}s)" if status == "regressed" else ""
+                print(f"{full_name:<36}{figures['seconds']:>10.4f}s  {extra}{flag}", flush=True)
+        if ctx.app is not None:
+            ctx.app.engine.shutdown()
+            ctx.root.destroy()
+
+    report = {"python": platform.python_version(), "platform": platform.platform(),
+              "quick": args.quick, "wpm": args.wpm,
+              "recorded": time.strftime("%Y-%m-%dT%H:%M:%S"), "cases": cases}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.update_thresholds:
+        # Leave headroom for noisy machines, and a floor so millisecond cases don't flap;
+        # only cases that ran are updated
+        for case in cases:
+            if "seconds" in case:
+                thresholds[case["name"]] = float(f"{max(case['seconds'] * args.headroom, 0.05):.3g}")
+        with open(args.thresholds, "w") as f:
+            json.dump(dict(sorted(thresholds.items())), f, indent=2)
+            f.write("\n")
+        print(f"Thresholds written to {args.thresholds}")
+        return 0
+    return 1 if any(case["status"] == "regressed" for case in cases) else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Read Aloud's hot paths against a stub speech driver.")
+    parser.add_argument("--quick", action="store_true", help="smaller inputs (texts up to 1-10 MB)")
+    parser.add_argument("--only", action="append", metavar="PATTERN",
+                        help="run benchmarks whose name matches (fnmatch; repeatable)")
+    parser.add_argument("--wpm", type=float, default=0,
+                        help="stub word events per minute (default 0: as fast as the app consumes them)")
+    parser.add_argument("--output", metavar="JSON", help="write machine-readable results here")
+    parser.add_argument("--thresholds", default=THRESHOLDS_FILE,
+                        help="per-case time limits in seconds (default: benchmarks/thresholds.json)")
+    parser.add_argument("--update-thresholds", action="store_true",
+                        help="rewrite the thresholds from this run instead of checking them")
+    parser.add_argument("--headroom", type=float, default=3.0,
+                        help="multiplier applied to measured times by --update-thresholds")
+    return run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""
+Stand-in pyttsx3 driver for the benchmark suite.
+
+Implements the part of the pyttsx3 API Read Aloud uses (init, properties,
+voices, say, save_to_file, runAndWait, stop and the started-word /
+started-utterance / finished-utterance callbacks) without touching an OS
+speech driver, so timings measure the app rather than the platform.
+
+Pacing comes from environment variables so worker processes started by the
+parallel exporter behave the same as the parent:
+
+    READALOUD_STUB_WPM        started-word events per minute (0 = unpaced)
+    READALOUD_STUB_AUDIO_WPM  speaking rate synthetic WAVs are sized for
+                              (default: the engine's "rate" property)
+"""
+
+import math
+import os
+import re
+import struct
+import threading
+import time
+import wave
+
+STUB = True  # Lets the benchmark runner check it did not get the real pyttsx3
+__version__ = "stub"
+
+SAMPLE_RATE = 22050
+_WORD_RE = re.compile(r"\S+")
+
+
+def _tone():
+    """One second of a quiet 220 Hz tone, 16-bit mono"""
+    samples = (int(2000 * math.sin(2 * math.pi * 220 * i / SAMPLE_RATE)) for i in range(SAMPLE_RATE))
+    return struct.pack(f"<{SAMPLE_RATE}h", *samples)
+
+
+_TONE = _tone()
+
+
+class Voice:
+    def __init__(self, id, name, languages, gender, age=None):
+        self.id = id
+        self.name = name
+        self.languages = languages
+        self.gender = gender
+        self.age = age
+
+
+VOICES = [
+    Voice("stub.zira", "Stub Zira", ["en-US"], "female"),
+    Voice("stub.david", "Stub David", ["en-US"], "male"),
+    Voice("stub.hedda", "Stub Hedda", ["de-DE"], "female"),
+]
+
+
+class Engine:
+    def __init__(self):
+        self._properties = {"rate": 200, "volume": 1.0, "voice": VOICES[0].id}
+        self._callbacks = {}
+        self._queue = []
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._in_loop = False
+
+    # --- Properties and callbacks ---
+
+    def getProperty(self, name):
+        if name == "voices":
+            return list(VOICES)
+        return self._properties[name]
+
+    def setProperty(self, name, value):
+        self._properties[name] = value
+
+    def connect(self, topic, callback):
+        self._callbacks.setdefault(topic, []).append(callback)
+        return (topic, callback)
+
+    def disconnect(self, token):
+        topic, callback = token
+        self._callbacks.get(topic, []).remove(callback)
+
+    def _notify(self, topic, **kwargs):
+        for callback in self._callbacks.get(topic, ()):
+            callback(**kwargs)
+
+    # --- Commands ---
+
+    def say(self, text, name=None):
+        with self._lock:
+            self._queue.append(("say", text, name, None))
+
+    def save_to_file(self, text, filename, name=None):
+        with self._lock:
+            self._queue.append(("save", text, name, filename))
+
+    def isBusy(self):
+        return self._in_loop
+
+    def stop(self):
+        """Drop queued utterances and end the current one (callable from any thread)"""
+        with self._lock:
+            self._queue.clear()
+        self._stopped.set()
+
+    def runAndWait(self):
+        if self._in_loop:
+            raise RuntimeError("run loop already started")
+        self._in_loop = True
+        self._stopped.clear()
+        try:
+            while not self._stopped.is_set():
+                with self._lock:
+                    if not self._queue:
+                        break
+                    kind, text, name, filename = self._queue.pop(0)
+                if kind == "say":
+                    self._speak(text, name)
+                else:
+                    self._save(text, filename)
+        finally:
+            self._in_loop = False
+
+    def _speak(self, text, name):
+        self._notify("started-utterance", name=name)
+        wpm = float(os.environ.get("READALOUD_STUB_WPM", "0"))
+        interval = 60.0 / wpm if wpm > 0 else 0.0
+        started = time.perf_counter()
+        completed = True
+        for index, match in enumerate(_WORD_RE.finditer(text)):
+            if self._stopped.is_set():
+                completed = False
+                break
+            if interval:
+                # Absolute schedule so callback overhead does not slow the pace
+                delay = started + index * interval - time.perf_counter()
+                if delay > 0:
+                    self._stopped.wait(delay)
+            self._notify("started-word", name=name, location=match.start(), length=len(match.group()))
+        self._notify("finished-utterance", name=name, completed=completed)
+
+    def _save(self, text, filename):
+        wpm = float(os.environ.get("READALOUD_STUB_AUDIO_WPM", "0")) or float(self._properties["rate"])
+        words = max(len(text.split()), 1)
+        frames = int(words / wpm * 60 * SAMPLE_RATE)
+        with wave.open(filename, "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(SAMPLE_RATE)
+            whole, part = divmod(frames, SAMPLE_RATE)
+            for _ in range(whole):
+                out.writeframes(_TONE)
+            out.writeframes(_TONE[:part * 2])
+
+
+def init(driverName=None, debug=False):
+    return Engine()
@@ -3,17 +3,24 @@
 Quick script to check what TTS voices are installed on your system
 """
 
-import pyttsx3
+import os
+import sys
 
-def check_voices():
-    """List all available SAPI5 voices on the system"""
+from tts_core import VoiceCatalog
+
+def check_voices(refresh=False):
+    """List all available SAPI5 voices on the system
+
+    Reads the voice catalog shared with the app; the speech driver is only
+    started when there is no valid catalog or refresh is True (--refresh).
+    """
     try:
         print("\n" + "="*60)
         print("🎤 TTS VOICE CHECKER")
         print("="*60 + "\n")
         
-        engine = pyttsx3.init()
-        voices = engine.getProperty('voices')
+        catalog = VoiceCatalog(os.path.join(os.path.dirname(os.path.abspath(__file__)), "voice_catalog.json"))
+        voices = catalog.refresh() if refresh else catalog.voices()
         
         print(f"Found {len(voices)} voice(s) installed on your system:\n")
         
@@ -24,19 +31,17 @@ def check_voices():
             print(f"  Name:      {voice.name}")
             print(f"  ID:        {voice.id}")
             print(f"  Languages: {voice.languages if voice.languages else 'Not specified'}")
-            print(f"  Gender:    {voice.gender if hasattr(voice, 'gender') else 'Not specified'}")
-            print(f"  Age:       {voice.age if hasattr(voice, 'age') else 'Not specified'}")
+            print(f"  Gender:    {voice.gender if voice.gender else 'Not specified'}")
+            print(f"  Age:       {voice.age if voice.age else 'Not specified'}")
             print()
         
-        engine.stop()
-        
         print("="*60)
         print("\n💡 To add more voices:")
         print("   1. Open Windows Settings (Win + I)")
         print("   2. Go to: Time & Language → Speech")
         print("   3. Click 'Add voices'")
         print("   4. Download voices you want")
-        print("   5. Click 🔄 in the TTS app to refresh!")
+        print("   5. Click 🔄 in the TTS app (or run this script with --refresh)!")
         print("\n📖 See ADD_VOICES_GUIDE.md for detailed instructions")
         print("="*60 + "\n")
         
@@ -45,6 +50,6 @@ def check_voices():
         print("Make sure pyttsx3 is installed: pip install pyttsx3\n")
 
 if __name__ == "__main__":
-    check_voices()
+    check_voices(refresh="--refresh" in sys.argv[1:])
     input("Press Enter to exit...")
 
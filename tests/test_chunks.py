@@ -0,0 +1,31 @@
+from tts_core import iter_chunks
+
+
+def test_chunk_offsets_point_at_their_text_in_the_document():
+    text = "  First sentence.  Second one?\n\nA new paragraph!   Trailing words  "
+    chunks = list(iter_chunks(text))
+    assert [chunk.text for chunk in chunks] == ["First sentence.", "Second one?", "A new paragraph!",
+                                                "Trailing words"]
+    for chunk in chunks:
+        assert text[chunk.start:chunk.start + len(chunk.text)] == chunk.text
+
+
+def test_offset_is_the_document_position_of_the_first_character():
+    document = "Skipped part. Read from here. And on."
+    start = document.index("Read")
+    chunks = list(iter_chunks(document[start:], offset=start))
+    assert [chunk.start for chunk in chunks] == [start, document.index("And")]
+
+
+def test_long_sentences_split_at_the_last_space_that_fits():
+    text = "word " * 30 + "end."
+    chunks = list(iter_chunks(text, max_chars=23))
+    assert all(len(chunk.text) <= 23 for chunk in chunks)
+    assert " ".join(chunk.text for chunk in chunks) == text
+    for chunk in chunks:
+        assert text[chunk.start:chunk.start + len(chunk.text)] == chunk.text
+
+
+def test_splitting_is_lazy():
+    chunks = iter_chunks("One. Two. " * 1000000)
+    assert next(chunks).text == "One."
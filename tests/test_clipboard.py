@@ -0,0 +1,76 @@
+import hashlib
+import random
+import sys
+
+from tts_core import ClipboardDelta, ClipboardPoller, DuplicateIndex, _OTHER_SPACES
+
+
+def run_poller(poller, copies, until):
+    """Feed the poller reads on its own schedule; copies maps time (s) -> new clipboard text"""
+    now, text, acted = 0.0, "", []
+    pending = sorted(copies.items())
+    while now < until:
+        while pending and pending[0][0] <= now:
+            text = pending.pop(0)[1]
+        result = poller.observe(text, now)
+        if result is not None:
+            acted.append((now, result))
+        now += poller.interval / 1000
+    return acted
+
+
+def test_copy_after_idle_spell_is_acted_on_within_a_second():
+    poller = ClipboardPoller()
+    acted = run_poller(poller, {0.0: "start", 60.0: "copied after a minute"}, 62.0)
+    assert acted[-1][1] == "copied after a minute"
+    assert acted[-1][0] - 60.0 <= 1.0   # The old fixed 1 s poll was the bar to beat
+
+
+def test_burst_of_copies_acts_once_on_the_last():
+    acted = run_poller(ClipboardPoller(), {0.0: "a", 0.1: "b", 0.2: "c"}, 2.0)
+    assert [text for _, text in acted] == ["c"]
+
+
+def test_other_spaces_cover_every_whitespace_character():
+    spaces = {chr(i) for i in range(sys.maxunicode + 1) if chr(i).isspace()}
+    assert set(_OTHER_SPACES) | {" ", "\n"} == spaces
+
+
+def test_duplicate_key_ignores_whitespace_and_case_like_split_and_casefold():
+    rng = random.Random(22)
+    pieces = ["Word", "ß", "ÉCOLE", " ", "  ", "\n", "\n\n\n", "\t", "\r\n", "　", "\xa0"]
+    for _ in range(500):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 20)))
+        expected = " ".join(text.split()).casefold().encode("utf-8", "surrogatepass")
+        assert DuplicateIndex.key(text) == hashlib.sha256(expected).digest(), repr(text)
+
+
+LOG = "".join(f"[12:00:{i:02}] step {i} finished without errors\n" for i in range(20))
+
+
+def test_delta_of_a_grown_copy_is_the_appended_tail():
+    delta = ClipboardDelta()
+    assert delta.new_text(LOG) == LOG
+    assert delta.new_text(LOG + "[12:01:00] build done\n") == "[12:01:00] build done\n"
+
+
+def test_delta_finds_the_overlap_when_the_copy_scrolled():
+    delta = ClipboardDelta()
+    delta.new_text(LOG)
+    scrolled = LOG[len(LOG) // 2:] + "[12:01:00] build done\n"   # Start of the log no longer selected
+    assert delta.new_text(scrolled) == "[12:01:00] build done\n"
+
+
+def test_short_overlaps_and_unrelated_copies_are_used_whole():
+    delta = ClipboardDelta(min_overlap=80)
+    delta.new_text(LOG)
+    assert delta.new_text(LOG[-40:] + " more") == LOG[-40:] + " more"
+    assert delta.new_text("Something else entirely.") == "Something else entirely."
+
+
+def test_forget_undoes_the_last_copy():
+    delta = ClipboardDelta()
+    delta.new_text(LOG)
+    delta.new_text(LOG + "ignored tail\n")
+    delta.forget()
+    assert delta.new_text(LOG + "ignored tail\n") == "ignored tail\n"
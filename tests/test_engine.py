@@ -0,0 +1,94 @@
+import os
+
+from tts_core import AudioCache, CancelToken, EngineCommand, EngineService, TextChunk
+
+
+class FakeDriver:
+    def __init__(self):
+        self.stops = 0
+        self.saves = []
+
+    def stop(self):
+        self.stops += 1
+
+    def save_to_file(self, text, path):
+        self.saves.append(path)
+
+    def runAndWait(self):
+        for path in self.saves:
+            with open(path, "wb") as f:
+                f.write(b"\0" * 1000)
+        self.saves = []
+
+
+def engine_with_driver():
+    """An EngineService whose thread is never started, so commands stay pending"""
+    engine = EngineService()
+    engine.engine = FakeDriver()
+    return engine
+
+
+def test_stop_token_leaves_other_commands_queued(tmp_path):
+    engine = engine_with_driver()
+    token = CancelToken("speech")
+    export = engine.export("Saved for later.", str(tmp_path / "out.mp3"))
+    other = engine.speak("Another client.", token=CancelToken("speech"))
+    speech = engine.speak("Stop me.", token=token)
+    engine.stop(token)
+    assert speech.cancelled
+    assert not export.cancelled and not other.cancelled
+    assert engine._pending == [export, other]
+    assert engine.engine.stops == 0
+
+
+def test_stop_token_interrupts_only_its_own_active_command(tmp_path):
+    engine = engine_with_driver()
+    token = CancelToken("speech")
+    engine.active = engine.export("Saved for later.", str(tmp_path / "out.mp3"))
+    engine.stop(token)
+    assert not engine.active.cancelled
+    assert engine.engine.stops == 0
+
+    engine.active = engine.speak("Stop me.", token=token)
+    engine.stop(token)
+    assert engine.active.cancelled
+    assert engine.engine.stops == 1
+
+
+def test_stop_without_token_cancels_everything(tmp_path):
+    engine = engine_with_driver()
+    export = engine.export("Saved for later.", str(tmp_path / "out.mp3"))
+    speech = engine.speak("Stop me.", token=CancelToken("speech"))
+    engine.stop()
+    assert export.cancelled and speech.cancelled
+    assert engine._pending == []
+
+
+def test_render_keeps_batch_hits_in_a_cache_smaller_than_the_batch(tmp_path):
+    engine = engine_with_driver()
+    engine.cache = AudioCache(str(tmp_path / "cache"), max_bytes=2000)
+    engine._applied = {"voice": "default", "rate": 150, "volume": 1.0}
+    chunks = [TextChunk(i * 10, f"Sentence {i}.") for i in range(4)]
+    # Sentences 0 and 2 are cached; rendering 1 and 3 pushes the cache past its limit
+    list(engine._render_chunks(EngineCommand(EngineCommand.RENDER), chunks[0:1]))
+    list(engine._render_chunks(EngineCommand(EngineCommand.RENDER), chunks[2:3]))
+
+    for chunk, path in engine._render_chunks(EngineCommand(EngineCommand.RENDER), chunks):
+        assert os.path.exists(path), chunk.text
+    assert engine.cache.hits == 2
+    assert not engine.cache._pinned
+
+
+def test_render_without_cache_uses_one_scratch_file_per_chunk(tmp_path):
+    engine = engine_with_driver()
+    engine.render_batch = 2
+    saved = []
+    save = engine.engine.save_to_file
+    engine.engine.save_to_file = lambda text, path: (saved.append(text), save(text, path))
+    chunks = [TextChunk(i * 13, f"Sentence {i}.") for i in range(5)]
+    paths = []
+    for chunk, path in engine._render_chunks(EngineCommand(EngineCommand.RENDER), chunks):
+        assert os.path.exists(path)
+        paths.append(path)
+    assert saved == [chunk.text for chunk in chunks]
+    assert not any(os.path.exists(path) for path in paths)   # Scratch files are cleaned up
@@ -0,0 +1,58 @@
+import os
+import sys
+
+import pytest
+
+from tts_core import ExportJob
+
+STUB_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "stub")
+
+
+@pytest.fixture(autouse=True)
+def stub_driver(monkeypatch):
+    """Render with the benchmarks' stub pyttsx3, in this process and the worker processes"""
+    if "pyttsx3" in sys.modules and not getattr(sys.modules["pyttsx3"], "STUB", False):
+        pytest.skip("the real pyttsx3 is already imported")
+    monkeypatch.syspath_prepend(STUB_DIR)
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join([STUB_DIR] + sys.path))
+    monkeypatch.setenv("READALOUD_STUB_WPM", "0")
+
+
+class SmallSegments(ExportJob):
+    segment_chars = 200
+
+
+def export(text, path):
+    job = SmallSegments(text, str(path), jobs=2).start()
+    assert job.wait(60)
+    assert job.error is None
+    return job
+
+
+def paragraphs(count=30):
+    return [f"Paragraph {i} has a few sentences. It goes on a little. Then it ends." for i in range(count)]
+
+
+def test_reexport_reuses_unchanged_segments(tmp_path):
+    text = "\n\n".join(paragraphs())
+    first = export(text, tmp_path / "out.wav")
+    assert first.segments > 3 and first.reused == 0
+    assert os.path.exists(first.manifest_path)
+    audio = (tmp_path / "out.wav").read_bytes()
+
+    again = export(text, tmp_path / "out.wav")
+    assert again.reused == again.segments == first.segments
+    assert (tmp_path / "out.wav").read_bytes() == audio
+
+
+def test_reexport_after_an_edit_matches_a_fresh_export(tmp_path):
+    edited = paragraphs()
+    export("\n\n".join(edited), tmp_path / "out.wav")
+    edited[15] = "An edited paragraph, with quite a few more words than before. " + edited[15]
+    text = "\n\n".join(edited)
+
+    job = export(text, tmp_path / "out.wav")
+    assert 0 < job.reused < job.segments
+    export(text, tmp_path / "fresh.wav")
+    assert (tmp_path / "out.wav").read_bytes() == (tmp_path / "fresh.wav").read_bytes()
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".part")]
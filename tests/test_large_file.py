@@ -0,0 +1,55 @@
+import codecs
+
+import pytest
+
+from tts_core import LargeFile, detect_encoding, iter_chunks
+
+
+TEXT = "Première ligne, café.\r\nSecond line.\rThird line ends here.\n" * 300
+
+
+class SmallBlocks(LargeFile):
+    block_size = 97   # Odd size, so blocks split multi-byte characters and \r\n pairs
+
+
+@pytest.mark.parametrize("raw, expected", [
+    (codecs.BOM_UTF8 + "é".encode("utf-8"), "utf-8-sig"),
+    (codecs.BOM_UTF16_LE + "é".encode("utf-16-le"), "utf-16"),
+    ("plain café".encode("utf-8"), "utf-8"),
+    ("plain text here".encode("utf-16-le"), "utf-16-le"),
+    ("plain text here".encode("utf-16-be"), "utf-16-be"),
+    ("naïve “quotes”".encode("cp1252"), "cp1252"),
+])
+def test_detect_encoding(tmp_path, raw, expected):
+    path = tmp_path / "sample.txt"
+    path.write_bytes(raw)
+    assert detect_encoding(str(path)) == expected
+
+
+def test_utf8_cut_off_at_the_sample_edge_is_still_utf8(tmp_path):
+    path = tmp_path / "sample.txt"
+    path.write_bytes("é".encode("utf-8") * 10)
+    assert detect_encoding(str(path), sample_size=5) == "utf-8"
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "utf-8-sig", "utf-16", "cp1252"])
+def test_reads_match_the_translated_text_from_any_offset(tmp_path, encoding):
+    path = tmp_path / "big.txt"
+    path.write_bytes(TEXT.encode(encoding))
+    expected = TEXT.replace("\r\n", "\n").replace("\r", "\n")
+    large = SmallBlocks(str(path), encoding)
+    large.build_index()
+    assert large.char_count == len(expected)
+    assert len(large._chars) > 10
+    for start in (0, 1, 96, 97, 1000, len(expected) - 5):
+        assert large.read(start, 150) == expected[start:start + 150]
+    assert "".join(large.iter_text()) == expected
+
+
+def test_chunks_stream_with_the_offsets_of_the_whole_text(tmp_path):
+    path = tmp_path / "big.txt"
+    path.write_bytes(TEXT.encode("utf-8"))
+    expected = TEXT.replace("\r\n", "\n").replace("\r", "\n")
+    large = SmallBlocks(str(path), "utf-8")
+    large.build_index()
+    assert list(large.iter_chunks(500)) == list(iter_chunks(expected[500:], 500))
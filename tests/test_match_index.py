@@ -0,0 +1,61 @@
+import random
+import re
+
+from tts_core import MatchIndex
+
+
+class SmallBlocks(MatchIndex):
+    block_size = 4   # Several blocks even for short texts
+
+
+def built(pattern, text, cls=SmallBlocks):
+    index = cls(re.compile(pattern)).start(text)
+    assert index.done.wait(5)
+    return index
+
+
+def matches(index):
+    return [index[i] for i in range(len(index))]
+
+
+def edit(text, first, last, new_lines):
+    """Replace lines first..last (1-based) with new_lines; returns text and line delta"""
+    lines = text.split("\n")
+    lines[first - 1:last] = new_lines
+    return "\n".join(lines), len(new_lines) - (last - first + 1)
+
+
+def test_positions_use_tk_lines_and_columns():
+    index = built("cat", "a cat\ncat cat\n\nno")
+    assert matches(index) == [(1, 2, 1, 5), (2, 0, 2, 3), (2, 4, 2, 7)]
+
+
+def test_next_and_previous_from_the_cursor():
+    index = built("ab", "ab ab\nab\nxx ab")
+    assert index.next_after(1, 0) == 1     # A match at the cursor is not "after" it
+    assert index.next_after(2, 5) == 3
+    assert index.next_after(4, 0) == len(index)
+    assert index.prev_before(1, 0) == -1
+    assert index.prev_before(1, 3) == 0
+    assert index.prev_before(3, 9) == 3
+
+
+def test_patch_matches_a_full_rebuild_under_random_edits():
+    rng = random.Random(16)
+    words = ["cat", "dog", "cat dog", "", "concatenate", "c a t"]
+    text = "\n".join(rng.choice(words) for _ in range(60))
+    index = built("cat", text)
+    for _ in range(300):
+        line_count = text.count("\n") + 1
+        first = rng.randint(1, line_count)
+        last = rng.randint(first, min(first + 3, line_count))
+        new_lines = [rng.choice(words) for _ in range(rng.randint(0, 4))] or [""]
+        text, delta = edit(text, first, last, new_lines)
+        index.patch(first, last, delta, "\n".join(new_lines))
+        assert matches(index) == matches(built("cat", text))
+
+
+def test_in_lines_after_a_patch_shifts_later_matches():
+    index = built("x", "x\nx\nx\nx\nx\nx")
+    index.patch(2, 2, 2, "x\n\nx")
+    assert [m[0] for m in index.in_lines(4, 8)] == [4, 5, 6, 7, 8]
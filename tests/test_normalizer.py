@@ -0,0 +1,55 @@
+from tts_core import ABBREVIATION_EXPANSIONS, NUMBER_PREFIX_EXPANSIONS, Normalizer, iter_chunks
+
+
+def normalized(text, lexicon=None):
+    return Normalizer(lexicon).normalize(text)[0]
+
+
+def chunks(text):
+    return [chunk.text for chunk in iter_chunks(text)]
+
+
+def test_sentence_final_no_is_not_an_abbreviation():
+    assert normalized("I said no.") == "I said no."
+    assert chunks("I said no. Then I left.") == ["I said no.", "Then I left."]
+
+
+def test_all_caps_words_are_left_alone():
+    assert normalized("The answer is NO.") == "The answer is NO."
+    assert normalized("DR. WHO AND MR. X") == "DR. WHO AND MR. X"
+
+
+def test_street_is_not_read_as_saint():
+    assert normalized("Main St.") == "Main St."
+
+
+def test_numbered_abbreviations_need_a_number():
+    assert normalized("No. 5 and Fig. 3") == "Number 5 and Figure 3"
+    assert chunks("See No. 5 for details.") == ["See No. 5 for details."]
+
+
+def test_builtin_abbreviations_expand():
+    assert normalized("Dr. Smith, e.g. today") == "Doctor Smith, for example today"
+
+
+def test_lexicon_overrides_builtins_and_ignores_case():
+    assert normalized("St. Louis", {"st.": "Saint"}) == "Saint Louis"
+    assert normalized("Dr. Who", {"Dr.": "Drive"}) == "Drive Who"
+    assert normalized("GIF and gif", {"gif": "jif"}) == "jif and jif"
+
+
+def test_expanded_abbreviations_do_not_end_sentences():
+    # The splitter's tables and the normalizer's must agree, or "Dr." would be read
+    # in full but still cut the sentence in two
+    for word in ABBREVIATION_EXPANSIONS:
+        if word.endswith("."):
+            assert len(chunks(f"Ask {word} Smith now.")) == 1, word
+    for word in NUMBER_PREFIX_EXPANSIONS:
+        assert len(chunks(f"See {word} 5 now.")) == 1, word
+
+
+def test_long_digit_runs_are_grouped_from_the_right():
+    assert normalized("Call 1234567 now") == "Call 1 234 567 now"
+    assert normalized("ID 12345678") == "ID 12 345 678"
+    assert normalized("ID 123456789") == "ID 123 456 789"
+    assert normalized("Year 2024 and 123456") == "Year 2024 and 123456"   # Below group_digits
@@ -0,0 +1,87 @@
+from tts_core import QueueItem, QueueJournal, SpeechQueue
+
+
+def restored_queue(path, count=5, current=3, offset=1234):
+    """A queue and journal as left by a session interrupted mid-item"""
+    queue = SpeechQueue()
+    journal = QueueJournal(path)
+    journal.load(queue)
+    queue.extend(QueueItem(f"Item {i} text.", f"Item {i}") for i in range(count))
+    queue.current = current
+    journal.record_offset(offset)
+    journal.close()
+
+    queue = SpeechQueue()
+    journal = QueueJournal(path)
+    journal.load(queue)
+    assert (queue.current, journal.offset) == (current, offset)
+    return queue, journal
+
+
+def test_clear_resets_resume_position(tmp_path):
+    path = str(tmp_path / "queue_journal.jsonl")
+    queue, journal = restored_queue(path)
+    queue.clear()
+    queue.extend(QueueItem(f"New {i}.", f"New {i}") for i in range(6))
+    assert queue.current == -1
+    assert journal.offset == 0
+    journal.close()
+
+    # Play Queue after a restart starts from the top, not at New 3 offset 1234
+    queue = SpeechQueue()
+    journal = QueueJournal(path)
+    journal.load(queue)
+    assert len(queue) == 6
+    assert queue.current == -1
+    assert journal.offset == 0
+
+
+def test_removing_an_earlier_item_keeps_the_resume_item(tmp_path):
+    queue, journal = restored_queue(str(tmp_path / "queue_journal.jsonl"))
+    queue.remove_at(1)
+    assert queue.current == 2
+    assert queue.current_item().name == "Item 3"
+    assert journal.offset == 1234
+
+
+def test_removing_the_resume_item_resets_the_position(tmp_path):
+    path = str(tmp_path / "queue_journal.jsonl")
+    queue, journal = restored_queue(path)
+    queue.remove_at(3)
+    assert queue.current == -1
+    assert journal.offset == 0
+    journal.close()
+
+    queue = SpeechQueue()
+    journal = QueueJournal(path)
+    journal.load(queue)
+    assert [item.name for item in queue] == ["Item 0", "Item 1", "Item 2", "Item 4"]
+    assert (queue.current, journal.offset) == (-1, 0)
+
+
+def test_file_items_stream_their_text_and_resume_mid_file(tmp_path):
+    path = tmp_path / "chapter.txt"
+    path.write_text("Première phrase. Second sentence.\nThird sentence.", encoding="utf-8")
+    item = QueueItem.from_file(str(path), "chapter.txt")
+    assert item.text is None
+    assert [chunk.text for chunk in item.chunks()] == ["Première phrase.", "Second sentence.", "Third sentence."]
+    # Resuming inside the second sentence restarts at its beginning
+    assert [chunk.start for chunk in item.chunks(resume=20)] == [17, 34]
+
+    restored = QueueItem.from_record(item.to_record())
+    assert (restored.path, restored.size, restored.mtime, restored.encoding) == \
+        (item.path, item.size, item.mtime, "utf-8")
+
+
+def test_file_items_notice_edits_until_refreshed(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("Before the edit.", encoding="utf-8")
+    item = QueueItem.from_file(str(path), "notes.txt")
+    assert not item.is_stale()
+    path.write_text("After the edit, longer.", encoding="utf-8")
+    assert item.is_stale()
+    item.refresh()
+    assert not item.is_stale()
+    assert [chunk.text for chunk in item.chunks()] == ["After the edit, longer."]
+    path.unlink()
+    assert item.is_stale()
@@ -0,0 +1,54 @@
+import random
+import re
+
+import pytest
+
+from tts_core import ReplaceAllJob
+
+
+def replaced(content, pattern, replacement, literal=True, **limits):
+    job = ReplaceAllJob(content, re.compile(pattern), replacement, literal)
+    for name, value in limits.items():
+        setattr(job, name, value)
+    assert job.start().wait(5)
+    assert job.error is None
+    # Applied back to front, as the dialog does, so earlier offsets stay valid
+    for start, end, text in reversed(job.edits):
+        content = content[:start] + text + content[end:]
+    return job, content
+
+
+@pytest.mark.parametrize("merge_gap, span_chars", [(0, 65536), (256, 65536), (256, 20)])
+def test_edits_give_the_same_text_as_re_sub(merge_gap, span_chars):
+    rng = random.Random(15)
+    content = " ".join(rng.choice(["cat", "dog", "Cat", "\n", "category"]) for _ in range(2000))
+    job, result = replaced(content, "cat", "tiger", merge_gap=merge_gap, span_chars=span_chars)
+    assert result == re.sub("cat", "tiger", content)
+    assert job.count == content.count("cat")
+    assert all(end - start <= span_chars for start, end, _ in job.edits)
+
+
+def test_templates_expand_groups():
+    job, result = replaced("Smith, John\nDoe, Jane", r"(\w+), (\w+)", r"\2 \1", literal=False)
+    assert result == "John Smith\nJane Doe"
+
+
+def test_unchanged_matches_make_no_edits():
+    job, result = replaced("a cat and a cat", "cat", "cat")
+    assert job.count == 2
+    assert job.edits == [] and job.line_index is None
+
+
+def test_nearby_matches_merge_into_one_edit_with_tk_indices():
+    job, _ = replaced("x\nab ab\n" + " " * 300 + "ab", "ab", "AB")
+    assert [(start, end) for start, end, _ in job.edits] == [(2, 7), (308, 310)]
+    assert job.edits[0][2] == "AB AB"
+    assert job.line_index.index(2) == "2.0"
+    assert job.line_index.index(308) == "3.300"
+
+
+def test_cancelled_job_reports_no_edits():
+    job = ReplaceAllJob("cat " * 100000, re.compile("cat"), "dog")
+    job.cancel()
+    job.start().wait(5)
+    assert job.edits == []
@@ -0,0 +1,72 @@
+import http.client
+import json
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from tts_core import AudioCache
+from tts_server import BatchRenderer, SynthesisServer
+
+
+def cache_entry(cache, tmp_path, text, size=1000):
+    temp = tmp_path / f"{text}.tmp"
+    temp.write_bytes(b"\0" * size)
+    return cache.put(cache.key(text, None, 150, 1.0), str(temp))
+
+
+def test_cache_hits_stay_on_disk_until_the_request_releases_them(tmp_path):
+    cache = AudioCache(str(tmp_path / "cache"), max_bytes=1500)
+    cache_entry(cache, tmp_path, "hit")
+    renderer = BatchRenderer(None, 150, 1.0, jobs=1, cache=cache)
+    try:
+        pins = set()
+        path, temporary = renderer.render("hit", pins).result()
+        assert not temporary
+        cache_entry(cache, tmp_path, "another request")   # Past max_bytes: "hit" is the LRU entry
+        assert os.path.exists(path)
+        renderer.release(pins)
+        assert not pins and not cache._pinned
+        cache_entry(cache, tmp_path, "a third request")
+        assert not os.path.exists(path)
+    finally:
+        renderer.close()
+
+
+@pytest.fixture
+def server():
+    server = SynthesisServer(("127.0.0.1", 0), SimpleNamespace(batches=0), engine=None, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, method, path, headers=None, body=None):
+    connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+    try:
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        connection.close()
+
+
+@pytest.mark.parametrize("method, path, headers", [
+    ("POST", "/speak", {"Origin": "https://example.com", "Content-Type": "text/plain"}),
+    ("POST", "/synthesize", {"Origin": "null"}),
+    ("DELETE", "/speak", {"Origin": "http://evil.test:8765"}),
+    ("POST", "/speak", {"Host": "rebound.example.com:8765"}),
+])
+def test_requests_from_web_pages_are_refused(server, method, path, headers):
+    status, body = request(server, method, path, headers, body="Say this." if method == "POST" else None)
+    assert status == 403, body
+    assert server.counters["requests"] == 0
+
+
+def test_local_clients_and_local_pages_are_served(server):
+    assert request(server, "GET", "/metrics")[0] == 200
+    assert request(server, "GET", "/metrics", {"Origin": "http://localhost:3000"})[0] == 200
+    assert request(server, "GET", "/metrics", {"Host": "localhost:8765"})[0] == 200
@@ -0,0 +1,271 @@
+"""
+asyncio interface to the Read Aloud speech core.
+
+    from tts_async import AsyncReader
+
+    async with AsyncReader(voice="...", rate=180) as reader:
+        await reader.speak("Build finished.")
+        wav_bytes = await reader.synthesize("Saved for later.")
+        await reader.enqueue("Queued behind anything already playing.")
+
+        async for word in reader.words():
+            print(word.start, word.word)
+
+It drives the same Speaker/EngineService as the GUI, so the speech itself
+runs on the engine thread; callbacks from that thread are handed to the
+event loop with call_soon_threadsafe. Nothing here imports tkinter.
+
+Cancelling a task awaiting speak() or synthesize() cancels that speech only,
+and the await returns once the engine has actually stopped. enqueue() waits
+while the playback queue is full.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from collections import namedtuple
+
+from tts_core import EngineService, QueueItem, Speaker, iter_chunks
+
+
+# A spoken word: start/length are offsets into the text passed to speak()
+WordEvent = namedtuple("WordEvent", "start length word")
+
+
+class AsyncReader:
+    """Speech, synthesis and a playback queue as coroutines
+
+    Pass an existing EngineService (and optionally an AudioPlayer and
+    Normalizer) to share them with other clients; otherwise the reader
+    starts its own engine and shuts it down on close().
+    """
+
+    def __init__(self, engine=None, player=None, normalizer=None, cache=None, voice=None,
+                 rate=None, volume=None, max_queue=32, max_events=256, metrics=None):
+        self.owns_engine = engine is None
+        if engine is None:
+            engine = EngineService(cache, metrics=metrics)
+        self.engine = engine
+        self.speaker = Speaker(engine, player, normalizer)
+        self.settings = (voice, rate, volume)
+        self.max_queue = max_queue
+        self.max_events = max_events    # Word events buffered per words() iterator
+        self.dropped_words = 0          # Events discarded because an iterator fell behind
+        self.current = None             # QueueItem playing from the queue
+        self._current_command = None
+        self._commands = set()          # Speech/synthesis started by this reader and not finished
+        self._loop = None
+        self._queue = None
+        self._worker = None
+        self._subscribers = []
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self):
+        """Start the engine (if owned) and wait until it can speak"""
+        self._loop = asyncio.get_running_loop()
+        if self.owns_engine and not self.engine.thread.is_alive():
+            self.engine.start()
+        await self._loop.run_in_executor(None, self.engine.ready.wait)
+        if self.engine.engine is None:
+            raise RuntimeError(f"TTS engine unavailable: {self.engine.init_error}")
+        self.configure(*self.settings)
+        self._queue = asyncio.Queue(self.max_queue)
+        self._worker = self._loop.create_task(self._play_queue())
+        return self
+
+    async def close(self):
+        """Stop speech, end words() iterators and release the engine if owned"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self.stop()
+        for events in self._subscribers:
+            self._offer(events, None)
+        if self.owns_engine:
+            self.engine.shutdown()
+
+    def configure(self, voice=None, rate=None, volume=None):
+        """Change voice settings for speech started from now on"""
+        self.speaker.configure(voice, rate, volume)
+
+    # --- Speech ---
+
+    async def speak(self, text, on_word=None):
+        """Speak text; True once it finished, False if stop() or skip() cut it short
+
+        on_word(WordEvent) is called on the event loop for each word, in
+        addition to any words() iterators.
+        """
+        return await self._speak_chunks(iter_chunks(text), text, on_word)
+
+    async def synthesize(self, text):
+        """Render text to WAV and return the file's bytes"""
+        fd, path = tempfile.mkstemp(prefix="readaloud-", suffix=".wav")
+        os.close(fd)
+        try:
+            command = await self._run(lambda on_done: self.speaker.export(path, text, on_done=on_done))
+            if command.cancelled:
+                raise RuntimeError("Synthesis stopped before it finished")
+            return await self._loop.run_in_executor(None, _read_bytes, path)
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stop(self):
+        """Stop this reader's speech and synthesis and drop everything queued
+
+        Commands other clients submitted to a shared engine keep running.
+        """
+        self.clear_queue()
+        for command in list(self._commands):
+            self.speaker.cancel(command)
+
+    async def words(self):
+        """Async iterator of WordEvents for all speech until close()
+
+        Speech cannot wait for a slow reader, so an iterator more than
+        max_events behind loses its oldest events (counted in dropped_words).
+        """
+        events = asyncio.Queue(self.max_events)
+        self._subscribers.append(events)
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    return
+                yield event
+        finally:
+            self._subscribers.remove(events)
+
+    # --- Queue ---
+
+    @property
+    def queued(self):
+        """Items waiting behind the current one"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def enqueue(self, text, name=None):
+        """Queue text for playback, waiting while the queue is full"""
+        item = QueueItem(text, name or text[:40])
+        await self._queue.put(item)
+        return item
+
+    def enqueue_nowait(self, text, name=None):
+        """Queue text for playback; raises asyncio.QueueFull instead of waiting"""
+        item = QueueItem(text, name or text[:40])
+        self._queue.put_nowait(item)
+        return item
+
+    def clear_queue(self):
+        """Drop queued items (not the one playing); returns how many were dropped"""
+        dropped = 0
+        while self._queue is not None and not self._queue.empty():
+            self._queue.get_nowait()
+            self._queue.task_done()
+            dropped += 1
+        return dropped
+
+    def skip(self):
+        """End the current queue item and move on to the next"""
+        if self._current_command is not None:
+            self.speaker.cancel(self._current_command)
+
+    async def join(self):
+        """Wait until everything queued so far has been played"""
+        await self._queue.join()
+
+    async def _play_queue(self):
+        while True:
+            item = await self._queue.get()
+            self.current = item
+            try:
+                await self._speak_chunks(item.chunks(), item.text, None, queued=True)
+            except Exception as e:
+                print(f"Failed to speak queue item {item.name}: {e}", file=sys.stderr)
+            finally:
+                self.current = None
+                self._queue.task_done()
+
+    # --- Engine thread bridge ---
+
+    async def _speak_chunks(self, chunks, text, on_word, queued=False):
+        def word(location, length):
+            # Engine or player thread
+            event = WordEvent(location, length, text[location:location + length])
+            self._call_soon(self._publish, event, on_word)
+
+        def submit(on_done):
+            command = self.speaker.speak_chunks(chunks, on_word=word, on_done=on_done)
+            if queued:
+                self._current_command = command
+            return command
+
+        try:
+            command = await self._run(submit)
+        finally:
+            if queued:
+                self._current_command = None
+        return not command.cancelled
+
+    async def _run(self, submit):
+        """Await a command from submit(on_done); cancelling the task cancels the command
+
+        Raises the command's error if it failed. On cancellation, waits for
+        the engine to let go of the command before re-raising.
+        """
+        finished = self._loop.create_future()
+
+        def on_done(command):
+            self._call_soon(lambda: finished.done() or finished.set_result(command))
+
+        command = submit(on_done)
+        self._commands.add(command)
+        try:
+            await asyncio.shield(finished)
+        except asyncio.CancelledError:
+            self.speaker.cancel(command)
+            await finished
+            raise
+        finally:
+            self._commands.discard(command)
+        if command.error is not None and not command.cancelled:
+            raise command.error
+        return command
+
+    def _call_soon(self, callback, *args):
+        try:
+            self._loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            pass  # Event loop already closed
+
+    def _publish(self, event, on_word=None):
+        for events in self._subscribers:
+            self._offer(events, event)
+        if on_word is not None:
+            try:
+                on_word(event)
+            except Exception:
+                pass
+
+    def _offer(self, events, event):
+        if events.full():
+            events.get_nowait()
+            self.dropped_words += 1
+        events.put_nowait(event)
+
+
+def _read_bytes(path):
+    with open(path, "rb") as f:
+        return f.read()
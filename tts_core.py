@@ -0,0 +1,2706 @@
+"""
+Core speech services for Read Aloud.
+
+Everything in here is independent of tkinter so it can be shared by the GUI
+(TTSPython.py) and headless tools. Worker threads never touch widgets; they
+report back through plain callbacks and the GUI marshals those onto the Tk
+thread with root.after().
+"""
+
+import argparse
+import bisect
+import codecs
+import csv
+import hashlib
+import importlib.util
+import itertools
+import json
+import os
+import platform
+import queue
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+import zlib
+from collections import Counter, OrderedDict, deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout, as_completed
+
+def load_pyttsx3():
+    """Import pyttsx3 on first use
+
+    Importing pyttsx3 pulls in the platform speech driver bindings, which is
+    slow enough to delay the first window; callers that never speak should
+    not pay for it.
+    """
+    import pyttsx3
+    return pyttsx3
+
+
+def init_com():
+    """Initialize COM for the calling thread (Windows fix for Python 3.13)
+
+    Returns True if COM was initialized and must be released with uninit_com().
+    """
+    try:
+        import pythoncom
+        # Try CoInitialize first
+        pythoncom.CoInitialize()
+        return True
+    except Exception:
+        # If CoInitialize fails, try CoInitializeEx
+        try:
+            import pythoncom
+            pythoncom.CoInitializeEx(pythoncom.COINIT_MULTITHREADED)
+            return True
+        except Exception:
+            # If both fail, continue without COM initialization
+            return False
+
+
+def uninit_com():
+    """Release COM for the calling thread"""
+    try:
+        import pythoncom
+        pythoncom.CoUninitialize()
+    except Exception:
+        pass
+
+
+# --- Text chunking ---
+
+# A piece of text to speak, with its absolute offset in the source document.
+# offsets maps positions in a normalized text back to the source (None = same)
+TextChunk = namedtuple("TextChunk", "start text offsets", defaults=(None,))
+
+
+def word_span(chunk, location, length):
+    """Source document (offset, length) of a word reported at location in chunk.text"""
+    if chunk.offsets is None:
+        return chunk.start + location, length
+    start, end = chunk.offsets.span(location, location + length)
+    return chunk.start + start, end - start
+
+# Longest chunk handed to the engine in one say() call
+MAX_CHUNK_CHARS = 1000
+
+# Words that end with a period without ending the sentence (lowercase, no period)
+NO_BREAK_ABBREVIATIONS = frozenset("""
+    mr mrs ms dr prof sr jr st mt ft vs etc eg ie al approx dept est inc
+    ltd co corp jan feb mar apr jun jul aug sep sept oct nov dec
+    pp pg ed eds rev gen col lt sgt capt cmdr gov sen rep
+""".split())
+
+# Abbreviations that are also ordinary words ("I said no."); they only
+# continue the sentence when a number follows, as in "No. 5" or "Fig. 3"
+NO_BREAK_BEFORE_NUMBER = frozenset("no vol ch fig".split())
+
+# Sentence-ending punctuation (plus closing quotes/brackets) followed by
+# whitespace, or a blank line between paragraphs
+_BOUNDARY_RE = re.compile(r'[.!?\u2026]+[\'")\]\u2019\u201d]*(?=\s)|\n[ \t]*\n')
+_LAST_WORD_RE = re.compile(r'([\w.]+)$')
+_WORD_RE = re.compile(r'\S+')
+
+
+def _is_abbreviation(text, period_pos):
+    """True if the period at period_pos ends an abbreviation or an initial"""
+    m = _LAST_WORD_RE.search(text, max(0, period_pos - 32), period_pos)
+    if not m:
+        return False
+    word = m.group(1)
+    if len(word) == 1 and word.isalpha():
+        return True  # Initials like "J. R. R. Tolkien"
+    if "." in word:
+        return True  # Dotted forms like "e.g" or "U.S"
+    if word.lower() in NO_BREAK_BEFORE_NUMBER:
+        return re.match(r"\s*\d", text[period_pos + 1:period_pos + 8]) is not None
+    return word.lower() in NO_BREAK_ABBREVIATIONS
+
+
+def iter_chunks(text, offset=0, max_chars=MAX_CHUNK_CHARS):
+    """Lazily split text into sentence/paragraph chunks
+
+    Yields TextChunk(start, text) where start is the chunk's offset in the
+    document (offset is the document position of text[0]). Chunks are
+    stripped of surrounding whitespace, and sentences longer than max_chars
+    are split at the last space that fits. Splitting is lazy, so the first
+    chunk of a huge document is available immediately.
+    """
+    start = 0
+    for m in _BOUNDARY_RE.finditer(text):
+        punct = m.group()
+        if punct == "." and _is_abbreviation(text, m.start()):
+            continue
+        yield from _emit_chunks(text, start, m.end(), offset, max_chars)
+        start = m.end()
+    yield from _emit_chunks(text, start, len(text), offset, max_chars)
+
+
+def _emit_chunks(text, start, end, offset, max_chars):
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    while end - start > max_chars:
+        cut = start + max_chars
+        space = text.rfind(" ", start + 1, cut)
+        if space > start:
+            cut = space
+        yield TextChunk(offset + start, text[start:cut])
+        start = cut
+        while start < end and text[start].isspace():
+            start += 1
+    if end > start:
+        yield TextChunk(offset + start, text[start:end])
+
+
+# --- Text normalization ---
+
+# What the normalizer reads abbreviations as (the tables above only decide
+# where sentences end). Matched case-sensitively so "NO" or "no." in prose
+# is left alone; user lexicon entries override these. Ambiguous ones like
+# "St." (Saint or Street) are left to the lexicon.
+ABBREVIATION_EXPANSIONS = {
+    "e.g.": "for example", "i.e.": "that is", "etc.": "et cetera", "vs.": "versus",
+    "approx.": "approximately", "Dr.": "Doctor", "Mr.": "Mister", "Mrs.": "Missus",
+    "w/": "with", "w/o": "without",
+}
+
+# Expansions used only when a number follows ("No. 5", "Fig. 3")
+NUMBER_PREFIX_EXPANSIONS = {"No.": "Number", "Fig.": "Figure"}
+
+
+def _trie_pattern(words):
+    """Regex matching any of words, built as a trie so shared prefixes are tried once"""
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class OffsetMap:
+    """Maps positions in normalized text back to the text it came from
+
+    The normalized text is a sequence of segments, each either copied from
+    the source unchanged or replacing a source range; positions inside a
+    replacement map to the whole source range.
+    """
+    __slots__ = ("norm_starts", "src_starts", "src_lengths", "copied")
+
+    def __init__(self):
+        self.norm_starts = []
+        self.src_starts = []
+        self.src_lengths = []
+        self.copied = []
+
+    def add(self, norm_start, src_start, src_length, copied):
+        self.norm_starts.append(norm_start)
+        self.src_starts.append(src_start)
+        self.src_lengths.append(src_length)
+        self.copied.append(copied)
+
+    def span(self, start, end):
+        """Source (start, end) for normalized [start, end)"""
+        i = max(bisect.bisect_right(self.norm_starts, start) - 1, 0)
+        src_start = self.src_starts[i] + (start - self.norm_starts[i] if self.copied[i] else 0)
+        j = max(bisect.bisect_left(self.norm_starts, end) - 1, 0)
+        if self.copied[j]:
+            src_end = self.src_starts[j] + min(end - self.norm_starts[j], self.src_lengths[j])
+        else:
+            src_end = self.src_starts[j] + self.src_lengths[j]
+        return src_start, max(src_end, src_start)
+
+
+class Normalizer:
+    """Rewrites text before synthesis so the engine reads it quickly and naturally
+
+    One compiled regex handles every rule in a single pass: URLs are read as
+    their domain, lexicon entries and ABBREVIATION_EXPANSIONS are replaced by
+    their pronunciation, digit runs of group_digits or more are read in
+    groups of three counted from the right, as in 1 234 567, and runs of markup/code symbols are dropped.
+    normalize_chunks() streams chunk by chunk, and results are memoized by a
+    digest of each chunk's text, so re-speaking an edited document only
+    re-normalizes the sentences that changed.
+    """
+
+    memo_size = 4096
+
+    def __init__(self, lexicon=None, expand_urls=True, group_digits=7, strip_symbols=True):
+        self.lexicon = {word.lower(): spoken for word, spoken in (lexicon or {}).items() if word}
+        self.abbreviations = {word: spoken
+                              for word, spoken in {**ABBREVIATION_EXPANSIONS, **NUMBER_PREFIX_EXPANSIONS}.items()
+                              if word.lower() not in self.lexicon}
+        plain = [word for word in ABBREVIATION_EXPANSIONS if word in self.abbreviations]
+        numbered = [word for word in NUMBER_PREFIX_EXPANSIONS if word in self.abbreviations]
+        rules = []
+        if expand_urls:
+            rules.append(r"(?P<url>\b(?:https?://|www\.)[^\s<>\"']+)")
+        if self.lexicon:
+            rules.append(rf"(?P<lex>(?<!\w){_trie_pattern(self.lexicon)}(?!\w))")
+        abbreviations = []
+        if plain:
+            abbreviations.append(rf"{_trie_pattern(plain)}(?!\w)")
+        if numbered:
+            abbreviations.append(rf"{_trie_pattern(numbered)}(?=\s*\d)")
+        if abbreviations:
+            # Case-sensitive inside the otherwise case-insensitive pattern
+            rules.append(rf"(?P<abbr>(?<!\w)(?-i:{'|'.join(abbreviations)}))")
+        if group_digits:
+            rules.append(rf"(?P<num>(?<![\d.,])\d{{{group_digits},}}(?![\d.,]\d))")
+        if strip_symbols:
+            rules.append(r"(?P<sym>[{}<>|\\^`*#~_=]+|-{3,})")
+        self.pattern = re.compile("|".join(rules), re.IGNORECASE) if rules else None
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _replacement(self, match):
+        kind = match.lastgroup
+        text = match.group()
+        if kind == "url":
+            host = re.sub(r"^(?:https?://)?(?:www\.)?", "", text, flags=re.IGNORECASE)
+            host = re.split(r"[/?#:]", host, maxsplit=1)[0].rstrip(".")
+            return "link to " + host.replace(".", " dot ")
+        if kind == "lex":
+            return self.lexicon[text.lower()]
+        if kind == "abbr":
+            return self.abbreviations[text]
+        if kind == "num":
+            # Group like thousands, so the short group comes first
+            head = len(text) % 3 or 3
+            return " ".join([text[:head]] + [text[i:i + 3] for i in range(head, len(text), 3)])
+        return " "
+
+    def normalize(self, text):
+        """Return (normalized text, OffsetMap or None if unchanged)"""
+        if self.pattern is None:
+            return text, None
+        key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+        pieces = []
+        offsets = OffsetMap()
+        norm_pos = 0
+        src_pos = 0
+        for match in self.pattern.finditer(text):
+            start, end = match.span()
+            if start > src_pos:
+                offsets.add(norm_pos, src_pos, start - src_pos, True)
+                pieces.append(text[src_pos:start])
+                norm_pos += start - src_pos
+            spoken = self._replacement(match)
+            offsets.add(norm_pos, start, end - start, False)
+            pieces.append(spoken)
+            norm_pos += len(spoken)
+            src_pos = end
+        if not pieces:
+            result = (text, None)
+        else:
+            if src_pos < len(text):
+                offsets.add(norm_pos, src_pos, len(text) - src_pos, True)
+                pieces.append(text[src_pos:])
+            result = ("".join(pieces), offsets)
+        with self._lock:
+            self._memo[key] = result
+            if len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return result
+
+    def normalize_chunks(self, chunks):
+        """Normalize a stream of TextChunk lazily, keeping source offsets"""
+        for chunk in chunks:
+            text, offsets = self.normalize(chunk.text)
+            if text.strip():
+                yield TextChunk(chunk.start, text, offsets)
+
+
+# --- Text files ---
+
+def detect_encoding(path, sample_size=65536):
+    """Guess a text file's encoding from a prefix sample
+
+    Checks for a byte order mark, then for BOM-less UTF-16 (mostly-ASCII
+    UTF-16 is also valid UTF-8, NULs and all), then whether the sample is
+    valid UTF-8, and finally falls back to cp1252/latin-1, which always
+    decode.
+    """
+    with open(path, "rb") as f:
+        sample = f.read(sample_size)
+    for bom, name in ((codecs.BOM_UTF32_LE, "utf-32"), (codecs.BOM_UTF32_BE, "utf-32"),
+                      (codecs.BOM_UTF8, "utf-8-sig"),
+                      (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16")):
+        if sample.startswith(bom):
+            return name
+    if len(sample) >= 2 and sample.count(b"\x00") > len(sample) // 4:
+        odd_nuls = sample[1::2].count(b"\x00")
+        return "utf-16-le" if odd_nuls > len(sample) // 4 else "utf-16-be"
+    try:
+        # A multi-byte character may be cut off at the end of the sample
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=len(sample) < sample_size)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+    try:
+        sample.decode("cp1252")
+        return "cp1252"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def _stream_codec(path, encoding):
+    """Return (codec, bom_length) for decoding a file from arbitrary offsets"""
+    if encoding not in ("utf-8-sig", "utf-16", "utf-32"):
+        return encoding, 0
+    with open(path, "rb") as f:
+        head = f.read(4)
+    if encoding == "utf-8-sig":
+        return "utf-8", len(codecs.BOM_UTF8) if head.startswith(codecs.BOM_UTF8) else 0
+    if encoding == "utf-32":
+        return ("utf-32-le" if head.startswith(codecs.BOM_UTF32_LE) else "utf-32-be"), 4
+    return ("utf-16-le" if head.startswith(codecs.BOM_UTF16_LE) else "utf-16-be"), 2
+
+
+class LargeFile:
+    """Read-only random access to the text of a file too big for the editor
+
+    build_index() (run on a background thread) decodes the file once and
+    records a (char offset, byte offset) checkpoint per block, so any window
+    of text can be read by seeking to the nearest checkpoint instead of
+    decoding from the start. Offsets count characters after newline
+    translation, matching what the Text widget shows.
+    """
+
+    block_size = 1 << 20
+
+    def __init__(self, path, encoding):
+        self.path = path
+        self.encoding = encoding
+        self.size = os.path.getsize(path)
+        self.codec, bom = _stream_codec(path, encoding)
+        self.char_count = None      # Known once build_index() finishes
+        self.cancelled = False
+        self._chars = [0]           # Checkpoints: translated char offsets...
+        self._bytes = [bom]         # ...and the byte offsets they start at
+        self._cr_bytes = len("\r".encode(self.codec))
+
+    def build_index(self, on_progress=None):
+        chars = 0
+        for char_pos, byte_pos, text in self._decode(self._bytes[0]):
+            if self.cancelled:
+                return
+            chars = char_pos + len(text)
+            if byte_pos is not None and byte_pos > self._bytes[-1]:
+                self._chars.append(chars)
+                self._bytes.append(byte_pos)
+                if on_progress is not None:
+                    on_progress(byte_pos / max(self.size, 1))
+        self.char_count = chars
+
+    def _decode(self, byte_pos, char_pos=0):
+        """Yield (char offset, byte offset after block or None, text) per block
+
+        The byte offset is where decoding can restart with a fresh decoder
+        to produce the text that follows; it is None for the final block.
+        """
+        decoder = codecs.getincrementaldecoder(self.codec)(errors="replace")
+        with open(self.path, "rb") as f:
+            f.seek(byte_pos)
+            carry = ""
+            while True:
+                block = f.read(self.block_size)
+                final = not block
+                text = carry + decoder.decode(block, final)
+                byte_pos += len(block)
+                carry = ""
+                if not final and text.endswith("\r"):
+                    carry = "\r"   # Might be the first half of a \r\n pair
+                    text = text[:-1]
+                text = text.replace("\r\n", "\n").replace("\r", "\n")
+                restart = None
+                if not final:
+                    restart = byte_pos - len(decoder.getstate()[0]) - len(carry) * self._cr_bytes
+                yield char_pos, restart, text
+                char_pos += len(text)
+                if final:
+                    return
+
+    def iter_text(self, start=0):
+        """Yield the text from char offset start onwards in blocks"""
+        i = bisect.bisect_right(self._chars, start) - 1
+        skip = start - self._chars[i]
+        for _, _, text in self._decode(self._bytes[i], self._chars[i]):
+            if skip >= len(text):
+                skip -= len(text)
+                continue
+            if text[skip:]:
+                yield text[skip:]
+            skip = 0
+
+    def read(self, start, count):
+        """Return up to count characters starting at char offset start"""
+        pieces = []
+        for text in self.iter_text(start):
+            pieces.append(text[:count])
+            count -= len(pieces[-1])
+            if count <= 0:
+                break
+        return "".join(pieces)
+
+    def iter_chunks(self, start=0):
+        """Sentence chunks with absolute offsets, streamed from disk"""
+        carry = ""
+        carry_start = start
+        for block in self.iter_text(start):
+            text = carry + block
+            pending = None
+            for chunk in iter_chunks(text, carry_start):
+                if pending is not None:
+                    yield pending
+                pending = chunk
+            # Hold back the last chunk; the sentence may continue in the next block
+            if pending is None:
+                carry = ""
+                carry_start += len(text)
+            else:
+                carry = text[pending.start - carry_start:]
+                carry_start = pending.start
+        yield from iter_chunks(carry, carry_start)
+
+
+class LineIndex:
+    """Maps document offsets to Tk "line.column" indices
+
+    Line start offsets are collected once; each lookup is a bisect instead of
+    Tk walking the document for a "1.0 + N chars" index.
+    """
+
+    def __init__(self, text, base=0):
+        self.base = base    # Document offset of text[0]
+        self.starts = [0]
+        find = text.find
+        pos = find("\n")
+        while pos != -1:
+            self.starts.append(pos + 1)
+            pos = find("\n", pos + 1)
+
+    def index(self, offset):
+        offset -= self.base
+        line = bisect.bisect_right(self.starts, offset) - 1
+        return f"{line + 1}.{offset - self.starts[line]}"
+
+
+class ReplaceAllJob:
+    """Runs a Replace All on a worker thread and builds the minimal set of edits
+
+    Matches are found in one regex pass. edits lists (start, end, new text)
+    for the changed ranges in document order: matches whose replacement is
+    identical are dropped, and matches closer than merge_gap characters are
+    merged into one span (of at most span_chars) so a dense replace needs
+    few widget edits. line_index maps the original offsets to Tk indices.
+    """
+
+    merge_gap = 256
+    span_chars = 65536
+
+    def __init__(self, content, pattern, replacement, literal=True, on_done=None):
+        self.content = content
+        self.pattern = pattern          # Compiled regex
+        self.replacement = replacement  # Literal text, or a template when literal is False
+        self.literal = literal
+        self.on_done = on_done
+        self.count = 0
+        self.edits = []
+        self.line_index = None
+        self.error = None
+        self.cancelled = False
+        self.done = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, name="tts-replace", daemon=True).start()
+        return self
+
+    def cancel(self):
+        self.cancelled = True
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+    def _run(self):
+        try:
+            content = self.content
+            edits = []
+            span = None     # [start, end, pieces] of the span being merged
+            for match in self.pattern.finditer(content):
+                if self.cancelled:
+                    return
+                self.count += 1
+                text = self.replacement if self.literal else match.expand(self.replacement)
+                start, end = match.span()
+                if text == match.group():
+                    continue
+                if span is not None and start - span[1] <= self.merge_gap and end - span[0] <= self.span_chars:
+                    span[2].append(content[span[1]:start])
+                    span[2].append(text)
+                    span[1] = end
+                else:
+                    if span is not None:
+                        edits.append((span[0], span[1], "".join(span[2])))
+                    span = [start, end, [text]]
+            if span is not None:
+                edits.append((span[0], span[1], "".join(span[2])))
+            if edits and not self.cancelled:
+                self.line_index = LineIndex(content)
+            self.edits = edits
+        except Exception as e:
+            self.error = e
+        finally:
+            self.content = None
+            self.done.set()
+            if self.on_done is not None:
+                self.on_done(self)
+
+
+class MatchIndex:
+    """Sorted positions of every match of a pattern, kept up to date under edits
+
+    Matches are (line, col, end_line, end_col) tuples using Tk's 1-based
+    lines, so next/previous lookups are a bisect from any "line.col" index.
+    start() builds the index on a worker thread, counting matches as it
+    goes; once complete, patch() re-scans just the lines an edit touched.
+    Matches are stored in blocks with a per-block line shift, so an edit
+    that adds or removes lines adjusts one number per later block instead
+    of every later match. Empty matches are skipped, and a match spanning
+    lines is only re-found if it lies within the edited lines.
+    """
+
+    block_size = 1024
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.count = 0              # Live while building
+        self.complete = False
+        self.cancelled = False
+        self.done = threading.Event()
+        self._blocks = []           # Runs of matches; lines are relative to _shift
+        self._shift = []            # Line offset to add to each block's matches
+        self._firsts = []           # First match of each block, shift applied
+        self._ends = []             # Cumulative match count at the end of each block
+
+    def start(self, text, on_progress=None, on_done=None):
+        threading.Thread(target=self._build, args=(text, on_progress, on_done),
+                         name="tts-find", daemon=True).start()
+        return self
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _build(self, text, on_progress, on_done):
+        try:
+            matches = []
+            last_report = time.monotonic()
+            for match in self._scan(text, 1):
+                if self.cancelled:
+                    return
+                matches.append(match)
+                self.count += 1
+                if on_progress is not None and self.count % 1024 == 0:
+                    now = time.monotonic()
+                    if now - last_report >= 0.1:
+                        last_report = now
+                        on_progress(self)
+            self._blocks = [matches[i:i + self.block_size]
+                            for i in range(0, len(matches), self.block_size)]
+            self._shift = [0] * len(self._blocks)
+            self._reindex()
+            self.complete = True
+        finally:
+            self.done.set()
+            if on_done is not None:
+                on_done(self)
+
+    def _scan(self, text, line):
+        """Yield match positions in text, whose first line is line"""
+        pos = 0
+        line_start = 0
+        for match in self.pattern.finditer(text):
+            start, end = match.span()
+            if start == end:
+                continue
+            newlines = text.count("\n", pos, start)
+            if newlines:
+                line += newlines
+                line_start = text.rfind("\n", pos, start) + 1
+            pos = start
+            end_line, end_start = line, line_start
+            newlines = text.count("\n", start, end)
+            if newlines:
+                end_line += newlines
+                end_start = text.rfind("\n", start, end) + 1
+            yield (line, start - line_start, end_line, end - end_start)
+
+    def _reindex(self):
+        self._firsts = [_shifted(block[0], shift) for block, shift in zip(self._blocks, self._shift)]
+        self._ends = list(itertools.accumulate(len(block) for block in self._blocks))
+        self.count = self._ends[-1] if self._ends else 0
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        j = bisect.bisect_right(self._ends, i)
+        return _shifted(self._blocks[j][i - (self._ends[j - 1] if j else 0)], self._shift[j])
+
+    def _position(self, key, bisect_func):
+        """Global position of key in the sorted matches"""
+        j = bisect.bisect_right(self._firsts, key) - 1
+        if j < 0:
+            return 0
+        local = (key[0] - self._shift[j],) + key[1:]
+        return (self._ends[j - 1] if j else 0) + bisect_func(self._blocks[j], local)
+
+    def patch(self, first, last, line_delta, text):
+        """Update the index after lines first..last were replaced
+
+        text is the new content of lines first..last + line_delta.
+        """
+        lo = self._position((first,), bisect.bisect_left)
+        hi = self._position((last + 1,), bisect.bisect_left)
+        found = list(self._scan(text, first))
+        # Rebuild only the blocks holding lo..hi; later blocks just shift
+        j0 = min(bisect.bisect_right(self._ends, lo), max(len(self._blocks) - 1, 0))
+        j1 = min(max(j0 + 1, bisect.bisect_left(self._ends, hi) + 1), len(self._blocks))
+        base = self._ends[j0 - 1] if j0 else 0
+        merged = [_shifted(match, self._shift[j]) for j in range(j0, j1) for match in self._blocks[j]]
+        merged[lo - base:] = found + [_shifted(match, line_delta) for match in merged[hi - base:]]
+        blocks = [merged[i:i + self.block_size] for i in range(0, len(merged), self.block_size)]
+        self._blocks[j0:j1] = blocks
+        self._shift[j0:j1] = [0] * len(blocks)
+        if line_delta:
+            for j in range(j0 + len(blocks), len(self._shift)):
+                self._shift[j] += line_delta
+        self._reindex()
+
+    def next_after(self, line, col):
+        """Position of the first match starting after line.col (may be len)"""
+        return self._position((line, col, float("inf")), bisect.bisect_right)
+
+    def prev_before(self, line, col):
+        """Position of the last match starting before line.col (may be -1)"""
+        return self._position((line, col), bisect.bisect_left) - 1
+
+    def in_lines(self, first, last):
+        """Matches starting on lines first..last"""
+        lo = self._position((first,), bisect.bisect_left)
+        hi = self._position((last + 1,), bisect.bisect_left)
+        return [self[i] for i in range(lo, hi)]
+
+
+def _shifted(match, lines):
+    if not lines:
+        return match
+    line, col, end_line, end_col = match
+    return (line + lines, col, end_line + lines, end_col)
+
+
+# --- Speech queue ---
+
+class QueueItem:
+    """One entry in the speech queue
+
+    Text items hold their text. File items hold only the path plus the size,
+    mtime and encoding seen when they were queued (text is None); the text is
+    streamed from disk in chunks when the item plays.
+    """
+    __slots__ = ("text", "name", "path", "size", "mtime", "encoding")
+
+    def __init__(self, text, name, path=None, size=None, mtime=None, encoding=None):
+        self.text = text
+        self.name = name
+        self.path = path
+        self.size = size
+        self.mtime = mtime
+        self.encoding = encoding
+
+    @classmethod
+    def from_file(cls, path, name):
+        item = cls(None, name, path)
+        item.refresh()
+        return item
+
+    def refresh(self):
+        """Re-read the file's size, mtime and encoding (raises OSError if it is gone)"""
+        st = os.stat(self.path)
+        self.encoding = detect_encoding(self.path)
+        self.size = st.st_size
+        self.mtime = st.st_mtime_ns
+
+    def is_stale(self):
+        """True if the file was changed or removed since it was queued"""
+        if self.path is None:
+            return False
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return True
+        return st.st_size != self.size or st.st_mtime_ns != self.mtime
+
+    def chunks(self, resume=0):
+        """Sentence chunks of the item's text, read lazily for file items
+
+        With resume > 0, chunks that end before that offset are skipped, so
+        playback restarts at the sentence containing it.
+        """
+        if self.path is None:
+            chunks = iter_chunks(self.text)
+        else:
+            chunks = LargeFile(self.path, self.encoding).iter_chunks()
+        if resume > 0:
+            chunks = itertools.dropwhile(lambda c: c.start + len(c.text) <= resume, chunks)
+        return chunks
+
+    def to_record(self):
+        if self.path is None:
+            return {"text": self.text, "name": self.name}
+        return {"name": self.name, "path": self.path, "size": self.size,
+                "mtime": self.mtime, "encoding": self.encoding}
+
+    @classmethod
+    def from_record(cls, record):
+        return cls(record.get("text"), record["name"], record.get("path"), record.get("size"),
+                   record.get("mtime"), record.get("encoding"))
+
+
+class SpeechQueue:
+    """Ordered queue of QueueItems that reports each change to its listeners
+
+    Listeners are called as listener(event, *args) right after the change:
+        ("insert", index, count)  count items were inserted at index
+        ("remove", index, count)  count items starting at index were removed
+        ("current", old, new)     the playing position moved from old to new
+    current is the index of the item being played, or -1 when idle. It may
+    run one past the end while the queue advances.
+    """
+
+    def __init__(self):
+        self._items = deque()
+        self._current = -1
+        self.listeners = []
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __getitem__(self, index):
+        return self._items[index]
+
+    def _emit(self, event, *args):
+        for listener in self.listeners:
+            listener(event, *args)
+
+    @property
+    def current(self):
+        return self._current
+
+    @current.setter
+    def current(self, index):
+        old = self._current
+        if index != old:
+            self._current = index
+            self._emit("current", old, index)
+
+    def current_item(self):
+        """Return the item being played, or None"""
+        if 0 <= self._current < len(self._items):
+            return self._items[self._current]
+        return None
+
+    def append(self, item):
+        self._items.append(item)
+        self._emit("insert", len(self._items) - 1, 1)
+
+    def extend(self, items):
+        start = len(self._items)
+        self._items.extend(items)
+        if len(self._items) > start:
+            self._emit("insert", start, len(self._items) - start)
+
+    def popleft(self):
+        item = self._items.popleft()
+        if self._current >= 0:
+            self._current -= 1
+        self._emit("remove", 0, 1)
+        return item
+
+    def pop(self):
+        item = self._items.pop()
+        self._emit("remove", len(self._items), 1)
+        return item
+
+    def remove_at(self, index):
+        """Remove and return the item at index, keeping current on the same item
+
+        Removing the current item itself resets current to -1, so playback
+        does not resume a different item at the removed one's offset.
+        """
+        item = self._items[index]
+        del self._items[index]
+        if index < self._current:
+            self._current -= 1
+        self._emit("remove", index, 1)
+        if index == self._current:
+            self.current = -1
+        return item
+
+    def clear(self):
+        count = len(self._items)
+        self._items.clear()
+        if count:
+            self._emit("remove", 0, count)
+        self.current = -1
+
+
+class QueueJournal:
+    """Append-only log of speech queue changes, replayed on the next start
+
+    Attached as a SpeechQueue listener, it writes one JSON line per change
+    plus the offset reached in the playing item, flushing each line so a
+    crash loses at most the last write (a torn final line is ignored on
+    replay). Every compact_every records the log is rewritten as a single
+    snapshot.
+    """
+
+    compact_every = 500
+
+    def __init__(self, path):
+        self.path = path
+        self.queue = None
+        self.offset = 0     # Character offset reached in the current item
+        self._file = None
+        self._records = 0
+
+    def load(self, queue):
+        """Replay the journal into an empty queue and start recording its changes
+
+        If playback was interrupted, queue.current is set to the item that was
+        playing and self.offset to how far into it playback got.
+        """
+        items, current, offset = [], -1, 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # Torn write from a crash; everything before it is good
+                    op = record.get("op")
+                    if op == "snapshot":
+                        items = [QueueItem.from_record(r) for r in record["items"]]
+                        current, offset = record["current"], record["offset"]
+                    elif op == "insert":
+                        index = record["index"]
+                        items[index:index] = [QueueItem.from_record(r) for r in record["items"]]
+                    elif op == "remove":
+                        index, count = record["index"], record["count"]
+                        del items[index:index + count]
+                        current = record["current"]
+                    elif op == "current":
+                        current, offset = record["index"], 0
+                    elif op == "offset":
+                        offset = record["value"]
+        except FileNotFoundError:
+            pass
+        except (OSError, KeyError, TypeError) as e:
+            print(f"Error reading queue journal: {e}")
+        queue.extend(items)
+        if 0 <= current < len(items):
+            queue.current = current
+            self.offset = offset
+        self.queue = queue
+        self.compact()
+        queue.listeners.append(self._on_queue_changed)
+
+    def _on_queue_changed(self, event, *args):
+        if event == "insert":
+            index, count = args
+            items = [self.queue[i].to_record() for i in range(index, index + count)]
+            self._write({"op": "insert", "index": index, "items": items})
+        elif event == "remove":
+            index, count = args
+            # Removals can shift the playing position without a "current" event
+            self._write({"op": "remove", "index": index, "count": count,
+                         "current": self.queue.current})
+        elif event == "current":
+            self.offset = 0
+            self._write({"op": "current", "index": args[1]})
+
+    def record_offset(self, offset):
+        """Note how far into the current item playback has got"""
+        if offset != self.offset:
+            self.offset = offset
+            self._write({"op": "offset", "value": offset})
+
+    def _write(self, record):
+        if self._records >= self.compact_every:
+            self.compact()  # The queue already reflects this change
+            return
+        if self._file is None:
+            return
+        try:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            self._records += 1
+        except OSError as e:
+            print(f"Error writing queue journal: {e}")
+
+    def compact(self):
+        """Rewrite the journal as one snapshot of the queue"""
+        if self.queue is None:
+            return
+        snapshot = {"op": "snapshot", "items": [item.to_record() for item in self.queue],
+                    "current": self.queue.current, "offset": self.offset}
+        self.close()
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(json.dumps(snapshot, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._records = 0
+        except OSError as e:
+            print(f"Error compacting queue journal: {e}")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+# --- Clipboard ---
+
+class ClipboardPoller:
+    """Decides how often to poll the clipboard and when a change is acted on
+
+    The GUI reads the clipboard on a Tk timer, passes each read to observe()
+    and schedules the next read after interval ms. Polling is fast right
+    after a change and backs off geometrically, to max_interval_ms, while the
+    clipboard is idle; a copy after an idle spell is acted on within
+    max_interval_ms + settle_ms.
+    Reads are compared by digest, so only the latest changed text (capped at
+    max_chars) is kept, and only until the settle window passes with no
+    further change: a burst of copies produces one action for the last one.
+    """
+
+    def __init__(self, min_interval_ms=100, max_interval_ms=500, settle_ms=300,
+                 max_chars=1000000, backoff=1.5):
+        self.min_interval_ms = min_interval_ms
+        self.max_interval_ms = max_interval_ms
+        self.settle_ms = settle_ms
+        self.max_chars = max_chars
+        self.backoff = backoff
+        self.interval = min_interval_ms
+        self.truncated = False      # The last text returned was cut to max_chars
+        self._digest = None
+        self._pending = None
+        self.changed_at = 0.0       # time.monotonic() of the first read of the pending text
+
+    @staticmethod
+    def digest(text):
+        return hashlib.sha256(text.encode("utf-8", "surrogatepass")).digest()
+
+    def observe(self, text, now=None):
+        """Record one clipboard read; returns the text to act on once a change settles"""
+        if now is None:
+            now = time.monotonic()
+        digest = self.digest(text)
+        if digest != self._digest:
+            self._digest = digest
+            self._pending = text[:self.max_chars]
+            self.truncated = len(text) > self.max_chars
+            self.changed_at = now
+            self.interval = self.min_interval_ms
+            return None
+        if self._pending is not None:
+            if (now - self.changed_at) * 1000 >= self.settle_ms:
+                text, self._pending = self._pending, None
+                return text
+            return None
+        self.interval = min(self.max_interval_ms, int(self.interval * self.backoff))
+        return None
+
+
+class ClipboardDelta:
+    """Finds the text a clipboard copy adds to the previous copy
+
+    When a growing log or transcript is copied again, the new copy starts
+    with (a tail of) the previous one. The overlap is located by searching
+    the new text for the last anchor characters of the previous text with
+    str.rfind and confirming each candidate with str.endswith, both of
+    which run in C, so large payloads stay cheap. Overlaps shorter than
+    min_overlap are ignored and the full text is used.
+    """
+
+    def __init__(self, min_overlap=80, anchor=32, max_candidates=16):
+        self.min_overlap = min_overlap
+        self.anchor = anchor
+        self.max_candidates = max_candidates
+        self.previous = ""
+        self._before = ""
+
+    def new_text(self, text):
+        """Return the part of text after its overlap with the previous text, and remember text"""
+        self._before, self.previous = self.previous, text
+        overlap = self.overlap(self._before, text)
+        if overlap < max(self.min_overlap, 1):
+            return text
+        return text[overlap:]
+
+    def forget(self):
+        """Undo the last new_text(), e.g. when its text ended up not being used"""
+        self.previous = self._before
+
+    def overlap(self, previous, text):
+        """Length of the longest suffix of previous that is also a prefix of text"""
+        if not previous or len(previous) < self.min_overlap:
+            return 0
+        if text.startswith(previous):
+            return len(previous)
+        anchor = previous[-self.anchor:]
+        end = min(len(text), len(previous))
+        for _ in range(self.max_candidates):
+            pos = text.rfind(anchor, 0, end)
+            if pos < 0:
+                break
+            length = pos + len(anchor)
+            if previous.endswith(text[:length]):
+                return length
+            end = length - 1
+        return 0
+
+
+# Every character str.split() treats as whitespace, apart from the space and newline
+_OTHER_SPACES = ("\t\x0b\x0c\r\x1c\x1d\x1e\x1f\x85\xa0\u1680"
+                 + "".join(map(chr, range(0x2000, 0x200b))) + "\u2028\u2029\u202f\u205f\u3000")
+
+
+class DuplicateIndex:
+    """Bounded index of recently seen texts, for suppressing repeats
+
+    Texts are keyed by a digest of their whitespace-collapsed, casefolded
+    form and remembered for window_s seconds (at most max_entries of them),
+    so each check is a single dict lookup however long the texts are.
+    """
+
+    def __init__(self, window_s=600, max_entries=1000):
+        self.window_s = window_s
+        self.max_entries = max_entries
+        self.suppressed = 0
+        self._seen = OrderedDict()  # digest -> time last seen, oldest first
+
+    @staticmethod
+    def key(text):
+        # Same text as " ".join(text.split()).casefold(), built with a few whole-string
+        # passes instead of one string object per word. Runs of newlines (paragraph
+        # breaks) are collapsed first: searching for a rare character is much faster
+        for space in _OTHER_SPACES:
+            if space in text:
+                text = text.replace(space, "\n")
+        while "\n\n" in text:
+            text = text.replace("\n\n", "\n")
+        text = text.replace("\n", " ")
+        while "  " in text:
+            text = text.replace("  ", " ")
+        normalized = text.strip(" ").casefold()
+        return hashlib.sha256(normalized.encode("utf-8", "surrogatepass")).digest()
+
+    def is_duplicate(self, text, now=None):
+        """Return True (and count it) if text was seen within the window, else remember it"""
+        if self.window_s <= 0:
+            return False
+        if now is None:
+            now = time.monotonic()
+        while self._seen and now - next(iter(self._seen.values())) > self.window_s:
+            self._seen.popitem(last=False)
+        key = self.key(text)
+        if key in self._seen:
+            self.suppressed += 1
+            return True
+        self._seen[key] = now
+        if len(self._seen) > self.max_entries:
+            self._seen.popitem(last=False)
+        return False
+
+    def forget(self, text):
+        """Drop text from the index, e.g. when it ended up not being used"""
+        self._seen.pop(self.key(text), None)
+
+
+# --- Audio cache ---
+
+class AudioCache:
+    """On-disk cache of synthesized sentence audio with LRU eviction
+
+    Entries are WAV files named by a hash of the normalized sentence text and
+    the voice, rate and volume that rendered it, so identical sentences are
+    only ever synthesized once per voice setting. The least recently used
+    entries are evicted once the cache grows past max_bytes, except pinned
+    ones that a render is still using.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.total_bytes = 0
+        self._entries = OrderedDict()   # key -> size, least recently used first
+        self._pinned = Counter()        # key -> renders using the entry; never evicted
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        """Rebuild the LRU order from file modification times"""
+        found = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".wav") and entry.is_file():
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+            elif entry.name.endswith(".tmp"):
+                try:
+                    os.remove(entry.path)  # Leftover from an interrupted render
+                except OSError:
+                    pass
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self.total_bytes += size
+        with self._lock:
+            self._evict()
+
+    @staticmethod
+    def key(text, voice, rate, volume):
+        normalized = " ".join(text.split())
+        data = f"{voice}\0{rate}\0{round(float(volume), 3)}\0{normalized}"
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".wav")
+
+    def temp_path(self, key):
+        return os.path.join(self.directory, key + ".tmp")
+
+    def get(self, key):
+        """Return the cached file for key (counting a hit) or None (a miss)"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                path = self.path(key)
+                try:
+                    os.utime(path)  # Persist recency for the next startup
+                    return path
+                except OSError:
+                    self.total_bytes -= self._entries.pop(key)
+            self.misses += 1
+            return None
+
+    def put(self, key, temp_path):
+        """Move a freshly rendered temp file into the cache"""
+        path = self.path(key)
+        size = os.path.getsize(temp_path)
+        os.replace(temp_path, path)
+        with self._lock:
+            self.total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            self._evict(keep=key)
+        return path
+
+    def pin(self, keys):
+        """Keep keys' files until unpin(), overshooting max_bytes if need be"""
+        with self._lock:
+            self._pinned.update(set(keys))
+
+    def unpin(self, keys):
+        """Release pin(keys); any overshoot is evicted by the next put()"""
+        with self._lock:
+            for key in set(keys):
+                self._pinned[key] -= 1
+                if self._pinned[key] <= 0:
+                    del self._pinned[key]
+
+    def _evict(self, keep=None):
+        excess = self.total_bytes - self.max_bytes
+        victims = []
+        for key, size in self._entries.items():
+            if excess <= 0:
+                break
+            if key != keep and key not in self._pinned:
+                victims.append(key)
+                excess -= size
+        for key in victims:
+            self.total_bytes -= self._entries.pop(key)
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses,
+                "entries": len(self._entries), "bytes": self.total_bytes}
+
+
+class WavStitcher:
+    """Appends WAV files to one output file in order, streaming frames to disk"""
+
+    block_frames = 65536
+
+    def __init__(self, out_path):
+        self.out_path = out_path
+        self.out = None
+        self.params = None
+        self.frames = 0
+
+    def append(self, path):
+        with wave.open(path, "rb") as src:
+            self._copy(src, src.getnframes(), path)
+
+    def append_range(self, path, start_frame, frames):
+        """Append frames [start_frame, start_frame + frames) of another WAV file"""
+        with wave.open(path, "rb") as src:
+            src.setpos(start_frame)
+            self._copy(src, frames, path)
+
+    def _copy(self, src, count, path):
+        fmt = (src.getnchannels(), src.getsampwidth(), src.getframerate())
+        if self.out is None:
+            self.params = fmt
+            self.out = wave.open(self.out_path, "wb")
+            self.out.setnchannels(fmt[0])
+            self.out.setsampwidth(fmt[1])
+            self.out.setframerate(fmt[2])
+        elif fmt != self.params:
+            raise ValueError(f"Audio format mismatch in {os.path.basename(path)}")
+        remaining = count
+        while remaining > 0:
+            frames = src.readframes(min(self.block_frames, remaining))
+            if not frames:
+                break
+            self.out.writeframes(frames)
+            remaining -= len(frames) // (fmt[0] * fmt[1])
+        self.frames += count - remaining
+
+    def close(self):
+        """Finish the output file; returns False if nothing was appended"""
+        if self.out is None:
+            return False
+        self.out.close()
+        return True
+
+
+def concat_wavs(paths, out_path):
+    """Stitch WAV files into out_path in order, streaming frames to disk"""
+    stitcher = WavStitcher(out_path)
+    try:
+        for path in paths:
+            stitcher.append(path)
+    finally:
+        written = stitcher.close()
+    return written
+
+
+# --- Voice catalog ---
+
+VoiceInfo = namedtuple("VoiceInfo", "id name languages gender age")
+
+
+def voice_info(voice):
+    """Plain, JSON-friendly copy of a pyttsx3 Voice"""
+    languages = []
+    for language in getattr(voice, "languages", None) or []:
+        if isinstance(language, bytes):
+            # espeak reports b"\x05en-us": a priority byte, then the language
+            language = language[1:].decode("ascii", "replace") if language[:1] < b" " \
+                else language.decode("ascii", "replace")
+        languages.append(str(language))
+    return VoiceInfo(voice.id, voice.name, languages,
+                     getattr(voice, "gender", None), getattr(voice, "age", None))
+
+
+def driver_fingerprint():
+    """Identify the speech driver the voice list came from"""
+    driver = {"win32": "sapi5", "darwin": "nsss"}.get(sys.platform, "espeak")
+    # The package's install time stands in for its version without importing it
+    spec = importlib.util.find_spec("pyttsx3")
+    try:
+        installed = os.stat(spec.origin).st_mtime_ns if spec and spec.origin else None
+    except OSError:
+        installed = None
+    return {"driver": driver, "platform": platform.platform(), "pyttsx3": installed}
+
+
+class VoiceCatalog:
+    """Installed voices cached on disk so the UI can list them without the engine
+
+    Enumerating voices means starting the speech driver, which can take
+    seconds. The last list seen is saved with a fingerprint of the driver and
+    platform; load() returns it only while the fingerprint still matches, and
+    callers reconcile it against a fresh enumeration in the background.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fingerprint = driver_fingerprint()
+
+    def load(self):
+        """Return the cached voices, or None if missing or from another driver"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("fingerprint") != self.fingerprint:
+                return None
+            return [VoiceInfo(*voice) for voice in data["voices"]]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, voices):
+        """Store voices; returns True if the list differs from the cached one"""
+        voices = [v if isinstance(v, VoiceInfo) else voice_info(v) for v in voices]
+        if voices == self.load():
+            return False
+        try:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"fingerprint": self.fingerprint,
+                           "voices": [list(v) for v in voices]}, f, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Failed to save voice catalog: {e}")
+        return True
+
+    def refresh(self):
+        """Enumerate voices with a throwaway engine and update the cache"""
+        com_initialized = init_com()
+        try:
+            engine = load_pyttsx3().init()
+            voices = [voice_info(v) for v in engine.getProperty("voices")]
+            try:
+                engine.stop()
+            except Exception:
+                pass
+        finally:
+            if com_initialized:
+                uninit_com()
+        self.save(voices)
+        return voices
+
+    def voices(self):
+        """Cached voices, enumerating only when there is no valid cache"""
+        voices = self.load()
+        return voices if voices is not None else self.refresh()
+
+
+# --- Metrics ---
+
+class Metrics:
+    """Rolling latency and throughput samples with on-demand percentiles
+
+    Each metric keeps only its last `window` samples, so memory stays
+    bounded however long the app runs. record() takes a lock and appends to
+    a deque, cheap enough for word callbacks on any thread. Names carry
+    their unit: "_ms" for milliseconds, "_rtf" for the synthesis realtime
+    factor (seconds spent synthesizing per second of audio; below 1 is
+    faster than realtime).
+    """
+
+    percentiles = (50, 90, 99)
+
+    def __init__(self, window=512):
+        self.window = window
+        self._samples = {}          # name -> deque of the latest values
+        self._counts = {}           # name -> samples recorded in total
+        self._lock = threading.Lock()
+
+    def record(self, name, value):
+        with self._lock:
+            samples = self._samples.get(name)
+            if samples is None:
+                samples = self._samples[name] = deque(maxlen=self.window)
+            samples.append(value)
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    def record_since(self, name, started):
+        """Record the milliseconds elapsed since a time.perf_counter() value"""
+        self.record(name, (time.perf_counter() - started) * 1000)
+
+    def percentile(self, name, pct):
+        """Nearest-rank percentile of the retained samples, or None"""
+        with self._lock:
+            samples = sorted(self._samples.get(name, ()))
+        return self._rank(samples, pct) if samples else None
+
+    @staticmethod
+    def _rank(ordered, pct):
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+    def summary(self):
+        """{name: {"count", "last", "p50", "p90", "p99", "max"}} for every metric"""
+        with self._lock:
+            snapshot = {name: (self._counts[name], list(samples))
+                        for name, samples in self._samples.items()}
+        result = {}
+        for name, (count, samples) in sorted(snapshot.items()):
+            ordered = sorted(samples)
+            stats = {"count": count, "last": samples[-1]}
+            for pct in self.percentiles:
+                stats[f"p{pct}"] = self._rank(ordered, pct)
+            stats["max"] = ordered[-1]
+            result[name] = stats
+        return result
+
+    def dump(self, path, context=None):
+        """Write the summary to path as CSV (.csv) or JSON (anything else)
+
+        context (voice, rate, platform, ...) is written alongside so dumps
+        from different voices and machines can be compared side by side;
+        CSV repeats it on every row so files can simply be concatenated.
+        """
+        context = context or {}
+        summary = self.summary()
+        if path.lower().endswith(".csv"):
+            columns = ["metric", "count", "last"] + [f"p{pct}" for pct in self.percentiles] + ["max"]
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(columns + list(context))
+                for name, stats in summary.items():
+                    writer.writerow([name] + [round(stats[c], 3) for c in columns[1:]]
+                                    + list(context.values()))
+        else:
+            with self._lock:
+                samples = {name: list(values) for name, values in self._samples.items()}
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"context": context, "recorded": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                           "metrics": summary, "samples": samples}, f, indent=2)
+
+
+# --- Engine service ---
+
+class EngineCommand:
+    """A unit of work executed on the engine thread"""
+
+    SPEAK = "speak"
+    RENDER = "render"
+    EXPORT = "export"
+    SET_PROPERTY = "set-property"
+    VOICES = "voices"
+    SHUTDOWN = "shutdown"
+
+    def __init__(self, kind, text=None, chunks=None, path=None, name=None, value=None,
+                 on_word=None, on_chunk=None, on_done=None, token=None):
+        self.kind = kind
+        self.text = text
+        self.chunks = chunks        # Iterable of TextChunk for SPEAK/RENDER (and EXPORT)
+        self.path = path
+        self.name = name
+        self.value = value
+        self.on_word = on_word      # on_word(offset, length), engine thread
+        self.on_chunk = on_chunk    # on_chunk(chunk, wav_path) for RENDER, engine thread
+        self.on_done = on_done      # on_done(command), engine thread
+        self.token = token          # CancelToken of the playback operation this belongs to
+        self.result = None
+        self.error = None
+        self._cancelled = False
+        self.done = threading.Event()
+        self.submitted_at = time.perf_counter()
+        self.first_word_at = None   # perf_counter() of the first word spoken (SPEAK)
+
+    @property
+    def cancelled(self):
+        return self._cancelled or (self.token is not None and self.token.cancelled)
+
+    def cancel(self):
+        self._cancelled = True
+
+    def wait(self, timeout=None):
+        """Block until the command has finished; returns True if it did"""
+        return self.done.wait(timeout)
+
+
+class EngineService:
+    """Owns one pyttsx3 engine on a dedicated thread for the life of the app
+
+    pyttsx3 engines are not safe to drive from several threads, and creating a
+    new one per utterance makes driver startup dominate short snippets. All
+    speech goes through a command queue instead: the engine thread runs one
+    command at a time, applies rate/volume/voice only when they change, and
+    calls each command's on_done when it completes, fails or is cancelled.
+
+    Speech is streamed: the engine gets one sentence chunk first, so time to
+    first word does not depend on document length, then `lookahead` chunks per
+    round. Stop takes effect at the next chunk boundary at the latest.
+
+    RENDER and WAV exports are rendered sentence by sentence and stitched, so
+    memory stays flat however long the text; with an AudioCache, only cache
+    misses go through the engine.
+
+    pyttsx3 is imported and initialized on the engine thread too, so start()
+    returns immediately. on_ready is called once that finishes (check
+    `engine` / `init_error`); commands submitted before then wait in the queue.
+    """
+
+    lookahead = 2
+    render_batch = 8
+
+    def __init__(self, cache=None, on_ready=None, metrics=None):
+        self.cache = cache
+        self.on_ready = on_ready    # on_ready(), engine thread, after init succeeds or fails
+        self.metrics = metrics      # Metrics for engine init time and synthesis speed
+        self.timings = []           # (phase, seconds) of engine initialization
+        self.commands = queue.Queue()
+        self.engine = None
+        self.init_error = None
+        self.default_rate = 150
+        self.default_volume = 1.0
+        self.voices = []
+        self.ready = threading.Event()
+        self.active = None
+        self._applied = {}          # Property values currently set on the engine
+        self._utterances = {}       # Utterance name -> the TextChunk being spoken
+        self._lock = threading.Lock()
+        self._pending = []          # Speak/export commands not yet started
+        self._interrupted = None    # Cancelled command the engine was last stopped for
+        self.thread = threading.Thread(target=self._run, name="tts-engine", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def wait_ready(self, timeout=None):
+        """Wait for engine initialization; returns True if the engine is usable"""
+        self.ready.wait(timeout)
+        return self.engine is not None
+
+    # --- Commands (callable from any thread) ---
+
+    def submit(self, command):
+        if command.kind in (EngineCommand.SPEAK, EngineCommand.RENDER, EngineCommand.EXPORT):
+            with self._lock:
+                self._pending.append(command)
+        self.commands.put(command)
+        return command
+
+    def speak(self, text, on_word=None, on_done=None, offset=0, token=None):
+        """Speak text; word offsets are reported relative to offset"""
+        return self.speak_chunks(iter_chunks(text, offset), on_word=on_word, on_done=on_done, token=token)
+
+    def speak_chunks(self, chunks, on_word=None, on_done=None, token=None):
+        """Speak an iterable of TextChunk, consumed lazily on the engine thread"""
+        return self.submit(EngineCommand(EngineCommand.SPEAK, chunks=chunks,
+                                         on_word=on_word, on_done=on_done, token=token))
+
+    def render(self, chunks, on_chunk, on_done=None, token=None):
+        """Render chunks to cached WAV files, calling on_chunk(chunk, path) in order"""
+        return self.submit(EngineCommand(EngineCommand.RENDER, chunks=chunks,
+                                         on_chunk=on_chunk, on_done=on_done, token=token))
+
+    def export(self, text, path, on_done=None, chunks=None, token=None):
+        """Save text (or an iterable of TextChunk) to an audio file"""
+        return self.submit(EngineCommand(EngineCommand.EXPORT, text=text, chunks=chunks,
+                                         path=path, on_done=on_done, token=token))
+
+    def set_property(self, name, value):
+        return self.submit(EngineCommand(EngineCommand.SET_PROPERTY, name=name, value=value))
+
+    def list_voices(self, on_done=None):
+        """Enumerate the installed voices; the VoiceInfo list is passed back as command.result
+
+        Startup does not enumerate voices (see VoiceCatalog), so self.voices
+        stays empty until the first list_voices command completes.
+        """
+        return self.submit(EngineCommand(EngineCommand.VOICES, on_done=on_done))
+
+    def stop(self, token=None):
+        """Cancel pending speak/render/export commands and interrupt the active one
+
+        With a token only that operation's commands are cancelled, and the
+        engine is interrupted only if it is running one of them; other
+        clients' work (exports, queued speech) is left alone.
+        """
+        with self._lock:
+            if token is None:
+                pending, self._pending = self._pending, []
+            else:
+                pending = [command for command in self._pending if command.token is token]
+                self._pending = [command for command in self._pending if command.token is not token]
+            active = self.active
+        for command in pending:
+            command.cancel()
+        if active is not None and (token is None or active.token is token):
+            active.cancel()
+            try:
+                self.engine.stop()
+            except Exception:
+                pass  # Ignore errors when stopping engine
+
+    def cancel(self, command):
+        """Cancel one command, interrupting the engine if it is the one running"""
+        command.cancel()
+        with self._lock:
+            if command in self._pending:
+                self._pending.remove(command)
+            active = self.active is command
+        if active and self.engine is not None:
+            try:
+                self.engine.stop()
+            except Exception:
+                pass
+
+    def shutdown(self):
+        self.stop()
+        self.commands.put(EngineCommand(EngineCommand.SHUTDOWN))
+
+    # --- Engine thread ---
+
+    def _run(self):
+        com_initialized = init_com()
+        try:
+            try:
+                started = time.perf_counter()
+                pyttsx3 = load_pyttsx3()
+                self.timings.append(("import pyttsx3", time.perf_counter() - started))
+                started = time.perf_counter()
+                self.engine = pyttsx3.init()
+                self.timings.append(("pyttsx3.init", time.perf_counter() - started))
+                started = time.perf_counter()
+                self.default_rate = self.engine.getProperty("rate")
+                self.default_volume = self.engine.getProperty("volume")
+                self._applied = {"rate": self.default_rate, "volume": self.default_volume,
+                                 "voice": self.engine.getProperty("voice")}
+                # Connect callback if available (not all engines support this)
+                try:
+                    self.engine.connect('started-word', self._on_word)
+                except Exception:
+                    pass
+                self.timings.append(("properties", time.perf_counter() - started))
+                if self.metrics is not None:
+                    self.metrics.record("engine_init_ms", sum(t for _, t in self.timings) * 1000)
+            except Exception as e:
+                self.init_error = e
+                self.engine = None
+            finally:
+                self.ready.set()
+                if self.on_ready is not None:
+                    try:
+                        self.on_ready()
+                    except Exception:
+                        pass
+
+            while True:
+                command = self.commands.get()
+                if command.kind == EngineCommand.SHUTDOWN:
+                    self._finish(command)
+                    break
+                self._execute(command)
+        finally:
+            if self.engine is not None:
+                try:
+                    self.engine.stop()
+                except Exception:
+                    pass
+            if com_initialized:
+                uninit_com()
+
+    def _execute(self, command):
+        with self._lock:
+            if command in self._pending:
+                self._pending.remove(command)
+            if not command.cancelled:
+                self.active = command
+        try:
+            if self.engine is None:
+                raise RuntimeError(f"TTS engine unavailable: {self.init_error}")
+            if command.kind == EngineCommand.SET_PROPERTY:
+                self._apply(command.name, command.value)
+            elif command.kind == EngineCommand.VOICES:
+                self.voices = [voice_info(v) for v in self.engine.getProperty("voices")]
+                command.result = self.voices
+            elif command.kind == EngineCommand.SPEAK:
+                self._speak(command)
+            elif command.kind == EngineCommand.RENDER:
+                for chunk, path in self._render_chunks(command, command.chunks):
+                    command.on_chunk(chunk, path)
+            elif command.path.lower().endswith(".wav"):
+                chunks = command.chunks if command.chunks is not None else iter_chunks(command.text)
+                # result: (seconds into the output, chunk offset) for each chunk
+                command.result = []
+                concat_wavs(self._export_paths(command, chunks), command.path)
+                if command.cancelled and os.path.exists(command.path):
+                    os.remove(command.path)
+            elif not command.cancelled:
+                text = command.text
+                if text is None:
+                    # save_to_file needs the whole text; only WAV output can be stitched from chunks
+                    text = " ".join(chunk.text for chunk in command.chunks)
+                self.engine.save_to_file(text, command.path)
+                self.engine.runAndWait()
+        except Exception as e:
+            command.error = e
+        finally:
+            with self._lock:
+                self.active = None
+            self._finish(command)
+
+    def _speak(self, command):
+        """Feed chunks to the engine a few at a time until done or cancelled"""
+        chunks = iter(command.chunks)
+        batch = 1
+        try:
+            while not command.cancelled:
+                self._utterances = {}
+                for chunk in itertools.islice(chunks, batch):
+                    name = f"chunk-{chunk.start}"
+                    self._utterances[name] = chunk
+                    self.engine.say(chunk.text, name)
+                if not self._utterances:
+                    break
+                if command.cancelled:
+                    self.engine.stop()  # Drop the batch we just queued
+                    break
+                self.engine.runAndWait()
+                batch = self.lookahead
+        finally:
+            self._utterances = {}
+
+    def _render_chunks(self, command, chunks):
+        """Yield (chunk, wav path) in order, synthesizing cache misses in batches
+
+        Without a cache every chunk is a miss, rendered to a scratch file that
+        is deleted once the caller has moved two batches on.
+        """
+        cache = self.cache
+        scratch = tempfile.mkdtemp(prefix="readaloud-") if cache is None else None
+        counter = itertools.count()
+        chunks = iter(chunks)
+        # Keys of this batch and the last one: callers may still be reading their files, and
+        # the puts for later misses must not evict them, even in a cache smaller than a batch
+        held = deque()
+        try:
+            while not command.cancelled:
+                batch = list(itertools.islice(chunks, self.render_batch))
+                if not batch:
+                    return
+                if cache is not None:
+                    keys = [cache.key(chunk.text, self._applied.get("voice"),
+                                      self._applied.get("rate"), self._applied.get("volume"))
+                            for chunk in batch]
+                    cache.pin(keys)
+                else:
+                    keys = [os.path.join(scratch, f"{next(counter)}.wav") for _ in batch]
+                held.append(keys)
+                paths = {}
+                misses = {}
+                for chunk, key in zip(batch, keys):
+                    if key in paths or key in misses:
+                        continue
+                    path = cache.get(key) if cache is not None else None
+                    if path is not None:
+                        paths[key] = path
+                    else:
+                        misses[key] = cache.temp_path(key) if cache is not None else key
+                        self.engine.save_to_file(chunk.text, misses[key])
+                if misses:
+                    if command.cancelled:
+                        self.engine.stop()
+                        return
+                    started = time.perf_counter()
+                    self.engine.runAndWait()
+                    if command.cancelled:
+                        return
+                    if self.metrics is not None:
+                        self._record_rtf("render_rtf", time.perf_counter() - started,
+                                         sum(wav_duration(path) for path in misses.values()))
+                    for key, temp_path in misses.items():
+                        paths[key] = cache.put(key, temp_path) if cache is not None else temp_path
+                if len(held) > 2:
+                    self._release(held.popleft())
+                for chunk, key in zip(batch, keys):
+                    if command.cancelled:
+                        return
+                    yield chunk, paths[key]
+        finally:
+            for keys in held:
+                self._release(keys)
+            if scratch is not None:
+                shutil.rmtree(scratch, ignore_errors=True)
+
+    def _release(self, keys):
+        """Let a rendered batch go: unpin its cache entries, or delete its scratch files"""
+        if self.cache is not None:
+            self.cache.unpin(keys)
+            return
+        for path in keys:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _export_paths(self, command, chunks):
+        """Yield rendered chunk files for an export, recording where each one starts"""
+        elapsed = 0.0
+        for chunk, path in self._render_chunks(command, chunks):
+            command.result.append((elapsed, chunk.start))
+            elapsed += wav_duration(path)
+            yield path
+
+    def _apply(self, name, value):
+        """Set an engine property only if it differs from the applied value"""
+        if value is None or self._applied.get(name) == value:
+            return
+        self.engine.setProperty(name, value)
+        self._applied[name] = value
+
+    def _record_rtf(self, name, seconds, audio_seconds):
+        if audio_seconds > 0:
+            self.metrics.record(name, seconds / audio_seconds)
+
+    def _on_word(self, name, location, length):
+        command = self.active
+        if command is None:
+            return
+        if command.cancelled:
+            # Cancelled through its token without a stop(): cut the utterance here
+            if command is not self._interrupted:
+                self._interrupted = command
+                try:
+                    self.engine.stop()
+                except Exception:
+                    pass
+            return
+        if command.first_word_at is None:
+            command.first_word_at = time.perf_counter()
+            if command.token is not None:
+                command.token.start()
+        if command.on_word is None:
+            return
+        try:
+            chunk = self._utterances.get(name)
+            if chunk is not None:
+                command.on_word(*word_span(chunk, location, length))
+        except Exception:
+            pass
+
+    def _finish(self, command):
+        command.done.set()
+        if command.on_done is not None:
+            try:
+                command.on_done(command)
+            except Exception:
+                pass
+
+
+# --- Audio playback ---
+
+def wav_duration(path):
+    """Length of a WAV file in seconds (0.0 if it cannot be read)"""
+    try:
+        with wave.open(path, "rb") as wav:
+            return wav.getnframes() / float(wav.getframerate() or 1)
+    except (OSError, EOFError, wave.Error):
+        return 0.0
+
+
+class AudioPlayer:
+    """Plays rendered WAV files on a background thread
+
+    Uses winsound on Windows and the first available command-line player
+    elsewhere. When no backend exists `available` is False and callers should
+    fall back to speaking through the engine directly.
+    """
+
+    COMMANDS = (["afplay"], ["paplay"], ["aplay", "-q"])
+
+    def __init__(self):
+        self.command = None
+        self.winsound = None
+        if sys.platform == "win32":
+            try:
+                import winsound
+                self.winsound = winsound
+            except ImportError:
+                pass
+        else:
+            self.command = next((c for c in self.COMMANDS if shutil.which(c[0])), None)
+        self._stop_event = None
+
+    @property
+    def available(self):
+        return self.winsound is not None or self.command is not None
+
+    def play(self, path, on_done=None):
+        """Start playing path; on_done(completed) is called from the player thread"""
+        self.stop()
+        stop_event = self._stop_event = threading.Event()
+        threading.Thread(target=self._play, args=(path, stop_event, on_done),
+                         name="tts-player", daemon=True).start()
+
+    def stop(self):
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    def _play(self, path, stop_event, on_done):
+        completed = False
+        try:
+            if self.winsound is not None:
+                flags = self.winsound.SND_FILENAME | self.winsound.SND_ASYNC | self.winsound.SND_NODEFAULT
+                self.winsound.PlaySound(path, flags)
+                completed = not stop_event.wait(wav_duration(path))
+                if not completed:
+                    self.winsound.PlaySound(None, self.winsound.SND_PURGE)
+            else:
+                proc = subprocess.Popen(self.command + [path],
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                while proc.poll() is None:
+                    if stop_event.wait(0.02):
+                        proc.terminate()
+                        proc.wait()
+                        break
+                completed = proc.returncode == 0 and not stop_event.is_set()
+        except Exception:
+            completed = False
+        finally:
+            if on_done is not None:
+                try:
+                    on_done(completed)
+                except Exception:
+                    pass
+
+
+class CachedSpeech:
+    """Speaks a chunk stream by playing cached sentence audio
+
+    The engine thread renders cache misses a few chunks ahead of the player,
+    and the player thread plays each chunk as soon as the previous one ends.
+    Pre-rendered audio has no word callbacks, so word events are estimated
+    from each chunk's audio length. Exposes the same done/error/cancelled
+    surface as EngineCommand so callers can treat both alike.
+    """
+
+    def __init__(self, engine, player, chunks, on_word=None, on_done=None, lookahead=4, token=None):
+        self.player = player
+        self.on_word = on_word
+        self.on_done = on_done
+        self.token = token
+        self.error = None
+        self._cancelled = False
+        self.done = threading.Event()
+        self.submitted_at = time.perf_counter()
+        self.first_word_at = None   # perf_counter() when the first chunk started playing
+        self._ready = queue.Queue(maxsize=lookahead)
+        self.render = engine.render(chunks, on_chunk=self._on_chunk, on_done=self._on_render_done,
+                                    token=token)
+        threading.Thread(target=self._run, name="tts-cached-speech", daemon=True).start()
+
+    @property
+    def cancelled(self):
+        return self._cancelled or (self.token is not None and self.token.cancelled)
+
+    def cancel(self):
+        self._cancelled = True
+        self.render.cancel()
+        self.player.stop()
+        try:
+            self._ready.put_nowait(None)  # Wake the player thread
+        except queue.Full:
+            pass
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+    def _put(self, item):
+        # Blocks the engine thread while the player is lookahead chunks behind
+        while not self.cancelled:
+            try:
+                self._ready.put(item, timeout=0.05)
+                return
+            except queue.Full:
+                continue
+
+    def _on_chunk(self, chunk, path):
+        self._put((chunk, path))
+
+    def _on_render_done(self, command):
+        self.error = command.error
+        if command.cancelled:
+            self.cancel()
+        self._put(None)
+
+    def _run(self):
+        try:
+            while not self.cancelled:
+                item = self._ready.get()
+                if item is None:
+                    break
+                self._play_chunk(*item)
+        finally:
+            self.done.set()
+            if self.on_done is not None:
+                try:
+                    self.on_done(self)
+                except Exception:
+                    pass
+
+    def _play_chunk(self, chunk, path):
+        finished = threading.Event()
+        if self.first_word_at is None:
+            self.first_word_at = time.perf_counter()
+            if self.token is not None:
+                self.token.start()
+        self.player.play(path, on_done=lambda completed: finished.set())
+        # Spread word events over the chunk's audio in proportion to their offsets
+        duration = wav_duration(path)
+        length = max(len(chunk.text), 1)
+        words = [(m.start(), len(m.group())) for m in _WORD_RE.finditer(chunk.text)] if self.on_word else []
+        started = time.perf_counter()
+        index = 0
+        while not finished.wait(0.01):
+            if self.cancelled:
+                self.cancel()  # Cancelled through its token: silence the player now
+                return
+            elapsed = time.perf_counter() - started
+            while index < len(words) and words[index][0] / length * duration <= elapsed:
+                if self.cancelled:
+                    return
+                try:
+                    self.on_word(*word_span(chunk, words[index][0], words[index][1]))
+                except Exception:
+                    pass
+                index += 1
+
+
+class CancelToken:
+    """Cancellation flag shared by every command of one playback operation
+
+    Engine and player threads check it at each chunk and word, so stopping
+    needs no shared flags to set and later reset: the next operation simply
+    gets a fresh token.
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.cancelled = False
+        self.cancelled_at = None    # perf_counter() of cancel()
+        self.started_at = None      # perf_counter() of the operation's first audio
+        self.finished_at = None     # perf_counter() once its audio has ended
+
+    def cancel(self):
+        if not self.cancelled:
+            self.cancelled_at = time.perf_counter()
+            self.cancelled = True
+
+    def start(self):
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+
+
+class Playback:
+    """Playback state machine: idle -> starting -> speaking -> stopping -> idle
+
+    begin() hands out a CancelToken for a new operation (starting); its first
+    audio moves it to speaking; stop() cancels the token (stopping); and
+    finish(token), called by whichever thread sees the operation's audio end,
+    returns to idle. An operation may begin at any time, including while a
+    stopped one is still winding down - late callbacks from the old one are
+    recognised by their token. Stop-to-silence time is recorded as stop_ms.
+    Safe to call from any thread.
+    """
+
+    IDLE = "idle"
+    STARTING = "starting"
+    SPEAKING = "speaking"
+    STOPPING = "stopping"
+
+    def __init__(self, metrics=None):
+        self.metrics = metrics
+        self.token = None           # CancelToken of the current operation
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        token = self.token
+        if token is None:
+            return self.IDLE
+        if token.cancelled:
+            return self.STOPPING
+        return self.STARTING if token.started_at is None else self.SPEAKING
+
+    @property
+    def active(self):
+        """True while an operation is starting or speaking"""
+        return self.state in (self.STARTING, self.SPEAKING)
+
+    def is_current(self, token):
+        """True if token belongs to the operation in progress and was not stopped"""
+        return token is not None and token is self.token and not token.cancelled
+
+    def begin(self, kind):
+        """Start a new operation, superseding any current one"""
+        token = CancelToken(kind)
+        with self._lock:
+            previous, self.token = self.token, token
+        if previous is not None:
+            previous.cancel()
+        return token
+
+    def stop(self):
+        """Cancel the current operation; returns its token, or None if there was nothing to stop"""
+        with self._lock:
+            token = self.token
+            if token is None or token.cancelled:
+                return None
+            token.cancel()
+        return token
+
+    def finish(self, token):
+        """An operation's audio has ended, by completing, failing or being stopped"""
+        with self._lock:
+            if token.finished_at is not None:
+                return
+            token.finished_at = time.perf_counter()
+            if self.token is token:
+                self.token = None
+        if token.cancelled_at is not None and self.metrics is not None:
+            self.metrics.record("stop_ms", (token.finished_at - token.cancelled_at) * 1000)
+
+
+class Speaker:
+    """Speech front end shared by the GUI and the asyncio API
+
+    Holds the steps every client of the engine repeats: running text through
+    the normalizer, queueing voice settings ahead of speech, and playing
+    cached sentence audio through the player when the engine has a cache and
+    the player a backend (speaking through the engine otherwise). Callbacks
+    run on worker threads, as with EngineService.
+    """
+
+    def __init__(self, engine, player=None, normalizer=None):
+        self.engine = engine
+        self.player = player
+        self.normalizer = normalizer
+
+    def normalized(self, chunks):
+        """Run chunks through the normalizer when there is one"""
+        if self.normalizer is None:
+            return chunks
+        return self.normalizer.normalize_chunks(chunks)
+
+    def configure(self, voice=None, rate=None, volume=None):
+        """Queue voice settings; the engine applies only values that changed"""
+        if rate is not None:
+            self.engine.set_property("rate", rate)
+        if volume is not None:
+            self.engine.set_property("volume", volume)
+        if voice:
+            self.engine.set_property("voice", voice)
+
+    def speak_chunks(self, chunks, on_word=None, on_done=None, token=None):
+        """Speak TextChunks; returns an EngineCommand or CachedSpeech"""
+        chunks = self.normalized(chunks)
+        if self.engine.cache is not None and self.player is not None and self.player.available:
+            # Play cached sentence audio; only cache misses go through the engine
+            return CachedSpeech(self.engine, self.player, chunks, on_word=on_word, on_done=on_done,
+                                token=token)
+        return self.engine.speak_chunks(chunks, on_word=on_word, on_done=on_done, token=token)
+
+    def speak(self, text, on_word=None, on_done=None, offset=0, token=None):
+        return self.speak_chunks(iter_chunks(text, offset), on_word=on_word, on_done=on_done, token=token)
+
+    def export(self, path, text=None, chunks=None, on_done=None, token=None):
+        """Save text (or TextChunks) to an audio file on the engine thread"""
+        if chunks is None:
+            chunks = iter_chunks(text)
+        if self.normalizer is not None:
+            text = None  # The engine must join the normalized chunks instead
+        return self.engine.export(text, path, on_done=on_done, chunks=self.normalized(chunks), token=token)
+
+    def cancel(self, command):
+        """Stop one speak/export started through this speaker"""
+        if isinstance(command, CachedSpeech):
+            command.cancel()
+        else:
+            self.engine.cancel(command)
+
+    def stop(self, token=None):
+        """Stop the speech started with token (all speech when token is None)
+
+        Cached speech watches its token and silences the player itself, so
+        the player is stopped outright only when stopping everything.
+        """
+        self.engine.stop(token)
+        if token is None and self.player is not None:
+            self.player.stop()
+
+
+# --- Parallel export ---
+
+_worker_engine = None
+
+
+def _init_render_worker(voice, rate, volume):
+    """Process pool initializer: one engine per worker process"""
+    global _worker_engine
+    init_com()
+    _worker_engine = load_pyttsx3().init()
+    _worker_engine.setProperty("rate", rate)
+    _worker_engine.setProperty("volume", volume)
+    if voice:
+        _worker_engine.setProperty("voice", voice)
+
+
+def _render_segment(work):
+    """Render [(text, wav_path), ...] in a worker process"""
+    for text, path in work:
+        _worker_engine.save_to_file(text, path)
+    _worker_engine.runAndWait()
+    return len(work)
+
+
+def iter_segments(chunks, max_chars):
+    """Group consecutive chunks into lists of roughly max_chars characters
+
+    Boundaries are content-defined: a segment ends after a chunk whose text
+    hashes to a boundary value once it holds max_chars / 2 characters (or
+    unconditionally at 2 * max_chars). An edit therefore only changes the
+    segments around it, and later segments keep their boundaries and hashes,
+    which is what lets re-exports reuse audio.
+    """
+    segment = []
+    size = 0
+    for chunk in chunks:
+        segment.append(chunk)
+        size += len(chunk.text)
+        if (size >= max_chars // 2 and zlib.crc32(chunk.text.encode("utf-8", "surrogatepass")) % 8 == 0
+                or size >= max_chars * 2):
+            yield segment
+            segment = []
+            size = 0
+    if segment:
+        yield segment
+
+
+def segment_digest(segment):
+    """Stable digest of a segment's spoken text"""
+    h = hashlib.sha256()
+    for chunk in segment:
+        h.update(chunk.text.encode("utf-8", "surrogatepass"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class ExportJob:
+    """Exports text to a WAV file by rendering segments across a process pool
+
+    Text is split into sentence chunks (or `chunks` is used as given, e.g.
+    streamed from a LargeFile) and grouped into segments; cache hits are
+    reused and misses are synthesized by one engine per CPU core. Finished
+    segments are stitched into `<out_path>.part` strictly in document order,
+    so memory stays flat however long the text is, and the file is renamed
+    into place only on success. cancel() stops submitting work and removes
+    every partial file. Exposes the same done/error/cancelled surface as
+    EngineCommand.
+
+    A manifest (`<out_path>.manifest.json`) records each segment's digest
+    and frame range in the output. Exporting again to the same path with
+    the same voice/rate/volume copies the audio of unchanged segments from
+    the previous file and synthesizes only the segments that changed.
+    """
+
+    segment_chars = 4000
+    manifest_version = 1
+
+    def __init__(self, text, out_path, voice=None, rate=150, volume=1.0, cache=None,
+                 jobs=None, on_progress=None, on_done=None, chunks=None, total_chars=None,
+                 metrics=None):
+        self.text = text
+        self.chunks = chunks if chunks is not None else iter_chunks(text)
+        self.total_chars = total_chars or len(text)
+        self.path = out_path
+        self.voice = voice
+        self.rate = rate
+        self.volume = volume
+        self.cache = cache
+        self.jobs = max(1, min(jobs or os.cpu_count() or 1, self.total_chars // self.segment_chars + 1))
+        self.on_progress = on_progress      # on_progress(fraction), export thread
+        self.on_done = on_done              # on_done(job), export thread
+        self.metrics = metrics              # Records export_rtf on success
+        self.manifest_path = out_path + ".manifest.json"
+        self.segments = 0
+        self.reused = 0                     # Segments copied from the previous export
+        self.error = None
+        self.cancelled = False
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="tts-export", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        self.cancelled = True
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+    def _run(self):
+        started = time.perf_counter()
+        part_path = self.path + ".part"
+        temp_dir = tempfile.mkdtemp(prefix="export-",
+                                    dir=self.cache.directory if self.cache is not None else None)
+        pool = None
+        try:
+            pool = ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_render_worker,
+                                       initargs=(self.voice, self.rate, self.volume))
+            previous = self._load_manifest()
+            entries = []
+            stitcher = WavStitcher(part_path)
+            in_flight = deque()
+            segments = iter_segments(self.chunks, self.segment_chars)
+            total = max(self.total_chars, 1)
+            counter = itertools.count()
+            try:
+                while not self.cancelled:
+                    # Keep every worker busy with one segment queued behind it
+                    while len(in_flight) < self.jobs * 2:
+                        segment = next(segments, None)
+                        if segment is None:
+                            break
+                        digest = segment_digest(segment)
+                        if digest in previous:
+                            in_flight.append((segment, digest, previous[digest], {}, None, ()))
+                        else:
+                            in_flight.append((segment, digest) + self._submit(pool, segment, temp_dir, counter))
+                    if not in_flight:
+                        break
+                    segment, digest, paths, renders, future, keys = in_flight[0]
+                    while future is not None and not self.cancelled:
+                        try:
+                            future.result(timeout=0.1)
+                            break
+                        except FutureTimeout:
+                            continue
+                    if self.cancelled:
+                        break
+                    start_frame = stitcher.frames
+                    if isinstance(paths, tuple):
+                        # Unchanged since the last export: copy its audio across
+                        stitcher.append_range(self.path, *paths)
+                        self.reused += 1
+                    else:
+                        if self.cache is not None:
+                            paths = [self.cache.put(renders[p], p) if p in renders else p for p in paths]
+                        for path in paths:
+                            stitcher.append(path)
+                            if path in renders:
+                                os.remove(path)  # Uncached render, no longer needed
+                    entries.append({"digest": digest, "start_frame": start_frame,
+                                    "frames": stitcher.frames - start_frame})
+                    in_flight.popleft()
+                    if self.cache is not None:
+                        self.cache.unpin(keys)
+                    self.segments += 1
+                    if self.on_progress is not None:
+                        end = segment[-1].start + len(segment[-1].text)
+                        self.on_progress(min(end / total, 1.0))
+            finally:
+                stitcher.close()
+                if self.cache is not None:
+                    for *_, keys in in_flight:
+                        self.cache.unpin(keys)
+            if not self.cancelled:
+                os.replace(part_path, self.path)
+                self._save_manifest(entries, stitcher.params)
+                if self.metrics is not None and stitcher.frames:
+                    self.metrics.record("export_rtf", (time.perf_counter() - started)
+                                        / (stitcher.frames / stitcher.params[2]))
+            elif os.path.exists(part_path):
+                os.remove(part_path)
+        except Exception as e:
+            self.error = e
+            if os.path.exists(part_path):
+                os.remove(part_path)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            self.done.set()
+            if self.on_done is not None:
+                try:
+                    self.on_done(self)
+                except Exception:
+                    pass
+
+    def _submit(self, pool, segment, temp_dir, counter):
+        """Look up a segment's sentences in the cache and render the misses
+
+        The segment's cache entries stay pinned until it has been stitched,
+        so renders for other segments cannot evict them first.
+        """
+        paths = []
+        renders = {}    # temp path -> cache key
+        work = []
+        keys = []
+        if self.cache is not None:
+            keys = [self.cache.key(chunk.text, self.voice, self.rate, self.volume) for chunk in segment]
+            self.cache.pin(keys)
+        for index, chunk in enumerate(segment):
+            key = None
+            if self.cache is not None:
+                key = keys[index]
+                path = self.cache.get(key)
+                if path is not None:
+                    paths.append(path)
+                    continue
+            temp_path = os.path.join(temp_dir, f"{next(counter)}.wav")
+            work.append((chunk.text, temp_path))
+            renders[temp_path] = key
+            paths.append(temp_path)
+        future = pool.submit(_render_segment, work) if work else None
+        return paths, renders, future, keys
+
+    def _settings(self):
+        return {"voice": self.voice, "rate": self.rate, "volume": round(self.volume, 3)}
+
+    def _load_manifest(self):
+        """Map segment digest -> (start_frame, frames) in the existing output, if still valid"""
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            st = os.stat(self.path)
+            if (manifest.get("version") != self.manifest_version
+                    or manifest.get("settings") != self._settings()
+                    or manifest.get("size") != st.st_size or manifest.get("mtime") != st.st_mtime_ns):
+                return {}
+            with wave.open(self.path, "rb") as wav:
+                if [wav.getnchannels(), wav.getsampwidth(), wav.getframerate()] != manifest.get("format"):
+                    return {}
+            return {entry["digest"]: (entry["start_frame"], entry["frames"])
+                    for entry in manifest["segments"]}
+        except (OSError, ValueError, KeyError, TypeError, wave.Error):
+            return {}
+
+    def _save_manifest(self, entries, params):
+        if params is None:
+            return
+        try:
+            st = os.stat(self.path)
+            manifest = {"version": self.manifest_version, "settings": self._settings(),
+                        "format": list(params), "size": st.st_size, "mtime": st.st_mtime_ns,
+                        "segments": entries}
+            temp_path = self.manifest_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f)
+            os.replace(temp_path, self.manifest_path)
+        except OSError as e:
+            print(f"Failed to write export manifest: {e}")
+
+
+# --- Batch conversion (headless CLI) ---
+
+SETTINGS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tts_settings.json")
+BATCH_MANIFEST = ".readaloud-batch.jsonl"
+
+
+def _export_file(src, dst):
+    """Render one text file to dst in a worker process; returns (chars, seconds)"""
+    with open(src, "r", encoding=detect_encoding(src), errors="replace") as f:
+        text = f.read()
+    if not text.strip():
+        return 0, 0.0
+    os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+    part_path = dst + ".part.wav"
+    try:
+        _worker_engine.save_to_file(text, part_path)
+        _worker_engine.runAndWait()
+        os.replace(part_path, dst)
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+    return len(text), wav_duration(dst)
+
+
+def _load_batch_manifest(path):
+    """Read the append-only manifest of finished files (last entry wins)"""
+    done = {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    done[entry["src"]] = entry
+                except (ValueError, KeyError):
+                    continue  # Torn write from an interrupted run
+    except OSError:
+        pass
+    return done
+
+
+def batch_export(in_dir, out_dir, voice=None, rate=150, volume=1.0, jobs=None,
+                 force=False, log=print):
+    """Convert every .txt file under in_dir to a WAV under out_dir
+
+    Files are rendered in parallel, one engine per worker process. Each
+    finished file is appended to a manifest in out_dir, so an interrupted run
+    resumes where it stopped and files whose source and voice settings are
+    unchanged are skipped. Returns a stats dict.
+    """
+    settings = [voice, rate, round(float(volume), 3)]
+    manifest_path = os.path.join(out_dir, BATCH_MANIFEST)
+    os.makedirs(out_dir, exist_ok=True)
+    done = {} if force else _load_batch_manifest(manifest_path)
+
+    todo = []
+    skipped = 0
+    for root_dir, dirs, files in os.walk(in_dir):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.lower().endswith(".txt"):
+                continue
+            src = os.path.join(root_dir, name)
+            rel = os.path.relpath(src, in_dir)
+            dst = os.path.join(out_dir, os.path.splitext(rel)[0] + ".wav")
+            stat = os.stat(src)
+            entry = done.get(rel)
+            if (entry and entry.get("mtime") == stat.st_mtime and entry.get("size") == stat.st_size
+                    and entry.get("settings") == settings
+                    and (os.path.exists(dst) or entry.get("chars") == 0)):
+                skipped += 1
+                continue
+            todo.append((rel, src, dst, stat))
+
+    stats = {"files": len(todo), "skipped": skipped, "failed": 0,
+             "chars": 0, "audio_seconds": 0.0, "seconds": 0.0}
+    if not todo:
+        return stats
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(todo)))
+    started = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=jobs, initializer=_init_render_worker,
+                               initargs=(voice, rate, volume))
+    try:
+        futures = {pool.submit(_export_file, src, dst): (rel, stat) for rel, src, dst, stat in todo}
+        with open(manifest_path, "a", encoding="utf-8") as manifest:
+            for count, future in enumerate(as_completed(futures), 1):
+                rel, stat = futures[future]
+                try:
+                    chars, seconds = future.result()
+                except Exception as e:
+                    stats["failed"] += 1
+                    log(f"[{count}/{len(todo)}] FAILED {rel}: {e}")
+                    continue
+                stats["chars"] += chars
+                stats["audio_seconds"] += seconds
+                manifest.write(json.dumps({"src": rel, "mtime": stat.st_mtime, "size": stat.st_size,
+                                           "chars": chars, "settings": settings}) + "\n")
+                manifest.flush()
+                log(f"[{count}/{len(todo)}] {rel}")
+    finally:
+        # On Ctrl+C, drop queued files; finished ones are already in the manifest
+        pool.shutdown(wait=True, cancel_futures=True)
+        stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+def load_settings_file(path):
+    """The GUI's saved settings, or {} if the file is missing or unreadable"""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def cli_voice_settings(settings_path, voice=None, rate=None, volume=None):
+    """(voice id, rate, volume) from command-line overrides, else the GUI's saved settings
+
+    voice may be a full voice id or part of a voice name like "zira";
+    raises LookupError if no installed voice matches.
+    """
+    settings = load_settings_file(settings_path)
+    rate = rate or settings.get("rate") or 150
+    volume = volume if volume is not None else settings.get("volume", 1.0)
+    if not voice:
+        return settings.get("voice"), rate, volume
+    catalog = VoiceCatalog(os.path.join(os.path.dirname(os.path.abspath(settings_path)),
+                                        "voice_catalog.json"))
+    def find(voices):
+        return next((v for v in voices if v.id == voice), None) or \
+            next((v for v in voices if voice.lower() in (v.name or "").lower()), None)
+    match = find(catalog.load() or [])
+    if match is None:
+        match = find(catalog.refresh())  # Possibly installed since the catalog was saved
+    if match is None:
+        raise LookupError(f"Unknown voice: {voice}")
+    return match.id, rate, volume
+
+
+def batch_main(argv=None):
+    """Entry point for `python TTSPython.py export [options] in_dir out_dir`"""
+    parser = argparse.ArgumentParser(
+        prog="TTSPython.py export",
+        description="Convert a directory of .txt files to WAV audio without the GUI.")
+    parser.add_argument("in_dir", help="directory searched recursively for .txt files")
+    parser.add_argument("out_dir", help="directory for .wav files (mirrors in_dir)")
+    parser.add_argument("--jobs", "-j", type=int, default=0,
+                        help="worker processes (default: one per CPU core)")
+    parser.add_argument("--voice", help="voice id or part of a voice name (default: from settings)")
+    parser.add_argument("--rate", type=int, help="speech rate (default: from settings)")
+    parser.add_argument("--volume", type=float, help="volume 0.0-1.0 (default: from settings)")
+    parser.add_argument("--settings", default=SETTINGS_FILE, help="settings file to read defaults from")
+    parser.add_argument("--force", action="store_true", help="re-render files that are up to date")
+    args = parser.parse_args(argv)
+
+    try:
+        voice, rate, volume = cli_voice_settings(args.settings, args.voice, args.rate, args.volume)
+    except LookupError as e:
+        print(e, file=sys.stderr)
+        return 2
+    except Exception as e:
+        print(f"Failed to initialize TTS engine: {e}", file=sys.stderr)
+        return 1
+
+    if not os.path.isdir(args.in_dir):
+        print(f"Not a directory: {args.in_dir}", file=sys.stderr)
+        return 2
+
+    try:
+        stats = batch_export(args.in_dir, args.out_dir, voice=voice, rate=rate, volume=volume,
+                             jobs=args.jobs or None, force=args.force)
+    except KeyboardInterrupt:
+        print("\nInterrupted - run the same command again to resume.", file=sys.stderr)
+        return 130
+
+    elapsed = stats["seconds"]
+    print(f"\nConverted {stats['files'] - stats['failed']} file(s), skipped {stats['skipped']} "
+          f"up to date, {stats['failed']} failed")
+    if elapsed > 0:
+        print(f"Throughput: {stats['chars'] / elapsed:,.0f} chars/s, "
+              f"realtime factor {stats['audio_seconds'] / elapsed:.1f}x "
+              f"({stats['audio_seconds']:.0f} s of audio in {elapsed:.1f} s)")
+    return 1 if stats["failed"] else 0
@@ -0,0 +1,570 @@
+#!/usr/bin/env python3
+"""
+Local HTTP synthesis server for Read Aloud.
+
+Lets other programs on this machine use the voice, rate, volume, text
+normalization and audio cache configured in the GUI, without the GUI:
+
+    python tts_server.py [--port 8765] [--jobs 4]
+    python TTSPython.py --serve [options]
+
+Endpoints (localhost only by default):
+
+    POST   /synthesize   text in, WAV out. Streams with chunked transfer
+                         encoding as sentences render; ?stream=0 returns one
+                         complete file with a Content-Length instead.
+    POST   /speak        queue text for playback on this machine (202)
+    DELETE /speak        stop playback and drop queued speech
+    GET    /health       engine/worker state and load
+    GET    /metrics      latency percentiles and counters (JSON)
+
+Request bodies are plain UTF-8 text, or JSON {"text": "..."} with a JSON
+Content-Type. Nothing here imports tkinter, so it runs on headless machines.
+
+Browsers may send simple POSTs to localhost from any web page, so requests
+with an Origin header from a non-local page get 403, and so do requests for
+a non-local Host name while bound to loopback (DNS rebinding).
+"""
+
+import argparse
+import ipaddress
+import itertools
+import json
+import os
+import queue
+import shutil
+import struct
+import sys
+import tempfile
+import threading
+import time
+import wave
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from tts_core import (SETTINGS_FILE, AudioCache, EngineService, Metrics, Normalizer, _init_render_worker,
+                      _render_segment, cli_voice_settings, iter_chunks, load_settings_file, wav_duration)
+
+
+class BatchRenderer:
+    """Renders sentences to WAV on worker processes, batching concurrent requests
+
+    Each worker process keeps one engine for its lifetime (see
+    _init_render_worker), so engine startup is paid once per worker instead
+    of once per request. Sentences from all requests wait in one FIFO; when
+    a worker frees up, the dispatcher hands it everything waiting (up to
+    batch_chars, lingering batch_window_ms for more) as a single
+    save_to_file/runAndWait round. Cache hits never reach a worker.
+    """
+
+    def __init__(self, voice, rate, volume, jobs=None, cache=None, batch_chars=4000,
+                 batch_window_ms=5, metrics=None):
+        self.settings = (voice, rate, volume)
+        self.jobs = max(1, jobs or os.cpu_count() or 1)
+        self.cache = cache
+        self.batch_chars = batch_chars
+        self.batch_window = batch_window_ms / 1000
+        self.metrics = metrics
+        self.batches = 0
+        self.temp_dir = tempfile.mkdtemp(prefix="serve-", dir=cache.directory if cache is not None else None)
+        self.pool = ProcessPoolExecutor(max_workers=self.jobs, initializer=_init_render_worker,
+                                        initargs=self.settings)
+        self._pending = queue.Queue()   # (text, temp path, cache key, Future)
+        self._workers = threading.Semaphore(self.jobs)
+        self._counter = itertools.count()
+        self._thread = threading.Thread(target=self._dispatch, name="tts-serve-batch", daemon=True)
+        self._thread.start()
+
+    @property
+    def waiting(self):
+        return self._pending.qsize()
+
+    def render(self, text, pins=None):
+        """Future for (wav path, temporary) of one sentence; temporary files are the caller's to delete
+
+        With a cache and a pins set, the sentence's cache key is pinned and
+        added to pins, so other requests' renders can't evict its file before
+        the caller has sent it; pass pins to release() when done.
+        """
+        future = Future()
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(text, *self.settings)
+            # Pin before the lookup, so the hit can't be evicted in between
+            if pins is not None and key not in pins:
+                self.cache.pin([key])
+                pins.add(key)
+            path = self.cache.get(key)
+            if path is not None:
+                future.set_result((path, False))
+                return future
+        temp_path = os.path.join(self.temp_dir, f"{next(self._counter)}.wav")
+        self._pending.put((text, temp_path, key, future))
+        return future
+
+    def release(self, pins):
+        """Unpin the cache keys render() collected in pins"""
+        if self.cache is not None and pins:
+            self.cache.unpin(pins)
+            pins.clear()
+
+    def close(self):
+        self._pending.put(None)
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _dispatch(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            # Requests keep queueing while every worker is busy, so batches grow with load
+            self._workers.acquire()
+            batch = [item]
+            size = len(item[0])
+            deadline = time.perf_counter() + self.batch_window
+            while size < self.batch_chars:
+                try:
+                    item = self._pending.get(timeout=max(0.0, deadline - time.perf_counter()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._pending.put(None)
+                    break
+                batch.append(item)
+                size += len(item[0])
+            # Skip sentences whose request has gone away
+            batch = [item for item in batch if item[3].set_running_or_notify_cancel()]
+            if not batch:
+                self._workers.release()
+                continue
+            started = time.perf_counter()
+            try:
+                work = self.pool.submit(_render_segment, [(text, path) for text, path, _, _ in batch])
+            except Exception as e:
+                self._workers.release()
+                for *_, future in batch:
+                    future.set_exception(e)
+                continue
+            work.add_done_callback(lambda work, batch=batch, started=started: self._finish(work, batch, started))
+
+    def _finish(self, work, batch, started):
+        self._workers.release()
+        self.batches += 1
+        error = work.exception()
+        audio_seconds = 0.0
+        for text, temp_path, key, future in batch:
+            if error is not None:
+                future.set_exception(error)
+                continue
+            try:
+                if key is not None:
+                    result = (self.cache.put(key, temp_path), False)
+                else:
+                    result = (temp_path, True)
+                audio_seconds += wav_duration(result[0])
+                future.set_result(result)
+            except Exception as e:
+                future.set_exception(e)
+        if self.metrics is not None:
+            self.metrics.record("batch_sentences", len(batch))
+            if audio_seconds > 0:
+                self.metrics.record("render_rtf", (time.perf_counter() - started) / audio_seconds)
+
+
+def is_loopback(host):
+    """True for localhost names and loopback addresses (host from a URL, without port)"""
+    if not host:
+        return False
+    if host.lower().rstrip(".") == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def streaming_wav_header(nchannels, sampwidth, framerate):
+    """WAV header for a stream of unknown length (RIFF and data sizes set to the maximum)"""
+    return struct.pack("<4sI4s4sIHHIIHH4sI", b"RIFF", 0xFFFFFFFF, b"WAVE", b"fmt ", 16, 1,
+                       nchannels, framerate, framerate * nchannels * sampwidth,
+                       nchannels * sampwidth, sampwidth * 8, b"data", 0xFFFFFFFF)
+
+
+class SynthesisServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer holding the shared renderer, playback engine and limits"""
+
+    daemon_threads = True
+    lookahead = 16  # Sentences per request rendering ahead of the one being sent
+
+    def __init__(self, address, renderer, engine, normalizer=None, metrics=None,
+                 max_requests=8, max_speak_queue=32, max_chars=1000000, quiet=False):
+        super().__init__(address, RequestHandler)
+        self.renderer = renderer
+        self.engine = engine
+        self.normalizer = normalizer
+        self.metrics = metrics or Metrics()
+        self.max_chars = max_chars
+        self.max_speak_queue = max_speak_queue
+        self.quiet = quiet
+        self.started = time.time()
+        self.slots = threading.BoundedSemaphore(max_requests)
+        self.max_requests = max_requests
+        self.active = 0
+        self.speaking = []  # Queued/playing speak commands
+        self.counters = {"requests": 0, "rejected": 0, "errors": 0, "audio_bytes": 0,
+                         "synthesized": 0, "spoken": 0}
+        self._lock = threading.Lock()
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def track_active(self, change):
+        with self._lock:
+            self.active += change
+
+    def chunks(self, text):
+        chunks = iter_chunks(text)
+        return self.normalizer.normalize_chunks(chunks) if self.normalizer is not None else chunks
+
+    def pending_speech(self):
+        with self._lock:
+            self.speaking = [command for command in self.speaking if not command.done.is_set()]
+            return len(self.speaking)
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "ReadAloud"
+
+    # --- Routing ---
+
+    def do_GET(self):
+        if not self._allowed():
+            return
+        path = urlsplit(self.path).path
+        if path == "/health":
+            self._send_json(200, self._health())
+        elif path == "/metrics":
+            self._send_json(200, {"metrics": self.server.metrics.summary(),
+                                  "counters": dict(self.server.counters),
+                                  "batches": self.server.renderer.batches})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if not self._allowed():
+            return
+        url = urlsplit(self.path)
+        if url.path not in ("/synthesize", "/speak"):
+            self._send_json(404, {"error": "not found"})
+            return
+        # Bounded concurrency: turn requests away rather than queueing without limit
+        if not self.server.slots.acquire(blocking=False):
+            self.server.count("rejected")
+            self._send_json(503, {"error": "busy"}, {"Retry-After": "1"})
+            return
+        self.server.track_active(1)
+        started = time.perf_counter()
+        try:
+            self.server.count("requests")
+            text = self._read_text()
+            if text is None:
+                return
+            if url.path == "/synthesize":
+                stream = parse_qs(url.query).get("stream", ["1"])[-1] not in ("0", "false", "no")
+                self._synthesize(text, stream, started)
+            else:
+                self._speak(text)
+        finally:
+            self.server.track_active(-1)
+            self.server.slots.release()
+            self.server.metrics.record_since("request_ms", started)
+
+    def do_DELETE(self):
+        if not self._allowed():
+            return
+        if urlsplit(self.path).path != "/speak":
+            self._send_json(404, {"error": "not found"})
+            return
+        stopped = self.server.pending_speech()
+        self.server.engine.stop()
+        self._send_json(200, {"stopped": stopped})
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _allowed(self):
+        """Turn away requests made by web pages, sending 403; True if the request may proceed"""
+        origin = self.headers.get("Origin")
+        # Sandboxed pages and some redirects send "Origin: null"
+        if origin is not None and (origin == "null" or not is_loopback(urlsplit(origin).hostname)):
+            reason = "cross-origin requests are not allowed"
+        elif (is_loopback(self.server.server_address[0])
+              and not is_loopback(urlsplit("//" + self.headers.get("Host", "")).hostname)):
+            reason = "Host must be localhost"
+        else:
+            return True
+        self.server.count("rejected")
+        self.close_connection = True   # Any request body is left unread
+        self._send_json(403, {"error": reason})
+        return False
+
+    # --- Handlers ---
+
+    def _health(self):
+        engine = self.server.engine
+        if not engine.ready.is_set():
+            state = "starting"
+        elif engine.engine is None:
+            state = f"unavailable: {engine.init_error}"
+        else:
+            state = "ready"
+        cache = self.server.renderer.cache
+        return {"status": "ok", "engine": state, "workers": self.server.renderer.jobs,
+                "active_requests": self.server.active, "max_requests": self.server.max_requests,
+                "sentences_waiting": self.server.renderer.waiting,
+                "speech_queued": self.server.pending_speech(),
+                "cache": cache.stats() if cache is not None else None,
+                "uptime_s": round(time.time() - self.server.started, 1)}
+
+    def _read_text(self):
+        """Request body as text, or None after sending an error response"""
+        length = self.headers.get("Content-Length")
+        if length is None:
+            self._send_json(411, {"error": "Content-Length required"})
+            return None
+        try:
+            length = int(length)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # The body can't be found, so the connection can't be reused
+            self.close_connection = True
+            self._send_json(400, {"error": "invalid Content-Length"})
+            return None
+        # UTF-8 is at most 4 bytes per character
+        if length > self.server.max_chars * 4:
+            self.close_connection = True  # Body left unread
+            self._send_json(413, {"error": f"text longer than {self.server.max_chars} characters"})
+            return None
+        body = self.rfile.read(length)
+        try:
+            if self.headers.get_content_type() == "application/json":
+                text = json.loads(body)["text"]
+            else:
+                text = body.decode(self.headers.get_content_charset() or "utf-8")
+        except (ValueError, KeyError, TypeError, LookupError) as e:
+            self._send_json(400, {"error": f"bad request body: {e}"})
+            return None
+        if not isinstance(text, str) or not text.strip():
+            self._send_json(400, {"error": "no text"})
+            return None
+        if len(text) > self.server.max_chars:
+            self._send_json(413, {"error": f"text longer than {self.server.max_chars} characters"})
+            return None
+        return text
+
+    def _synthesize(self, text, stream, started):
+        renderer = self.server.renderer
+        chunks = iter(self.server.chunks(text))
+        pending = deque()
+        pins = set()
+        headers_sent = False
+        out = None
+        out_path = None
+        try:
+            while True:
+                while len(pending) < self.server.lookahead:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    pending.append(renderer.render(chunk.text, pins))
+                if not pending:
+                    break
+                path, temporary = pending.popleft().result()
+                try:
+                    with wave.open(path, "rb") as wav:
+                        params = (wav.getnchannels(), wav.getsampwidth(), wav.getframerate())
+                        frames = wav.readframes(wav.getnframes())
+                finally:
+                    if temporary:
+                        os.remove(path)
+                if not headers_sent:
+                    if stream:
+                        self.send_response(200)
+                        self.send_header("Content-Type", "audio/wav")
+                        self.send_header("Transfer-Encoding", "chunked")
+                        self.end_headers()
+                        self._write_chunk(streaming_wav_header(*params))
+                        self.server.metrics.record_since("ttfb_ms", started)
+                    else:
+                        out_path = os.path.join(renderer.temp_dir, f"response-{id(self)}-{time.monotonic_ns()}.wav")
+                        out = wave.open(out_path, "wb")
+                        out.setnchannels(params[0])
+                        out.setsampwidth(params[1])
+                        out.setframerate(params[2])
+                    headers_sent = True
+                if stream:
+                    self._write_chunk(frames)
+                else:
+                    out.writeframes(frames)
+            if not headers_sent:
+                self._send_json(400, {"error": "no speakable text"})
+                return
+            if stream:
+                self.wfile.write(b"0\r\n\r\n")
+            else:
+                out.close()
+                out = None
+                self._send_file(out_path, "audio/wav")
+                self.server.metrics.record_since("ttfb_ms", started)
+            self.server.count("synthesized")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # Client went away; drop its queued sentences
+        except Exception as e:
+            self.server.count("errors")
+            if headers_sent and stream:
+                self.close_connection = True  # Can't change the status mid-stream
+            else:
+                self._send_json(500, {"error": f"synthesis failed: {e}"})
+        finally:
+            for future in pending:
+                if not future.cancel() and future.done() and future.exception() is None:
+                    path, temporary = future.result()
+                    if temporary and os.path.exists(path):
+                        os.remove(path)
+            renderer.release(pins)
+            if out is not None:
+                out.close()
+            if out_path is not None and os.path.exists(out_path):
+                os.remove(out_path)
+
+    def _speak(self, text):
+        engine = self.server.engine
+        if engine.ready.is_set() and engine.engine is None:
+            self._send_json(503, {"error": f"speech engine unavailable: {engine.init_error}"})
+            return
+        queued = self.server.pending_speech()
+        if queued >= self.server.max_speak_queue:
+            self.server.count("rejected")
+            self._send_json(503, {"error": "speech queue full"}, {"Retry-After": "5"})
+            return
+        command = engine.speak_chunks(self.server.chunks(text))
+        with self.server._lock:
+            self.server.speaking.append(command)
+        self.server.count("spoken")
+        self._send_json(202, {"queued": queued + 1})
+
+    # --- Responses ---
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_file(self, path, content_type):
+        size = os.path.getsize(path)
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(size))
+        self.end_headers()
+        with open(path, "rb") as f:
+            shutil.copyfileobj(f, self.wfile, 65536)
+        self.server.count("audio_bytes", size)
+
+    def _write_chunk(self, data):
+        if data:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            self.server.count("audio_bytes", len(data))
+
+
+def serve_main(argv=None):
+    """Entry point for `python tts_server.py` and `python TTSPython.py --serve`"""
+    parser = argparse.ArgumentParser(
+        prog="tts_server.py",
+        description="Serve text-to-speech over a local HTTP API using the GUI's voice settings.")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="address to bind (default: 127.0.0.1, this machine only)")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on (default: 8765)")
+    parser.add_argument("--jobs", "-j", type=int, default=0,
+                        help="synthesis worker processes (default: one per CPU core)")
+    parser.add_argument("--max-requests", type=int, default=0,
+                        help="requests handled at once before answering 503 (default: 4 per worker)")
+    parser.add_argument("--max-chars", type=int, default=1000000, help="longest text accepted per request")
+    parser.add_argument("--batch-chars", type=int, default=4000,
+                        help="most text handed to a worker in one engine round")
+    parser.add_argument("--batch-window-ms", type=float, default=5,
+                        help="how long a batch waits for more sentences")
+    parser.add_argument("--voice", help="voice id or part of a voice name (default: from settings)")
+    parser.add_argument("--rate", type=int, help="speech rate (default: from settings)")
+    parser.add_argument("--volume", type=float, help="volume 0.0-1.0 (default: from settings)")
+    parser.add_argument("--settings", default=SETTINGS_FILE, help="settings file to read defaults from")
+    parser.add_argument("--no-cache", action="store_true", help="don't read or fill the audio cache")
+    parser.add_argument("--quiet", action="store_true", help="don't log each request")
+    args = parser.parse_args(argv)
+
+    try:
+        voice, rate, volume = cli_voice_settings(args.settings, args.voice, args.rate, args.volume)
+    except LookupError as e:
+        print(e, file=sys.stderr)
+        return 2
+    except Exception as e:
+        print(f"Failed to initialize TTS engine: {e}", file=sys.stderr)
+        return 1
+    settings = load_settings_file(args.settings)
+
+    cache = None
+    if not args.no_cache and settings.get("audio_cache_enabled", True):
+        try:
+            cache = AudioCache(os.path.join(os.path.dirname(os.path.abspath(args.settings)), "audio_cache"),
+                               settings.get("audio_cache_mb", 500) * 1024 * 1024)
+        except OSError as e:
+            print(f"Audio cache disabled: {e}", file=sys.stderr)
+    normalizer = Normalizer(settings.get("lexicon") or {}) if settings.get("normalize_text", True) else None
+
+    metrics = Metrics()
+    renderer = BatchRenderer(voice, rate, volume, jobs=args.jobs or None, cache=cache,
+                             batch_chars=args.batch_chars, batch_window_ms=args.batch_window_ms,
+                             metrics=metrics)
+    # Playback for /speak; initializes in the background like the GUI's engine
+    engine = EngineService(metrics=metrics).start()
+    engine.set_property("rate", rate)
+    engine.set_property("volume", volume)
+    if voice:
+        engine.set_property("voice", voice)
+    try:
+        server = SynthesisServer((args.host, args.port), renderer, engine, normalizer, metrics,
+                                 max_requests=args.max_requests or renderer.jobs * 4,
+                                 max_chars=args.max_chars, quiet=args.quiet)
+    except OSError as e:
+        print(f"Cannot listen on {args.host}:{args.port}: {e}", file=sys.stderr)
+        renderer.close()
+        engine.shutdown()
+        return 1
+    if args.host not in ("127.0.0.1", "localhost", "::1"):
+        print(f"Warning: listening on {args.host}; the API has no authentication", file=sys.stderr)
+    print(f"Serving on http://{args.host}:{server.server_address[1]} "
+          f"({renderer.jobs} worker(s), voice {voice or 'default'}, rate {rate}) - Ctrl+C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping")
+    finally:
+        server.server_close()
+        renderer.close()
+        engine.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(serve_main())